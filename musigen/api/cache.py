@@ -0,0 +1,41 @@
+import hashlib
+import os
+from typing import Optional
+
+from ..utils import lru
+
+CACHE_SIZE_ENV = "MUSIGEN_CACHE_SIZE"
+DEFAULT_CACHE_SIZE = 1024
+
+# seeded responses never change, clients and CDNs may keep them
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+NO_CACHE_CONTROL = "no-store"
+
+
+class LRUCache(lru.LRUCache[str]):
+    """Responses by (url, seed), evicting the least recently used one when full"""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        super().__init__(max_size)
+
+    @classmethod
+    def from_env(cls) -> "LRUCache":
+        """Cache sized by the MUSIGEN_CACHE_SIZE variable"""
+
+        return cls(int(os.environ.get(CACHE_SIZE_ENV, DEFAULT_CACHE_SIZE)))
+
+
+def make_etag(content: str) -> str:
+    """Strong ETag of the response content"""
+
+    return '"' + hashlib.sha1(content.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match request header matches the ETag"""
+
+    if if_none_match is None:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+from ..utils import metrics
+
+WORKERS_ENV = "MUSIGEN_WORKERS"
+QUEUE_SIZE_ENV = "MUSIGEN_QUEUE_SIZE"
+DEFAULT_QUEUE_SIZE = 64
+
+
+class ServerOverloaded(Exception):
+    """More jobs are in flight than the executor accepts"""
+
+
+class CoalescingExecutor:
+    """Runs CPU bound jobs off the event loop on a bounded process pool
+
+    Jobs submitted with the same key while one is still in flight share its result
+    instead of being computed again. At most `max_workers + max_queue` distinct jobs
+    are in flight, further submissions raise `ServerOverloaded` so that the server
+    can shed load instead of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        executor_factory: Callable[[int], Executor] = ProcessPoolExecutor,
+    ) -> None:
+        if max_queue < 0:
+            raise ValueError("Queue size can only be positive!")
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.executor_factory = executor_factory
+        self.executor: Optional[Executor] = None
+        self.in_flight: dict[Hashable, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> "CoalescingExecutor":
+        """Executor sized by the MUSIGEN_WORKERS and MUSIGEN_QUEUE_SIZE variables"""
+
+        max_workers = int(os.environ.get(WORKERS_ENV, 0)) or None
+        max_queue = int(os.environ.get(QUEUE_SIZE_ENV, DEFAULT_QUEUE_SIZE))
+        return cls(max_workers=max_workers, max_queue=max_queue)
+
+    @property
+    def max_in_flight(self) -> int:
+        return self.max_workers + self.max_queue
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        """Run `fn(*args)` in the pool, or join the in flight job with the same key
+
+        :param key: identifies jobs with the same result
+        :param fn: picklable function to be run
+        :raises ServerOverloaded: if the number of jobs in flight is at its limit
+        :returns: result of the job
+        """
+
+        future = self.in_flight.get(key)
+        if future is None:
+            if len(self.in_flight) >= self.max_in_flight:
+                raise ServerOverloaded(f"{len(self.in_flight)} jobs in flight")
+
+            if self.executor is None:
+                self.executor = self.executor_factory(self.max_workers)
+
+            future = asyncio.ensure_future(self._job(fn, *args))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda f: self._job_done(key, f))
+
+        # a disconnecting client must not cancel the job for the others
+        return await asyncio.shield(future)
+
+    async def _job(self, fn: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            if not metrics.enabled():
+                return await loop.run_in_executor(self.executor, fn, *args)
+
+            # hooks in the worker record into a snapshot merged here
+            result, snapshot = await loop.run_in_executor(
+                self.executor, metrics.call_recorded, fn, *args
+            )
+            metrics.registry.merge(snapshot)
+            return result
+        finally:
+            duration = time.perf_counter() - start
+            metrics.registry.observe(metrics.JOB_SECONDS, duration)
+
+    def _job_done(self, key: Hashable, future: asyncio.Future):
+        self.in_flight.pop(key, None)
+        if not future.cancelled():
+            # mark the exception retrieved even if every waiter went away
+            future.exception()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -1,5 +1,25 @@
+from ..core.codec import (
+    HEX,
+    MAX_HASH_LENGTH,
+    CodecError,
+    check_hash_length,
+    decode_population,
+    detect_encoding,
+    encode_population,
+)
+from ..core.genome import GenomeMatrix
+
+# room for the "-<scale>-<bpm>" suffix after the grid hash
+MAX_URL_LENGTH = MAX_HASH_LENGTH + 64
+
+
 def decodeUrl(url: str):
+    check_hash_length(url, MAX_URL_LENGTH)
+
     url_data = url.rsplit("-", maxsplit=2)
+    if len(url_data) != 3:
+        raise CodecError("Url must be <grid>-<scale>-<bpm>")
+
     bpm = url_data.pop()
     scale = url_data.pop()
     grid_hash = url_data.pop()
@@ -9,3 +29,25 @@ def decodeUrl(url: str):
 def encodeUrl(grid, scale, bpm):
     url = f"{grid}-{scale}-{bpm}"
     return url
+
+
+def decodeGridUrl(url: str) -> tuple[GenomeMatrix, str, str, str]:
+    """Decode the synth pad url straight to the grid's genome matrix
+
+    :param url: synth pad url, <grid>-<scale>-<bpm>
+    :returns: genome matrix, scale, bpm and the encoding of the grid hash
+    """
+
+    grid_hash, scale, bpm = decodeUrl(url)
+    return decode_population(grid_hash), scale, bpm, detect_encoding(grid_hash)
+
+
+def encodeGridUrl(grid: GenomeMatrix, scale, bpm, encoding: str = HEX) -> str:
+    """Encode a grid's genome matrix as a synth pad url
+
+    :param grid: genome matrix, one row per grid row
+    :param encoding: encoding of the grid hash, `codec.HEX` or `codec.BASE64`
+    :returns: synth pad url, <grid>-<scale>-<bpm>
+    """
+
+    return encodeUrl(encode_population(grid, encoding), scale, bpm)
@@ -1,13 +1,23 @@
-import random
+from typing import Optional
 
+import numpy as np
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from ..core.codec import detect_encoding, encode_population
+from ..core.diversity import Diversity
 from ..core.evolution import Evolution
+from ..core.fitness import zero_fitness
 from ..core.population import Population
+from .cache import LRUCache
+from .executor import CoalescingExecutor
 from .hash import decodeUrl, encodeUrl
+from .service import adaptive_mutation, evolution_router, install_metrics
+from .stream import GenerationStream
 
 app = FastAPI()
+executor = CoalescingExecutor.from_env()
+cache = LRUCache.from_env()
 
 origins = [
     "http://localhost",
@@ -24,28 +34,59 @@ app.add_middleware(
 )
 
 
-def main(grid_hash: str) -> str:
+def create_evolution(
+    seed: Optional[int] = None, generation_limit: int = 3
+) -> Evolution:
     mutation_probability = 0.5
     num_mutations = 5
 
-    evo = Evolution(
+    return Evolution(
         mutation_probability=mutation_probability,
         num_mutation_rounds=num_mutations,
         fitness_limit=5,
-        generation_limit=3,
+        generation_limit=generation_limit,
+        rng=np.random.default_rng(seed),
+        adaptive_mutation=adaptive_mutation(),
     )
 
+
+def main(grid_hash: str, seed: Optional[int] = None) -> str:
+    evo = create_evolution(seed)
+
     ppl = Population.from_hash(grid_hash)
-    random.shuffle(ppl.genomes)
+    ppl.genomes = evo.rng.permutation(ppl.bits)
     evo.run_evolution(ppl)
 
-    return ppl.to_hash()
+    return ppl.to_hash(detect_encoding(grid_hash))
 
 
-@app.get("/{synthpad_data_url}")
-def read_item(synthpad_data_url: str):
+def evolve_url(synthpad_data_url: str, seed: Optional[int] = None) -> str:
     grid_hash, scale, bpm = decodeUrl(synthpad_data_url)
+    updated_grid_hash = main(grid_hash, seed)
+    return encodeUrl(updated_grid_hash, scale, bpm)
 
-    updated_grid_hash = main(grid_hash)
 
-    return encodeUrl(updated_grid_hash, scale, bpm)
+def stream_url(
+    synthpad_data_url: str, generations: int, seed: Optional[int] = None
+) -> GenerationStream:
+    grid_hash, scale, bpm = decodeUrl(synthpad_data_url)
+    encoding = detect_encoding(grid_hash)
+    evo = create_evolution(seed, generation_limit=generations + 1)
+
+    ppl = Population.from_hash(grid_hash)
+    ppl.genomes = evo.rng.permutation(ppl.bits)
+    stream = evo.iter_generations(ppl, zero_fitness)
+
+    # the first generation is the grid of the url itself
+    next(stream)
+    for genomes, stats in stream:
+        yield encodeUrl(encode_population(genomes, encoding), scale, bpm), stats
+
+
+def url_diversity(synthpad_data_url: str) -> Diversity:
+    grid_hash, _, _ = decodeUrl(synthpad_data_url)
+    return Population.from_hash(grid_hash).diversity()
+
+
+install_metrics(app, "mint", executor, cache)
+app.include_router(evolution_router(evolve_url, url_diversity, stream_url))
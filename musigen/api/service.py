@@ -0,0 +1,190 @@
+import os
+import time
+from typing import Callable, Optional
+
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request, WebSocket
+from fastapi.responses import JSONResponse, Response
+
+from ..core.diversity import Diversity
+from ..utils import metrics
+from .cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    NO_CACHE_CONTROL,
+    LRUCache,
+    etag_matches,
+    make_etag,
+)
+from .executor import CoalescingExecutor, ServerOverloaded
+from .stream import (
+    MAX_STREAM_GENERATIONS,
+    GenerationStream,
+    diversity_message,
+    send_generations,
+)
+
+ADAPTIVE_MUTATION_ENV = "MUSIGEN_ADAPTIVE_MUTATION"
+
+
+def adaptive_mutation() -> bool:
+    """Whether the apps adapt mutation to diversity, set by MUSIGEN_ADAPTIVE_MUTATION
+
+    Read where the evolution is created, so in the worker processes too.
+    """
+
+    return os.environ.get(ADAPTIVE_MUTATION_ENV, "") not in ("", "0")
+
+
+def install_metrics(
+    app: FastAPI, name: str, executor: CoalescingExecutor, cache: LRUCache
+):
+    """Serve the executor and cache of an app, and its metrics at /metrics
+
+    The routes of `evolution_router` read the executor and cache from the app
+    state, where they can be swapped at runtime. Watched metrics are labelled with
+    the app's name, so that several apps share the registry.
+
+    :param app: app to install the middleware and routes on, before any catch all
+        route
+    :param name: label of the app's metrics
+    :param executor: executor running the evolution jobs of the app
+    :param cache: cache of the app's seeded responses
+    """
+
+    app.state.executor = executor
+    app.state.cache = cache
+
+    def watch(metric: str, description: str, read: Callable[[], float], **kwargs):
+        metrics.registry.watch(metric, description, read, app=name, **kwargs)
+
+    watch(
+        "musigen_jobs_in_flight",
+        "Evolution jobs running or waiting for a worker",
+        lambda: len(app.state.executor.in_flight),
+    )
+    watch(
+        "musigen_cache_entries",
+        "Responses in the cache",
+        lambda: len(app.state.cache),
+    )
+    watch(
+        "musigen_cache_hits_total",
+        "Cache lookups answered",
+        lambda: app.state.cache.hits,
+        kind="counter",
+    )
+    watch(
+        "musigen_cache_misses_total",
+        "Cache lookups missed",
+        lambda: app.state.cache.misses,
+        kind="counter",
+    )
+    watch(
+        "musigen_cache_hit_ratio",
+        "Share of cache lookups answered",
+        lambda: app.state.cache.hit_ratio(),
+    )
+
+    @app.middleware("http")
+    async def time_requests(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        duration = time.perf_counter() - start
+        metrics.registry.observe(
+            metrics.REQUEST_SECONDS,
+            duration,
+            app=name,
+            status=str(response.status_code),
+        )
+        return response
+
+    @app.get("/metrics")
+    def read_metrics():
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+    @app.on_event("shutdown")
+    def shutdown_executor():
+        app.state.executor.shutdown()
+
+
+def evolution_router(
+    evolve_url: Callable[[str, Optional[int]], str],
+    url_diversity: Callable[[str], Diversity],
+    stream_url: Callable[[str, int, Optional[int]], GenerationStream],
+) -> APIRouter:
+    """Routes evolving, streaming and describing the grids of synthpad urls
+
+    The GET route of a url catches everything, so include the router last.
+
+    :param evolve_url: picklable function evolving a url, run in the app's
+        executor, see `install_metrics`
+    :param url_diversity: picklable function answering the diversity of the grid
+        of a url
+    :param stream_url: picklable generator function of the urls and stats of the
+        generations evolved from a url, see `stream.send_generations`
+    """
+
+    router = APIRouter()
+
+    @router.get("/stats/{synthpad_data_url}")
+    def read_stats(synthpad_data_url: str):
+        try:
+            diversity = url_diversity(synthpad_data_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return diversity_message(diversity)
+
+    @router.websocket("/ws/{synthpad_data_url}")
+    async def stream_generations(
+        websocket: WebSocket,
+        synthpad_data_url: str,
+        generations: int = Query(10, ge=1, le=MAX_STREAM_GENERATIONS),
+        seed: Optional[int] = Query(None, ge=0),
+    ):
+        await send_generations(
+            websocket,
+            websocket.app.state.executor,
+            stream_url,
+            synthpad_data_url,
+            generations,
+            seed,
+        )
+
+    @router.get("/{synthpad_data_url}")
+    async def read_item(
+        synthpad_data_url: str,
+        request: Request,
+        seed: Optional[int] = Query(None, ge=0),
+    ):
+        if synthpad_data_url == "favicon.ico":
+            return
+
+        executor: CoalescingExecutor = request.app.state.executor
+        cache: LRUCache = request.app.state.cache
+
+        # only seeded results are reproducible, and hence cacheable
+        key = (synthpad_data_url, seed)
+        content = cache.get(key) if seed is not None else None
+
+        if content is None:
+            try:
+                content = await executor.run(key, evolve_url, synthpad_data_url, seed)
+            except ValueError as e:
+                # undecodable urls and grids too small to evolve
+                raise HTTPException(status_code=400, detail=str(e))
+            except ServerOverloaded:
+                raise HTTPException(
+                    status_code=503, detail="Server busy", headers={"Retry-After": "1"}
+                )
+            if seed is not None:
+                cache.put(key, content)
+
+        if seed is None:
+            return JSONResponse(content, headers={"Cache-Control": NO_CACHE_CONTROL})
+
+        etag = make_etag(content)
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(content, headers=headers)
+
+    return router
@@ -0,0 +1,181 @@
+import asyncio
+import multiprocessing
+import uuid
+from multiprocessing.managers import SyncManager
+from typing import Any, Callable, Iterator, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from ..core.diversity import Diversity
+from ..core.evolution import GenerationStats
+from ..utils.logger import Logger
+from .executor import CoalescingExecutor, ServerOverloaded
+
+# generations a single stream may ask for
+MAX_STREAM_GENERATIONS = 100
+
+# close codes, RFC 6455
+INVALID_PAYLOAD = 1007
+INTERNAL_ERROR = 1011
+TRY_AGAIN_LATER = 1013
+
+
+# generations evolved from a url by a single job, with their stats
+GenerationStream = Iterator[tuple[str, GenerationStats]]
+
+_manager: Optional[SyncManager] = None
+
+
+def generation_message(url: str, stats: GenerationStats) -> dict[str, Any]:
+    return {
+        "generation": stats.generation,
+        "url": url,
+        "best_fitness": stats.best_fitness,
+        "average_fitness": stats.average_fitness,
+        "entropy": stats.entropy,
+        "hamming_diversity": stats.hamming_diversity,
+        "mutation_scale": stats.mutation_scale,
+    }
+
+
+def diversity_message(diversity: Diversity) -> dict[str, Any]:
+    return {
+        "num_genomes": diversity.num_genomes,
+        "genome_length": diversity.genome_length,
+        "entropy": diversity.entropy,
+        "hamming_diversity": diversity.hamming_diversity,
+        "mean_hamming_distance": diversity.mean_hamming_distance,
+        "allele_frequencies": diversity.allele_frequencies.tolist(),
+    }
+
+
+def stream_channel() -> tuple[Any, Any]:
+    """Queue and stop event shared with the job of a stream, in any worker process
+
+    The proxies are served by a manager process started with the first stream.
+    """
+
+    global _manager
+    if _manager is None:
+        _manager = multiprocessing.Manager()
+    return _manager.Queue(), _manager.Event()
+
+
+def run_stream(
+    stream_url: Callable[[str, int, Optional[int]], GenerationStream],
+    synthpad_data_url: str,
+    generations: int,
+    seed: Optional[int],
+    messages: Any,
+    stop: Any,
+):
+    """Drive the generations of a stream, the single job of a stream
+
+    Every generation is put on `messages` as soon as it is evolved, followed by
+    None once the stream ends, also when it fails. The next generation is only
+    evolved while `stop` is not set.
+    """
+
+    try:
+        for url, stats in stream_url(synthpad_data_url, generations, seed):
+            messages.put(generation_message(url, stats))
+            if stop.is_set():
+                break
+    finally:
+        messages.put(None)
+
+
+async def send_generations(
+    websocket: WebSocket,
+    executor: CoalescingExecutor,
+    stream_url: Callable[[str, int, Optional[int]], GenerationStream],
+    synthpad_data_url: str,
+    generations: int,
+    seed: Optional[int] = None,
+):
+    """Stream generations evolved from a url to a websocket client
+
+    A single job of the bounded executor drives `stream_url`, so the evolution and
+    its state carry over from one generation to the next, and hands every
+    generation back through a queue to be sent. The client cancels the stream by
+    sending anything or by disconnecting, the job then stops before evolving the
+    next generation. The socket is closed once all generations are sent, with
+    `TRY_AGAIN_LATER` if the executor is overloaded, `INVALID_PAYLOAD` if the url
+    does not decode or evolve and `INTERNAL_ERROR` on any other failure.
+
+    :param websocket: connection of the client, not accepted yet
+    :param executor: executor running the jobs
+    :param stream_url: picklable generator function of the generations evolved
+        from a url, given the url, the number of generations and the seed
+    :param synthpad_data_url: url the first generation is evolved from
+    :param generations: number of generations to send
+    :param seed: seed of the stream
+    """
+
+    await websocket.accept()
+    # resolves on the first message or disconnect of the client
+    cancelled = asyncio.ensure_future(websocket.receive())
+    messages, stop = stream_channel()
+    job = asyncio.ensure_future(
+        executor.run(
+            # every stream has its own queue, so streams never share a job
+            ("stream", uuid.uuid4()),
+            run_stream,
+            stream_url,
+            synthpad_data_url,
+            generations,
+            seed,
+            messages,
+            stop,
+        )
+    )
+    loop = asyncio.get_running_loop()
+    received: Optional[asyncio.Future] = None
+
+    try:
+        while True:
+            if received is None:
+                received = loop.run_in_executor(None, messages.get)
+            waiting = {received, cancelled}
+            if not job.done():
+                waiting.add(job)
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            if cancelled.done():
+                if cancelled.result()["type"] == "websocket.receive":
+                    await websocket.close()
+                return
+            if received.done():
+                message = received.result()
+                received = None
+                if message is None:
+                    break
+                await websocket.send_json(message)
+            elif job.exception() is not None:
+                # failed without running, e.g. on an overloaded executor
+                break
+
+        try:
+            await job
+        except ServerOverloaded:
+            await websocket.close(TRY_AGAIN_LATER, "Server busy")
+            return
+        except ValueError as e:
+            await websocket.close(INVALID_PAYLOAD, str(e))
+            return
+        except Exception:
+            Logger.get_logger().exception("Streaming generations failed")
+            await websocket.close(INTERNAL_ERROR)
+            return
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        cancelled.cancel()
+        # the job is shielded in the executor, it stops before the next generation
+        stop.set()
+        if not job.cancel():
+            job.exception()
+        if received is not None:
+            # wakes the thread still waiting on the queue
+            messages.put(None)
@@ -0,0 +1,194 @@
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+
+from ..core.codec import BASE64, HEX
+from ..core.evolution import MULTI_POINT, UNIFORM, Evolution
+from ..core.genome import generate_genomes
+from ..core.population import FITNESS_DTYPE, Population
+from ..core.words import GenerationBuffers
+from ..player.melody import Melody, decode_melodies
+from ..player.midi import encode_batch_midi
+from ..player.scale import tune_scale
+from ..player.server import AudioServer
+from ..player.tune import TuneMetadata
+
+NOTES_PER_BAR = 4
+
+
+@dataclass
+class BenchmarkCase:
+    """A hot path measured over a matrix of population shapes
+
+    `setup(rng, population_size, genome_length)` builds the inputs outside of the
+    timed region and `run(inputs)` is the timed call. Setup raises ValueError if the
+    case does not apply to the shape.
+    """
+
+    name: str
+    setup: Callable[[np.random.Generator, int, int], Any]
+    run: Callable[[Any], Any]
+    min_population_size: int = 1
+
+
+def benchmark_tune(genome_length: int) -> TuneMetadata:
+    """Tune using as many bars as fit in the genome"""
+
+    num_bars = genome_length // (NOTES_PER_BAR * AudioServer.BITS_PER_NOTE)
+    if num_bars == 0:
+        raise ValueError("Genome is too short for a single bar")
+
+    return TuneMetadata(
+        num_bars=num_bars,
+        num_notes=NOTES_PER_BAR,
+        num_steps=1,
+        pauses=True,
+        key="C",
+        scale="major",
+        root=4,
+        bpm=128,
+    )
+
+
+def random_population(
+    rng: np.random.Generator, population_size: int, genome_length: int
+) -> Population:
+    ppl = Population(generate_genomes(population_size, genome_length, rng))
+    ppl.fitness = rng.integers(0, 5, population_size, dtype=FITNESS_DTYPE)
+    return ppl
+
+
+def _generate(rng: np.random.Generator, population_size: int, genome_length: int):
+    return rng, population_size, genome_length
+
+
+def _run_generate(inputs):
+    rng, population_size, genome_length = inputs
+    Population().generate_population(population_size, genome_length, rng)
+
+
+def _sort(rng: np.random.Generator, population_size: int, genome_length: int):
+    return random_population(rng, population_size, genome_length)
+
+
+def _run_sort(ppl: Population):
+    ppl.sort_by_fitness()
+
+
+def _next_generation(
+    rng: np.random.Generator, population_size: int, genome_length: int
+):
+    evo = Evolution(
+        mutation_probability=0.5,
+        num_mutation_rounds=2,
+        fitness_limit=5,
+        generation_limit=1,
+        rng=rng,
+    )
+    return evo, random_population(rng, population_size, genome_length)
+
+
+def _run_next_generation(inputs):
+    evo, ppl = inputs
+    evo.next_generation(ppl)
+
+
+def _next_generation_words(crossover_method: str):
+    def setup(rng: np.random.Generator, population_size: int, genome_length: int):
+        evo = Evolution(
+            mutation_probability=0.5,
+            num_mutation_rounds=2,
+            fitness_limit=5,
+            generation_limit=1,
+            rng=rng,
+            crossover_method=crossover_method,
+            num_crossover_points=4,
+        )
+        ppl = random_population(rng, population_size, genome_length)
+        return evo, GenerationBuffers.from_genomes(ppl.bits), ppl.fitness
+
+    return setup
+
+
+def _run_next_generation_words(inputs):
+    evo, buffers, fitness = inputs
+    evo.next_generation_words(buffers, fitness)
+
+
+def _to_hash(encoding: str):
+    def setup(rng: np.random.Generator, population_size: int, genome_length: int):
+        return random_population(rng, population_size, genome_length), encoding
+
+    return setup
+
+
+def _run_to_hash(inputs):
+    ppl, encoding = inputs
+    ppl.to_hash(encoding)
+
+
+def _from_hash(encoding: str):
+    def setup(rng: np.random.Generator, population_size: int, genome_length: int):
+        ppl = random_population(rng, population_size, genome_length)
+        population_hash = ppl.to_hash(encoding)
+        # hashes beyond the codec limits are rejected, not benchmarked
+        Population.from_hash(population_hash)
+        return population_hash
+
+    return setup
+
+
+def _melodies(rng: np.random.Generator, population_size: int, genome_length: int):
+    tune = benchmark_tune(genome_length)
+    genomes = generate_genomes(population_size, genome_length, rng)
+    return genomes, tune, tune_scale(tune)
+
+
+def _run_decode_melodies(inputs):
+    genomes, tune, scale = inputs
+    decode_melodies(genomes, tune, scale, AudioServer.BITS_PER_NOTE)
+
+
+def _run_melody_from_genome(inputs):
+    genomes, tune, scale = inputs
+    for genome in genomes.tolist():
+        Melody(bits_per_note=AudioServer.BITS_PER_NOTE).from_genome(genome, tune, scale)
+
+
+def _run_encode_midi(inputs):
+    genomes, tune, scale = inputs
+    batch = decode_melodies(genomes, tune, scale, AudioServer.BITS_PER_NOTE)
+    for i in range(len(batch)):
+        encode_batch_midi(batch, i, tune.bpm)
+
+
+CASES = [
+    BenchmarkCase("population.generate", _generate, _run_generate),
+    BenchmarkCase("population.sort", _sort, _run_sort),
+    BenchmarkCase(
+        "evolution.next_generation",
+        _next_generation,
+        _run_next_generation,
+        min_population_size=2,
+    ),
+    BenchmarkCase(
+        "evolution.next_generation_words.multi_point",
+        _next_generation_words(MULTI_POINT),
+        _run_next_generation_words,
+        min_population_size=2,
+    ),
+    BenchmarkCase(
+        "evolution.next_generation_words.uniform",
+        _next_generation_words(UNIFORM),
+        _run_next_generation_words,
+        min_population_size=2,
+    ),
+    BenchmarkCase("codec.to_hash.hex", _to_hash(HEX), _run_to_hash),
+    BenchmarkCase("codec.to_hash.base64", _to_hash(BASE64), _run_to_hash),
+    BenchmarkCase("codec.from_hash.hex", _from_hash(HEX), Population.from_hash),
+    BenchmarkCase("codec.from_hash.base64", _from_hash(BASE64), Population.from_hash),
+    BenchmarkCase("melody.decode_batch", _melodies, _run_decode_melodies),
+    BenchmarkCase("melody.from_genome", _melodies, _run_melody_from_genome),
+    BenchmarkCase("midi.encode", _melodies, _run_encode_midi),
+]
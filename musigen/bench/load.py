@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+from ..api.executor import WORKERS_ENV, CoalescingExecutor
+from ..api.hash import encodeGridUrl
+from ..core.codec import BASE64, HEX
+from ..core.genome import generate_genomes
+from .runner import DEFAULT_SEED, environment
+
+# synth pad grids, rows (notes) x columns (steps)
+GRID_SHAPES = [(8, 16), (12, 32), (16, 64)]
+SCALES = ["major", "minor", "pentatonic"]
+CONCURRENCY = [1, 8, 32]
+WORKER_COUNTS = [1, 2, 4]
+DEFAULT_REQUESTS = 200
+DEFAULT_APP = "webserver:app"
+DEFAULT_PORT = 8765
+STARTUP_TIMEOUT = 30.0
+
+
+def synthpad_urls(
+    rng: np.random.Generator,
+    grid_shapes: list[tuple[int, int]],
+    seeded_fraction: float = 0.0,
+) -> Iterator[str]:
+    """Endless stream of request paths with random synth pad grids
+
+    Grids cycle through the given shapes, scales, tempos and both hash encodings.
+    A `seeded_fraction` of the requests pass one of 16 seeds, hitting the cache
+    once seen.
+    """
+
+    while True:
+        num_rows, num_columns = grid_shapes[rng.integers(len(grid_shapes))]
+        grid = generate_genomes(num_rows, num_columns, rng)
+        scale = SCALES[rng.integers(len(SCALES))]
+        bpm = str(rng.integers(60, 181))
+        encoding = HEX if rng.random() < 0.5 else BASE64
+        path = "/" + encodeGridUrl(grid, scale, bpm, encoding)
+        if rng.random() < seeded_fraction:
+            path += f"?seed={rng.integers(16)}"
+        yield path
+
+
+def child_pids(pid: int) -> list[int]:
+    """Processes started by any thread of a process, read from /proc"""
+
+    children: list[int] = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def process_tree_rss(pid: int, include_root: bool = True) -> Optional[int]:
+    """Resident memory in bytes of a process and all its descendants
+
+    Read from /proc, None where that is not available.
+
+    :param include_root: if False then only the descendants are counted
+    """
+
+    try:
+        rss = 0
+        if include_root:
+            with open(f"/proc/{pid}/status") as f:
+                rss = next(
+                    int(line.split()[1]) * 1024
+                    for line in f
+                    if line.startswith("VmRSS:")
+                )
+        children = child_pids(pid)
+    except (OSError, StopIteration):
+        return None
+
+    for child in children:
+        rss += process_tree_rss(child) or 0
+    return rss
+
+
+async def drive(
+    client: Any, paths: Iterator[str], num_requests: int, concurrency: int
+) -> dict[str, Any]:
+    """Send `num_requests` requests, at most `concurrency` of them at a time
+
+    :param client: `httpx.AsyncClient` bound to the server
+    :returns: throughput, latency percentiles and the count of every status
+    """
+
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    remaining = iter(range(num_requests))
+
+    async def worker():
+        for _ in remaining:
+            path = next(paths)
+            start = time.perf_counter()
+            try:
+                status = str((await client.get(path)).status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": num_requests,
+        "seconds": duration,
+        "requests_per_second": num_requests / duration,
+        "p50_seconds": p50,
+        "p95_seconds": p95,
+        "p99_seconds": p99,
+        "statuses": statuses,
+    }
+
+
+def load_app(target: str) -> Any:
+    """App of a "<module>:<attribute>" target, e.g. "webserver:app" """
+
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or "app")
+
+
+@contextlib.asynccontextmanager
+async def inprocess_client(target: str, workers: int):
+    """Client calling the app through an ASGI transport, `workers` processes
+
+    The app runs in this process, next to the load generator, so only the memory
+    of its worker processes is measured.
+
+    :returns: the client and the scope and reader of the measured memory
+    """
+
+    import httpx
+
+    app = load_app(target)
+
+    # the routes read the executor from the app state at request time
+    default_executor = app.state.executor
+    app.state.executor = CoalescingExecutor(
+        max_workers=workers, max_queue=default_executor.max_queue
+    )
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load"
+        ) as client:
+            yield client, "workers", lambda: process_tree_rss(
+                os.getpid(), include_root=False
+            )
+    finally:
+        app.state.executor.shutdown()
+        app.state.executor = default_executor
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(target: str, workers: int, port: int):
+    """Client of a local uvicorn server started with MUSIGEN_WORKERS=`workers`
+
+    :returns: the client and the scope and reader of the measured memory, the
+        whole server process tree
+    """
+
+    import httpx
+
+    env = dict(os.environ, **{WORKERS_ENV: str(workers)})
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            while True:
+                try:
+                    await client.get("/metrics")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("uvicorn did not start") from None
+                    await asyncio.sleep(0.1)
+            yield client, "server", lambda: process_tree_rss(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run_load(
+    target: str,
+    worker_counts: list[int],
+    concurrency_levels: list[int],
+    grid_shapes: list[tuple[int, int]],
+    num_requests: int = DEFAULT_REQUESTS,
+    seeded_fraction: float = 0.0,
+    seed: int = DEFAULT_SEED,
+    uvicorn: bool = False,
+    port: int = DEFAULT_PORT,
+) -> list[dict[str, Any]]:
+    """Load the app with every worker count and concurrency level
+
+    Every level starts with a short warm up, so that the pool processes are
+    running, and the memory of the server processes is read once it is done: the
+    whole server with uvicorn, only the pool workers in-process.
+
+    :returns: one record per worker count and concurrency level
+    """
+
+    results = []
+    for workers in worker_counts:
+        if uvicorn:
+            server = uvicorn_client(target, workers, port)
+        else:
+            server = inprocess_client(target, workers)
+
+        async with server as (client, rss_scope, read_rss):
+            for concurrency in concurrency_levels:
+                rng = np.random.default_rng([seed, workers, concurrency])
+                paths = synthpad_urls(rng, grid_shapes, seeded_fraction)
+                await drive(client, paths, min(num_requests, 2 * workers), workers)
+
+                record: dict[str, Any] = {
+                    "workers": workers,
+                    "concurrency": concurrency,
+                }
+                record.update(await drive(client, paths, num_requests, concurrency))
+                record["rss_scope"] = rss_scope
+                record["rss_bytes"] = read_rss()
+
+                print(format_record(record), file=sys.stderr)
+                results.append(record)
+
+    return results
+
+
+def format_record(record: dict[str, Any]) -> str:
+    rss = record["rss_bytes"]
+    errors = sum(
+        count
+        for status, count in record["statuses"].items()
+        if not status.startswith("2")
+    )
+    return (
+        f"workers {record['workers']:>3d}  concurrency {record['concurrency']:>4d}"
+        f"  {record['requests_per_second']:9.1f} req/s"
+        f"  p50 {record['p50_seconds'] * 1000:8.2f} ms"
+        f"  p95 {record['p95_seconds'] * 1000:8.2f} ms"
+        f"  p99 {record['p99_seconds'] * 1000:8.2f} ms"
+        f"  {record['rss_scope']} rss"
+        f" {rss / 2**20 if rss is not None else float('nan'):8.1f} MiB"
+        f"  errors {errors}"
+    )
+
+
+def parse_shape(shape: str) -> tuple[int, int]:
+    num_rows, _, num_columns = shape.partition("x")
+    try:
+        return int(num_rows), int(num_columns)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{shape!r} is not <rows>x<columns>")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m musigen.bench.load",
+        description="Load the evolution web service with random synth pad grids",
+    )
+    parser.add_argument(
+        "--app", default=DEFAULT_APP, help="app to load, <module>:<attribute>"
+    )
+    parser.add_argument(
+        "--uvicorn",
+        action="store_true",
+        help="serve the app with a local uvicorn instead of in-process",
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=WORKER_COUNTS, metavar="N"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=CONCURRENCY, metavar="N"
+    )
+    parser.add_argument(
+        "--grids",
+        type=parse_shape,
+        nargs="+",
+        default=GRID_SHAPES,
+        metavar="ROWSxCOLUMNS",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=DEFAULT_REQUESTS,
+        help="requests per worker count and concurrency level",
+    )
+    parser.add_argument(
+        "--seeded",
+        type=float,
+        default=0.0,
+        help="fraction of requests passing a seed, and hence cacheable",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="file the JSON results are written to")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(
+        run_load(
+            args.app,
+            args.workers,
+            args.concurrency,
+            args.grids,
+            args.requests,
+            args.seeded,
+            args.seed,
+            args.uvicorn,
+            args.port,
+        )
+    )
+    report = {"environment": environment(args.seed, repeat=1), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Optional
+
+import numpy as np
+
+from .cases import CASES, BenchmarkCase
+
+POPULATION_SIZES = [5, 100, 1_000, 10_000, 100_000]
+GENOME_LENGTHS = [128, 4_096, 131_072, 1_048_576]
+
+# shapes above this many bits are skipped, 256 MiB of unpacked genomes
+DEFAULT_MAX_BITS = 1 << 28
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 0
+
+
+def case_rng(seed: int, case: BenchmarkCase, shape: tuple[int, int]):
+    """Generator seeded per case and shape, so every cell is reproducible alone"""
+
+    return np.random.default_rng([seed, *shape, *case.name.encode()])
+
+
+def measure(
+    case: BenchmarkCase,
+    population_size: int,
+    genome_length: int,
+    repeat: int,
+    seed: int,
+) -> dict[str, Any]:
+    """Time a case on one population shape and record its peak memory
+
+    Inputs are set up again before every run, outside of the timed region. Peak
+    memory is traced in a separate run, since tracing slows allocations down.
+
+    :raises ValueError: if the case does not apply to the shape
+    :returns: timings in seconds, throughput and peak traced memory in bytes
+    """
+
+    shape = (population_size, genome_length)
+    timings = []
+    for _ in range(repeat):
+        inputs = case.setup(case_rng(seed, case, shape), *shape)
+        start = time.perf_counter()
+        case.run(inputs)
+        timings.append(time.perf_counter() - start)
+
+    inputs = case.setup(case_rng(seed, case, shape), *shape)
+    tracemalloc.start()
+    try:
+        case.run(inputs)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "best_seconds": best,
+        "mean_seconds": sum(timings) / len(timings),
+        "genomes_per_second": population_size / best if best else None,
+        "bits_per_second": population_size * genome_length / best if best else None,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def run_benchmarks(
+    cases: list[BenchmarkCase],
+    population_sizes: list[int],
+    genome_lengths: list[int],
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = DEFAULT_SEED,
+    max_bits: int = DEFAULT_MAX_BITS,
+) -> list[dict[str, Any]]:
+    """Run every case over the matrix of population sizes and genome lengths
+
+    :returns: one record per case and shape, skipped shapes carry the reason
+    """
+
+    results = []
+    for case in cases:
+        for population_size in population_sizes:
+            for genome_length in genome_lengths:
+                record: dict[str, Any] = {
+                    "case": case.name,
+                    "population_size": population_size,
+                    "genome_length": genome_length,
+                }
+                if population_size < case.min_population_size:
+                    record["skipped"] = "population too small"
+                elif population_size * genome_length > max_bits:
+                    record["skipped"] = f"more than {max_bits} bits"
+                else:
+                    try:
+                        record.update(
+                            measure(case, population_size, genome_length, repeat, seed)
+                        )
+                    except ValueError as e:
+                        record["skipped"] = str(e)
+
+                print(format_record(record), file=sys.stderr)
+                results.append(record)
+
+    return results
+
+
+def format_record(record: dict[str, Any]) -> str:
+    shape = f"{record['population_size']:>7d} x {record['genome_length']:>8d}"
+    if "skipped" in record:
+        return f"{record['case']:28s} {shape}  skipped: {record['skipped']}"
+
+    return (
+        f"{record['case']:28s} {shape}"
+        f"  {record['best_seconds'] * 1000:10.3f} ms"
+        f"  {record['bits_per_second'] or 0:12.3e} bits/s"
+        f"  {record['peak_memory_bytes'] / 2**20:9.2f} MiB"
+    )
+
+
+def environment(seed: int, repeat: int) -> dict[str, Any]:
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def compare(baseline: list[dict[str, Any]], results: list[dict[str, Any]]):
+    """Print the speedup of every measured shape over a previous run"""
+
+    def key(record):
+        return record["case"], record["population_size"], record["genome_length"]
+
+    previous = {key(record): record for record in baseline if "skipped" not in record}
+    for record in results:
+        old = previous.get(key(record))
+        if old is None or "skipped" in record:
+            continue
+        speedup = old["best_seconds"] / record["best_seconds"]
+        memory = record["peak_memory_bytes"] / max(old["peak_memory_bytes"], 1)
+        print(f"{format_record(record)}  {speedup:6.2f}x speed  {memory:6.2f}x memory")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m musigen.bench",
+        description="Benchmark the core, codec, melody and export hot paths",
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=POPULATION_SIZES, metavar="N"
+    )
+    parser.add_argument(
+        "--lengths", type=int, nargs="+", default=GENOME_LENGTHS, metavar="BITS"
+    )
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        metavar="PREFIX",
+        help="only run the cases whose name starts with one of the prefixes",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--max-bits", type=int, default=DEFAULT_MAX_BITS)
+    parser.add_argument("--output", help="file the JSON results are written to")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args(argv)
+
+    cases = CASES
+    if args.cases:
+        cases = [c for c in CASES if c.name.startswith(tuple(args.cases))]
+        if not cases:
+            parser.error(f"no case matches {args.cases}")
+
+    results = run_benchmarks(
+        cases, args.sizes, args.lengths, args.repeat, args.seed, args.max_bits
+    )
+    report = {"environment": environment(args.seed, args.repeat), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f)["results"], results)
+
+    return 0
@@ -0,0 +1,120 @@
+from typing import Optional
+
+import numpy as np
+
+from ..utils import metrics
+from .diversity import Diversity
+from .evolution import Evolution
+from .genome import BIT_DTYPE
+from .mutation import dedupe_genomes
+from .population import FITNESS_DTYPE, Population
+
+
+@metrics.timed("evolve_batch")
+def evolve_batch(
+    evo: Evolution, genomes: np.ndarray, fitness: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Create the next generation of many independent populations in one pass
+
+    Equivalent to calling `Evolution.next_generation` on each population, but the
+    sorting, selection, crossover and mutation of all populations are done with
+    single array operations over the stack. With adaptive mutation every population
+    is mutated at the scale of its own diversity, one population at a time.
+
+    :param evo: evolution settings shared by all populations
+    :param genomes: stacked genome matrices of shape
+        (num_populations, population_size, genome_length)
+    :param fitness: fitness of shape (num_populations, population_size), all
+        genomes are unrated if not given
+    :returns: stacked genome matrices of the new populations, same shape
+    :raises ValueError: if a population has too few genomes to select parents
+    """
+
+    genomes = np.asarray(genomes, dtype=BIT_DTYPE)
+    num_populations, population_size, genome_length = genomes.shape
+    if fitness is None:
+        fitness = np.zeros((num_populations, population_size), dtype=FITNESS_DTYPE)
+    fitness = np.asarray(fitness, dtype=FITNESS_DTYPE)
+
+    # sort every population in descending order of fitness
+    order = np.argsort(-fitness, axis=1, kind="stable")
+    fitness = np.take_along_axis(fitness, order, axis=1)
+    genomes = np.take_along_axis(genomes, order[..., None], axis=1)
+
+    num_pairs = (population_size + 1) // 2
+    index_a, index_b = evo.selection.select_batch(fitness, num_pairs, evo.rng)
+    metrics.count(metrics.SELECTION_DRAWS, 2 * num_pairs * num_populations)
+    metrics.count(metrics.CROSSOVERS, num_pairs * num_populations)
+
+    parents_a = np.take_along_axis(genomes, index_a[..., None], axis=1)
+    parents_b = np.take_along_axis(genomes, index_b[..., None], axis=1)
+    offspring_a, offspring_b = evo.crossover(
+        parents_a.reshape(-1, genome_length), parents_b.reshape(-1, genome_length)
+    )
+
+    # interleave so that offspring of a pair stay next to each other
+    shape = (num_populations, 2 * num_pairs, genome_length)
+    next_generation = np.empty(shape, dtype=BIT_DTYPE)
+    next_generation[:, 0::2] = offspring_a.reshape(num_populations, -1, genome_length)
+    next_generation[:, 1::2] = offspring_b.reshape(num_populations, -1, genome_length)
+    next_generation = next_generation[:, :population_size].copy()
+
+    # populations that already reached the fitness limit are carried forward
+    finished = fitness[:, 0] >= evo.fitness_limit
+
+    if evo.adaptive_mutation:
+        for i in np.flatnonzero(~finished):
+            evo.adapt_mutation(Diversity.from_genomes(genomes[i]))
+            evo.mutate(next_generation[i], inplace=True)
+    else:
+        flat_generation = next_generation.reshape(-1, genome_length)
+        evo.mutate(flat_generation, inplace=True)
+    if evo.dedupe:
+        for population in next_generation:
+            dedupe_genomes(population, evo.rng, inplace=True)
+
+    next_generation[finished] = genomes[finished]
+
+    return next_generation
+
+
+def evolve_populations(
+    evo: Evolution, populations: list[Population]
+) -> list[Population]:
+    """Create the next generation of each population, batching equal shapes
+
+    Populations with the same population size and genome length are stacked and
+    evolved together with `evolve_batch`.
+
+    :param evo: evolution settings shared by all populations
+    :param populations: independent populations, left unmodified
+    :returns: the next generation of each population, in the given order
+    :raises ValueError: if a population has too few genomes to select parents, as
+        in `Evolution.next_generation`
+    """
+
+    groups: dict[tuple[int, int], list[int]] = {}
+    for i, ppl in enumerate(populations):
+        groups.setdefault(ppl.bits.shape, []).append(i)
+
+    next_populations: list[Optional[Population]] = [None] * len(populations)
+    for members in groups.values():
+        genomes = np.stack([populations[i].bits for i in members])
+        fitness = np.stack([populations[i].fitness for i in members])
+
+        for i, bits in zip(members, evolve_batch(evo, genomes, fitness)):
+            next_populations[i] = Population(bits)
+
+    return next_populations
+
+
+def evolve_hashes(evo: Evolution, population_hashes: list[str]) -> list[str]:
+    """Evolve many population hashes, as sent by the synth pad, in one call
+
+    :param evo: evolution settings shared by all populations
+    :param population_hashes: hash representations of the populations
+    :returns: hashes of the next generation of each population, in the given order
+    """
+
+    populations = [Population.from_hash(h) for h in population_hashes]
+    return [ppl.to_hash() for ppl in evolve_populations(evo, populations)]
@@ -0,0 +1,168 @@
+"""Binary checkpoints of population generations
+
+A checkpoint file is a 32 byte header followed by one fixed size record per
+generation, in the order they were appended.
+
+header: magic b"MUSIGEN\\0", format version (u32), reserved (u32), population size
+    (u64) and genome length (u64), all little endian.
+record: the genome matrix packed to 8 bits per byte row-wise (`pack_genomes`),
+    zero padded to a multiple of 8 bytes, then the fitness as little endian int64.
+
+Since every record has the same size, appending a generation only writes its
+record at the end, and generation i is found at a fixed offset. A partially
+written last record, e.g. after a crash, is ignored.
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+from .genome import GenomeMatrix, pack_genomes, unpack_genomes
+
+MAGIC = b"MUSIGEN\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+
+PathLike = Union[str, Path]
+
+
+class CheckpointError(ValueError):
+    """The checkpoint file is malformed or holds populations of another shape"""
+
+
+def _row_bytes(genome_length: int) -> int:
+    return (genome_length + 7) // 8
+
+
+def _genomes_bytes(population_size: int, genome_length: int) -> int:
+    packed = population_size * _row_bytes(genome_length)
+    return (packed + 7) // 8 * 8
+
+
+def record_size(population_size: int, genome_length: int) -> int:
+    return _genomes_bytes(population_size, genome_length) + 8 * population_size
+
+
+def _record(genomes: GenomeMatrix, fitness: np.ndarray) -> bytes:
+    population_size, genome_length = genomes.shape
+    if len(fitness) != population_size:
+        raise CheckpointError("Every genome needs a fitness")
+
+    packed = pack_genomes(genomes).tobytes()
+    padding = bytes(_genomes_bytes(population_size, genome_length) - len(packed))
+    return packed + padding + np.asarray(fitness, dtype="<i8").tobytes()
+
+
+def read_header(path: PathLike) -> tuple[int, int]:
+    """Population size and genome length of the generations in a checkpoint"""
+
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise CheckpointError("Checkpoint header is truncated")
+
+    magic, version, _, population_size, genome_length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise CheckpointError("Not a population checkpoint")
+    if version != VERSION:
+        raise CheckpointError(f"Unsupported checkpoint version {version}")
+    if population_size == 0 or genome_length == 0:
+        raise CheckpointError("Checkpoint holds empty populations")
+
+    return population_size, genome_length
+
+
+def write_generation(
+    path: PathLike, genomes: GenomeMatrix, fitness: np.ndarray, append: bool = False
+):
+    """Write a generation to a checkpoint file
+
+    :param path: checkpoint file
+    :param genomes: genome matrix of the generation
+    :param fitness: fitness of every genome
+    :param append: if True then the generation is added after the ones already in
+        the file, which is created if missing. Otherwise the file is replaced.
+    :raises CheckpointError: if appending a population of another shape
+    """
+
+    genomes = np.asarray(genomes)
+    population_size, genome_length = genomes.shape
+    if population_size == 0 or genome_length == 0:
+        raise CheckpointError("Cannot checkpoint an empty population")
+    record = _record(genomes, fitness)
+
+    if append and os.path.exists(path) and os.path.getsize(path) > 0:
+        if read_header(path) != genomes.shape:
+            raise CheckpointError(
+                f"Checkpoint holds populations of shape {read_header(path)}"
+            )
+
+        size = record_size(population_size, genome_length)
+        with open(path, "r+b") as f:
+            # drop a partially written record before appending
+            stored = (f.seek(0, os.SEEK_END) - HEADER.size) // size
+            f.truncate(HEADER.size + stored * size)
+            f.seek(0, os.SEEK_END)
+            f.write(record)
+        return
+
+    header = HEADER.pack(MAGIC, VERSION, 0, population_size, genome_length)
+    with open(path, "wb") as f:
+        f.write(header + record)
+
+
+class GenerationHistory:
+    """Memory-mapped, read-only view of the generations in a checkpoint file
+
+    Opening is instant regardless of the file size, generations are only read from
+    disk when accessed. Arrays returned are views into the mapping, unless noted.
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        self.path = path
+        self.population_size, self.genome_length = read_header(path)
+        self.record_size = record_size(self.population_size, self.genome_length)
+        self.genomes_bytes = _genomes_bytes(self.population_size, self.genome_length)
+
+        num_generations = (os.path.getsize(path) - HEADER.size) // self.record_size
+        if num_generations == 0:
+            self.records = np.zeros((0, self.record_size), dtype=np.uint8)
+        else:
+            self.records = np.memmap(
+                path,
+                dtype=np.uint8,
+                mode="r",
+                offset=HEADER.size,
+                shape=(num_generations, self.record_size),
+            )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def packed(self, generation: int) -> np.ndarray:
+        """Packed genome matrix of a generation, see `pack_genomes`"""
+
+        row_bytes = _row_bytes(self.genome_length)
+        packed = self.records[generation, : self.population_size * row_bytes]
+        return packed.reshape(self.population_size, row_bytes)
+
+    def genomes(self, generation: int) -> GenomeMatrix:
+        """Genome matrix of a generation, unpacked into memory"""
+
+        return unpack_genomes(self.packed(generation), self.genome_length)
+
+    def fitness(self, generation: int) -> np.ndarray:
+        """Fitness of every genome of a generation"""
+
+        return self.records[generation, self.genomes_bytes :].view("<i8")
+
+    def best_fitness(self) -> np.ndarray:
+        """Best fitness of every generation, only reading the fitness arrays"""
+
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64)
+        fitness = self.records[:, self.genomes_bytes :].view("<i8")
+        return fitness.max(axis=1)
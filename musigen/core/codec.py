@@ -0,0 +1,199 @@
+"""Codec between population hashes and genome matrices
+
+hex: "-" separated rows in hex with a set MSB, see `Population.from_hash`.
+base64: "<rows>.<columns>.<payload>", the flattened genome matrix packed to 8 bits
+    per byte in unpadded base64url, about a third shorter than hex.
+
+Sizes are validated before anything is allocated.
+"""
+
+import base64
+import binascii
+
+import numpy as np
+
+from ..utils import metrics
+from .genome import BIT_DTYPE, GenomeMatrix
+
+HEX = "hex"
+BASE64 = "base64"
+ENCODINGS = (HEX, BASE64)
+
+MAX_HASH_LENGTH = 64 * 1024
+MAX_GENOMES = 4096
+MAX_GENOME_LENGTH = 64 * 1024
+
+BASE64_SEPARATOR = "."
+
+
+class CodecError(ValueError):
+    """The population hash is malformed or exceeds the size limits"""
+
+
+def detect_encoding(population_hash: str) -> str:
+    """Encoding of the given population hash, `HEX` or `BASE64`"""
+
+    return BASE64 if BASE64_SEPARATOR in population_hash else HEX
+
+
+def check_hash_length(population_hash: str, max_length: int = MAX_HASH_LENGTH):
+    if len(population_hash) > max_length:
+        raise CodecError(f"Population hash longer than {max_length} characters")
+
+
+def check_shape(num_genomes: int, genome_length: int):
+    if not 0 < num_genomes <= MAX_GENOMES:
+        raise CodecError(f"Number of genomes must be between 1 and {MAX_GENOMES}")
+    if not 0 < genome_length <= MAX_GENOME_LENGTH:
+        raise CodecError(f"Genome length must be between 1 and {MAX_GENOME_LENGTH}")
+
+
+def decode_hex(population_hash: str) -> GenomeMatrix:
+    """Decode a "-" separated hex population hash
+
+    :param population_hash: hex hash representation of the population
+    :returns: matrix of 0s and 1s with one genome per row
+    """
+
+    check_hash_length(population_hash)
+
+    rows = population_hash.split("-")
+    row_length = len(rows[0])
+    if any(len(row) != row_length for row in rows):
+        raise CodecError("All genomes in a population must be of same length")
+    check_shape(len(rows), 4 * row_length - 1)
+
+    # bytes.fromhex needs whole bytes, the leading nibble is zero padded
+    if row_length % 2:
+        joined = "0" + "0".join(rows)
+        row_length += 1
+    else:
+        joined = "".join(rows)
+
+    try:
+        raw = bytes.fromhex(joined)
+    except ValueError as e:
+        raise CodecError("Population hash is not valid hex") from e
+
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(rows), row_length // 2)
+    bits = np.unpackbits(packed, axis=1)
+
+    # the first set bit of every row is the length marker
+    marker = bits.argmax(axis=1)
+    has_marker = bits[np.arange(len(bits)), marker].all()
+    if not has_marker or (marker != marker[0]).any():
+        raise CodecError("All genomes in a population must be of same length")
+
+    genome_length = bits.shape[1] - marker[0] - 1
+    if genome_length == 0:
+        raise CodecError("Genomes can not be empty")
+    return np.ascontiguousarray(bits[:, marker[0] + 1 :], dtype=BIT_DTYPE)
+
+
+def encode_hex(genomes: GenomeMatrix) -> str:
+    """Encode a genome matrix as a "-" separated hex population hash
+
+    :param genomes: matrix of 0s and 1s with one genome per row
+    :returns: hex hash representation of the population
+    """
+
+    num_genomes, genome_length = genomes.shape
+
+    # marker bit followed by the genome, left padded with 0s to whole bytes
+    row_bits = 8 * -(-(genome_length + 1) // 8)
+    padded = np.zeros((num_genomes, row_bits), dtype=BIT_DTYPE)
+    padded[:, row_bits - genome_length - 1] = 1
+    padded[:, row_bits - genome_length :] = genomes
+
+    hex_data = np.packbits(padded, axis=1).tobytes().hex()
+
+    # drop the zero nibble a row may start with
+    row_chars = row_bits // 4
+    skip = row_chars - (-(-(genome_length + 1) // 4))
+    return "-".join(
+        hex_data[i * row_chars + skip : (i + 1) * row_chars]
+        for i in range(num_genomes)
+    )
+
+
+def decode_base64(population_hash: str) -> GenomeMatrix:
+    """Decode a "<rows>.<columns>.<payload>" base64url population hash
+
+    :param population_hash: base64 hash representation of the population
+    :returns: matrix of 0s and 1s with one genome per row
+    """
+
+    check_hash_length(population_hash)
+
+    try:
+        num_genomes_str, genome_length_str, payload = population_hash.split(
+            BASE64_SEPARATOR
+        )
+    except ValueError as e:
+        raise CodecError("Population hash must be <rows>.<columns>.<data>") from e
+
+    dimensions = (num_genomes_str, genome_length_str)
+    if not all(d.isascii() and d.isdigit() for d in dimensions):
+        raise CodecError("Population hash dimensions must be decimal numbers")
+    if len(num_genomes_str) > 6 or len(genome_length_str) > 8:
+        raise CodecError("Population hash dimensions too large")
+
+    num_genomes, genome_length = int(num_genomes_str), int(genome_length_str)
+    check_shape(num_genomes, genome_length)
+
+    num_bits = num_genomes * genome_length
+    num_bytes = -(-num_bits // 8)
+    if len(payload) != -(-4 * num_bytes // 3):
+        raise CodecError("Population hash data does not match its dimensions")
+
+    try:
+        raw = base64.b64decode(
+            payload + "=" * (-len(payload) % 4), altchars=b"-_", validate=True
+        )
+    except binascii.Error as e:
+        raise CodecError("Population hash data is not valid base64url") from e
+
+    bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), count=num_bits)
+    return bits.reshape(num_genomes, genome_length)
+
+
+def encode_base64(genomes: GenomeMatrix) -> str:
+    """Encode a genome matrix as a "<rows>.<columns>.<payload>" population hash
+
+    :param genomes: matrix of 0s and 1s with one genome per row
+    :returns: base64 hash representation of the population
+    """
+
+    num_genomes, genome_length = genomes.shape
+    raw = np.packbits(genomes, axis=None).tobytes()
+    payload = base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+    return BASE64_SEPARATOR.join((str(num_genomes), str(genome_length), payload))
+
+
+@metrics.timed("decode_population")
+def decode_population(population_hash: str) -> GenomeMatrix:
+    """Decode a population hash of either encoding
+
+    :param population_hash: hash representation of the population
+    :returns: matrix of 0s and 1s with one genome per row
+    """
+
+    if detect_encoding(population_hash) == BASE64:
+        return decode_base64(population_hash)
+    return decode_hex(population_hash)
+
+
+@metrics.timed("encode_population")
+def encode_population(genomes: GenomeMatrix, encoding: str = HEX) -> str:
+    """Encode a genome matrix as a population hash
+
+    :param genomes: matrix of 0s and 1s with one genome per row
+    :param encoding: `HEX` or `BASE64`
+    :returns: hash representation of the population
+    """
+
+    if encoding == BASE64:
+        return encode_base64(genomes)
+    if encoding == HEX:
+        return encode_hex(genomes)
+    raise ValueError(f"Unknown population hash encoding {encoding!r}")
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .genome import GenomeMatrix
+from .words import pack_words, unpack_words
+
+
+def bit_sliced_counts(words: np.ndarray) -> list[np.ndarray]:
+    """Number of set bits at every position over the rows of a word matrix
+
+    The rows are summed pairwise as binary numbers held in bit planes, with every
+    bitwise operation covering 64 positions at once, until a single row is left.
+    Level k adds numbers of k + 1 bits, with half as many rows as the level before,
+    so the whole sum costs O(num_rows * num_words) word operations.
+
+    :param words: word matrix of shape (num_rows, num_words)
+    :returns: bit planes of shape (num_words,), the count at a position is the sum
+        of plane k's bit at that position times 2**k
+    """
+
+    planes = [words]
+    while len(planes[0]) > 1:
+        if len(planes[0]) % 2:
+            # an odd row is paired with zeros
+            planes = [
+                np.concatenate([plane, np.zeros_like(plane[:1])]) for plane in planes
+            ]
+
+        carry = np.zeros_like(planes[0][0::2])
+        added = []
+        for plane in planes:
+            a, b = plane[0::2], plane[1::2]
+            partial = a ^ b
+            added.append(partial ^ carry)
+            carry = (a & b) | (partial & carry)
+        added.append(carry)
+        planes = added
+
+    return [plane[0] for plane in planes]
+
+
+def allele_counts_words(words: np.ndarray, genome_length: int) -> np.ndarray:
+    """Number of genomes with a 1 at every position of a packed genome matrix
+
+    :param words: packed genome matrix, see `words.pack_words`
+    :param genome_length: length of the genomes
+    :returns: counts of shape (genome_length,)
+    """
+
+    counts = np.zeros(genome_length, dtype=np.int64)
+    if len(words) == 0:
+        return counts
+
+    for k, plane in enumerate(bit_sliced_counts(words)):
+        counts += unpack_words(plane[None, :], genome_length)[0].astype(np.int64) << k
+    return counts
+
+
+@dataclass
+class Diversity:
+    """Genetic diversity of a population, derived from its allele counts
+
+    Everything is computed from the number of 1s at every position in O(L), the
+    mean pairwise Hamming distance included: a position contributes a distance
+    of 1 to each of the c * (n - c) pairs that differ there.
+    """
+
+    num_genomes: int
+    allele_counts: np.ndarray
+
+    @classmethod
+    def from_genomes(cls, genomes: GenomeMatrix) -> "Diversity":
+        """Diversity of an unpacked genome matrix, counted on its packed words"""
+
+        return cls.from_words(pack_words(genomes), genomes.shape[1])
+
+    @classmethod
+    def from_words(cls, words: np.ndarray, genome_length: int) -> "Diversity":
+        return cls(len(words), allele_counts_words(words, genome_length))
+
+    @property
+    def genome_length(self) -> int:
+        return len(self.allele_counts)
+
+    @property
+    def allele_frequencies(self) -> np.ndarray:
+        """Fraction of genomes with a 1 at every position"""
+
+        return self.allele_counts / max(self.num_genomes, 1)
+
+    @property
+    def bit_entropy(self) -> np.ndarray:
+        """Binary entropy of every position in bits, 0 where all genomes agree"""
+
+        p = self.allele_frequencies
+        with np.errstate(divide="ignore", invalid="ignore"):
+            entropy = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+        return np.nan_to_num(entropy)
+
+    @property
+    def entropy(self) -> float:
+        """Mean bit entropy, from 0 for identical genomes to 1"""
+
+        if self.genome_length == 0:
+            return 0.0
+        return float(self.bit_entropy.mean())
+
+    @property
+    def mean_hamming_distance(self) -> float:
+        """Mean Hamming distance over all pairs of genomes"""
+
+        n = self.num_genomes
+        if n < 2:
+            return 0.0
+        differing = self.allele_counts * (n - self.allele_counts)
+        return float(differing.sum() / (n * (n - 1) / 2))
+
+    @property
+    def hamming_diversity(self) -> float:
+        """Mean pairwise Hamming distance as a fraction of the genome length
+
+        About 0.5 for random genomes, 0 for identical ones.
+        """
+
+        if self.genome_length == 0:
+            return 0.0
+        return self.mean_hamming_distance / self.genome_length
@@ -1,16 +1,88 @@
 import random
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
 
-from .genome import Genome
-from .population import Population
+import numpy as np
+
+from ..utils import metrics
+from .diversity import Diversity
+from .fitness import FitnessFunction
+from .genome import BIT_DTYPE, Genome, GenomeMatrix
+from .mutation import (
+    dedupe_genomes,
+    geometric_positions,
+    mutate_bits,
+    mutate_rounds,
+    round_positions,
+)
+from .population import FITNESS_DTYPE, Population
+from .selection import FitnessProportionalSelection, SelectionStrategy
+from .words import (
+    GenerationBuffers,
+    crossover_words,
+    flip_words,
+    multi_point_masks,
+    pack_words,
+    uniform_masks,
+    unpack_words,
+)
+
+SINGLE_POINT = "single_point"
+MULTI_POINT = "multi_point"
+UNIFORM = "uniform"
+CROSSOVER_METHODS = (SINGLE_POINT, MULTI_POINT, UNIFORM)
+
+# hamming diversity adaptive mutation steers towards, random genomes are at 0.5
+DEFAULT_TARGET_DIVERSITY = 0.4
+
+
+@dataclass
+class EvolutionResult:
+    """Summary of a multi-generation `Evolution.run`"""
+
+    generations: int = 0
+    best_fitness: list[int] = field(default_factory=list)
+    average_fitness: list[float] = field(default_factory=list)
+    stop_reason: str = "generation_limit"
+
+
+@dataclass
+class GenerationStats:
+    """Fitness summary of one scored generation"""
+
+    generation: int
+    best_fitness: int
+    average_fitness: float
+    entropy: float = 0.0
+    hamming_diversity: float = 0.0
+    mutation_scale: float = 1.0
 
 
 class Evolution:
+    """Settings and random state of a genetic algorithm over genome matrices
+
+    With `adaptive_mutation` the mutation rates are scaled every generation by
+    `target_diversity` over the hamming diversity of the parents, bounded by
+    `max_mutation_scale` either way, see `adapt_mutation`. The default target of
+    0.4 sits just below the 0.5 of random genomes: a fresh random population
+    mutates at 0.8 times the configured rates, one converged to 0.1 at 4 times.
+    """
+
     def __init__(
         self,
         mutation_probability: float,
         num_mutation_rounds: int,
         fitness_limit: int,
         generation_limit: int,
+        rng: Optional[np.random.Generator] = None,
+        selection: Optional[SelectionStrategy] = None,
+        bit_mutation_rate: Optional[float] = None,
+        dedupe: bool = False,
+        crossover_method: str = SINGLE_POINT,
+        num_crossover_points: int = 2,
+        adaptive_mutation: bool = False,
+        target_diversity: float = DEFAULT_TARGET_DIVERSITY,
+        max_mutation_scale: float = 4.0,
     ) -> None:
         self.fitness_limit = fitness_limit
         self.generation_limit = generation_limit
@@ -20,6 +92,36 @@ class Evolution:
             raise ValueError("Number of mutations can only be positive!")
         self.num_mutation_rounds = num_mutation_rounds
 
+        if bit_mutation_rate is not None and not 0 <= bit_mutation_rate <= 1:
+            raise ValueError("Bit mutation rate must be between 0 and 1")
+        self.bit_mutation_rate = bit_mutation_rate
+
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        if selection is None:
+            selection = FitnessProportionalSelection()
+        self.selection = selection
+
+        # repeated genomes of a new generation are mutated until distinct
+        self.dedupe = dedupe
+
+        if crossover_method not in CROSSOVER_METHODS:
+            raise ValueError(f"Unknown crossover method {crossover_method!r}")
+        if num_crossover_points < 1:
+            raise ValueError("Crossover needs at least one cut point")
+        self.crossover_method = crossover_method
+        self.num_crossover_points = num_crossover_points
+
+        # mutation is scaled up as the population converges, down while diverse
+        if not 0 < target_diversity <= 1:
+            raise ValueError("Target diversity must be between 0 and 1")
+        if max_mutation_scale < 1:
+            raise ValueError("Maximum mutation scale must be at least 1")
+        self.adaptive_mutation = adaptive_mutation
+        self.target_diversity = target_diversity
+        self.max_mutation_scale = max_mutation_scale
+        self.mutation_scale = 1.0
+
     @staticmethod
     def single_point_crossover(
         genome_pair: tuple[Genome, Genome]
@@ -59,22 +161,238 @@ class Evolution:
 
         return crossover_genome_a, crossover_genome_b
 
-    # FIX: parameter genome changes as a side-effect
+    def crossover(
+        self, parents_a: GenomeMatrix, parents_b: GenomeMatrix
+    ) -> tuple[GenomeMatrix, GenomeMatrix]:
+        """Crossover of every row pair of two genome matrices at once
+
+        Each pair (parents_a[i], parents_b[i]) gets its own cross-over point, as in
+        `single_point_crossover`. Multi-point and uniform crossover are done on the
+        genomes packed to 64 bit words, see `crossover_masks`.
+
+        :param parents_a: matrix of first parents
+        :param parents_b: matrix of second parents
+        :returns: a 2-tuple of crossed-over genome matrices
+        """
+
+        if parents_a.shape != parents_b.shape:
+            raise ValueError("Parent matrices a and b must be of same shape")
+
+        num_pairs, genome_length = parents_a.shape
+        if genome_length < 2:
+            return parents_a.copy(), parents_b.copy()
+
+        if self.crossover_method != SINGLE_POINT:
+            words_a, words_b = pack_words(parents_a), pack_words(parents_b)
+            masks = self.crossover_masks(num_pairs, genome_length)
+            out_a, out_b = np.empty_like(words_a), np.empty_like(words_b)
+            crossover_words(words_a, words_b, masks, out_a, out_b)
+            crossover_a = unpack_words(out_a, genome_length)
+            return crossover_a, unpack_words(out_b, genome_length)
+
+        cpt = self.rng.integers(1, genome_length, size=(num_pairs, 1))
+        take_a = np.arange(genome_length) < cpt
+
+        crossover_a = np.where(take_a, parents_a, parents_b)
+        crossover_b = np.where(take_a, parents_b, parents_a)
+
+        return crossover_a, crossover_b
+
+    def crossover_masks(
+        self, num_pairs: int, genome_length: int, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Packed crossover masks of `crossover_method`, set bits take parent a
+
+        :param num_pairs: number of genome pairs
+        :param genome_length: length of the genomes, at least 2
+        :param out: word matrix to write the masks to
+        :returns: word matrix of the masks, see `words.multi_point_masks`
+        """
+
+        if self.crossover_method == UNIFORM:
+            return uniform_masks(num_pairs, genome_length, self.rng, out)
+
+        num_points = 1
+        if self.crossover_method == MULTI_POINT:
+            num_points = self.num_crossover_points
+        return multi_point_masks(num_pairs, genome_length, num_points, self.rng, out)
+
     def create_mutations(self, genome: Genome) -> Genome:
         """Mutate the given genome by randomly flipping its bit sequence
 
+        The given genome is left untouched, a mutated copy is returned.
+
         :param genome: genome to be mutated
-        :param number_of_mutation_rounds: number of times to flip bits
-        :param mutation_probability: probability of bit flip occuring
         :returns: mutated genome
         """
 
-        for _ in range(self.num_mutation_rounds):
-            mutation_bit_index = random.randrange(len(genome))
-            if random.random() < self.mutation_probability:
-                genome[mutation_bit_index] ^= 1  # bit flip by XOR with 1
+        genomes = np.asarray([genome], dtype=BIT_DTYPE)
+        return self.mutate(genomes)[0].tolist()
+
+    def adapt_mutation(self, diversity: Diversity) -> float:
+        """Scale the mutation rates by how far the diversity is from the target
+
+        Does nothing unless `adaptive_mutation` is set. The scale is the ratio of
+        `target_diversity` to the hamming diversity of the parents, bounded by
+        `max_mutation_scale` either way, and applies to the mutation probability
+        or the bit mutation rate. Mutation is raised below the target and lowered
+        above it.
+
+        :param diversity: diversity of the generation being bred from
+        :returns: the mutation scale now in use
+        """
+
+        if self.adaptive_mutation:
+            ratio = self.target_diversity / max(diversity.hamming_diversity, 1e-6)
+            bound = self.max_mutation_scale
+            self.mutation_scale = float(np.clip(ratio, 1 / bound, bound))
+        return self.mutation_scale
+
+    def mutation_rates(self) -> tuple[float, Optional[float]]:
+        """Mutation probability and bit mutation rate, scaled by `mutation_scale`"""
+
+        probability = min(self.mutation_probability * self.mutation_scale, 1.0)
+        bit_rate = self.bit_mutation_rate
+        if bit_rate is not None:
+            bit_rate = min(bit_rate * self.mutation_scale, 1.0)
+        return probability, bit_rate
+
+    def mutate(self, genomes: GenomeMatrix, inplace: bool = False) -> GenomeMatrix:
+        """Mutate every genome of the matrix in a single pass
+
+        By default each genome gets `num_mutation_rounds` chances of flipping a
+        random bit, each with `mutation_probability`. If `bit_mutation_rate` is set
+        then every bit flips independently with that rate instead.
+
+        The flips of the whole generation are sampled at once and applied as one
+        XOR, the cost scales with the number of flips. Unless `inplace` is set the
+        matrix is copied on write, so parent genomes are never modified.
+
+        :param genomes: matrix of genomes to be mutated
+        :param inplace: if True then the input matrix is modified
+        :returns: mutated genome matrix
+        """
+
+        probability, bit_rate = self.mutation_rates()
+        if bit_rate is not None:
+            return mutate_bits(genomes, bit_rate, self.rng, inplace)
+
+        return mutate_rounds(
+            genomes, self.num_mutation_rounds, probability, self.rng, inplace
+        )
+
+    def mutate_words(self, words: np.ndarray, genome_length: int):
+        """Mutate every genome of a packed genome matrix inplace, as in `mutate`"""
+
+        num_genomes = len(words)
+        probability, bit_rate = self.mutation_rates()
+        if bit_rate is not None:
+            positions = geometric_positions(
+                num_genomes * genome_length, bit_rate, self.rng
+            )
+        else:
+            positions = round_positions(
+                num_genomes,
+                genome_length,
+                self.num_mutation_rounds,
+                probability,
+                self.rng,
+            )
+        flip_words(words, genome_length, positions)
+
+    @metrics.timed("next_generation")
+    def next_generation(
+        self, ppl: Population, diversity: Optional[Diversity] = None
+    ) -> GenomeMatrix:
+        """Create the genome matrix of the next generation of the population
+
+        :param ppl: population of genomes
+        :param diversity: diversity of the population if already known, used by
+            adaptive mutation
+        :returns: genome matrix of the new population
+        """
+
+        ppl.sort_by_fitness()
+
+        if ppl.get_genome_fitness(index=0) >= self.fitness_limit:
+            return ppl.bits
+        if self.adaptive_mutation:
+            if diversity is None:
+                diversity = ppl.diversity()
+            self.adapt_mutation(diversity)
+
+        # an odd sized population drops the last offspring to keep its size
+        num_pairs = (len(ppl) + 1) // 2
+        index_a, index_b = self.selection.select_pairs(ppl, num_pairs, self.rng)
+        metrics.count(metrics.SELECTION_DRAWS, 2 * num_pairs)
+        metrics.count(metrics.CROSSOVERS, num_pairs)
+        offspring_a, offspring_b = self.crossover(ppl.bits[index_a], ppl.bits[index_b])
+
+        # interleave so that offspring of a pair stay next to each other
+        next_generation = np.empty((2 * num_pairs, ppl.genome_length), ppl.bits.dtype)
+        next_generation[0::2] = offspring_a
+        next_generation[1::2] = offspring_b
+
+        next_generation = self.mutate(next_generation[: len(ppl)], inplace=True)
+        if self.dedupe:
+            next_generation = dedupe_genomes(next_generation, self.rng, inplace=True)
+        return next_generation
+
+    @metrics.timed("next_generation_words")
+    def next_generation_words(
+        self, buffers: GenerationBuffers, fitness: np.ndarray
+    ) -> np.ndarray:
+        """Breed the next generation of a packed population into its buffers
+
+        The packed counterpart of `next_generation` for long genomes: parents are
+        gathered, crossed over and mutated as 64 bit words in the preallocated
+        buffers, which are then swapped. The genomes are not sorted by fitness and
+        repeated genomes are kept.
+
+        :param buffers: packed population, the current generation is replaced
+        :param fitness: fitness of every genome of the current generation
+        :returns: word matrix of the new current generation, a view into buffers
+        """
 
-        return genome
+        fitness = np.asarray(fitness, dtype=FITNESS_DTYPE)
+        if fitness.max() >= self.fitness_limit:
+            return buffers.current
+        if self.adaptive_mutation:
+            current = Diversity.from_words(buffers.current, buffers.genome_length)
+            self.adapt_mutation(current)
+
+        num_pairs = len(buffers.parents_a)
+        index_a, index_b = self.selection.select_batch(
+            fitness[None, :], num_pairs, self.rng
+        )
+        metrics.count(metrics.SELECTION_DRAWS, 2 * num_pairs)
+        metrics.count(metrics.CROSSOVERS, num_pairs)
+
+        # gather the rows of the selected parents straight into the preallocated
+        # parent buffers, mode="clip" lets take write to out without an extra copy,
+        # the selected indices are always in range
+        current = buffers.current
+        np.take(current, index_a[0], axis=0, out=buffers.parents_a, mode="clip")
+        np.take(current, index_b[0], axis=0, out=buffers.parents_b, mode="clip")
+
+        genome_length = buffers.genome_length
+        if genome_length < 2:
+            buffers.next[0::2] = buffers.parents_a
+            buffers.next[1::2] = buffers.parents_b
+        else:
+            masks = self.crossover_masks(num_pairs, genome_length, buffers.masks)
+            # interleave so that offspring of a pair stay next to each other
+            crossover_words(
+                buffers.parents_a,
+                buffers.parents_b,
+                masks,
+                out_a=buffers.next[0::2],
+                out_b=buffers.next[1::2],
+            )
+
+        buffers.swap()
+        self.mutate_words(buffers.current, genome_length)
+        return buffers.current
 
     def run_evolution(self, ppl: Population) -> list[Genome]:
         """Runs the evolution process creating a new population
@@ -83,23 +401,100 @@ class Evolution:
         :param generate_stats: if True then intermediate round stats shown
         """
 
-        ppl.generate_weighted_distribution()
-        ppl.sort_population(inplace=True)
+        return self.next_generation(ppl).tolist()
 
-        if ppl.get_genome_fitness(index=0) >= self.fitness_limit:
-            return ppl.genomes
+    def iter_generations(
+        self,
+        ppl: Population,
+        fitness_fn: FitnessFunction,
+        prescored: bool = False,
+    ) -> Iterator[tuple[GenomeMatrix, GenerationStats]]:
+        """Lazily evolve the population, one scored generation per iteration
 
-        # top two genomes of the population carried forward
-        # next_generation = ppl.genomes[0:2]
-        next_generation = []
+        Every generation is scored with a single call of `fitness_fn` and yielded,
+        sorted in descending order of fitness, with its stats. The next generation
+        is only created when the following one is requested, so a consumer that
+        stops iterating stops the evolution. Iteration ends once the best genome
+        reaches `fitness_limit` or after `generation_limit` generations.
 
-        for _ in range(len(ppl) // 2):
-            parents = ppl.pair_selection()
-            offspring_a, offspring_b = self.single_point_crossover(parents)
+        :param ppl: population of genomes, evolved inplace
+        :param fitness_fn: scores all genomes of a generation
+        :param prescored: if True then the first generation keeps `ppl.fitness`
+        :returns: iterator of the genome matrix and stats of every generation
+        """
 
-            mutated_offspring_a = self.create_mutations(offspring_a)
-            mutated_offspring_b = self.create_mutations(offspring_b)
+        for generation in range(self.generation_limit):
+            if generation > 0 or not prescored:
+                ppl.fitness = fitness_fn(ppl.bits)
+            ppl.sort_by_fitness()
 
-            next_generation.extend([mutated_offspring_a, mutated_offspring_b])
+            best = ppl.get_genome_fitness(index=0)
+            average = ppl.population_fitness() / len(ppl)
+            diversity = ppl.diversity()
+            yield ppl.bits, GenerationStats(
+                generation,
+                best,
+                average,
+                entropy=diversity.entropy,
+                hamming_diversity=diversity.hamming_diversity,
+                mutation_scale=self.mutation_scale,
+            )
 
-        return next_generation
+            if best >= self.fitness_limit:
+                return
+            if generation + 1 < self.generation_limit:
+                # sorting does not change the allele counts, nor the diversity
+                ppl.genomes = self.next_generation(ppl, diversity)
+
+    def run(
+        self,
+        ppl: Population,
+        fitness_fn: FitnessFunction,
+        patience: Optional[int] = None,
+        min_improvement: int = 1,
+        prescored: bool = False,
+    ) -> EvolutionResult:
+        """Evolve the population over multiple generations without any human input
+
+        Every generation is scored with a single call of `fitness_fn`. The run
+        stops when the best genome reaches `fitness_limit`, after
+        `generation_limit` generations, or, if `patience` is given, when the best
+        fitness has not improved by `min_improvement` for `patience` generations.
+
+        The population is left holding the last scored generation, sorted in
+        descending order of fitness.
+
+        :param ppl: population of genomes, evolved inplace
+        :param fitness_fn: scores all genomes of a generation
+        :param patience: generations without improvement before stopping early
+        :param min_improvement: smallest best fitness gain counted as improvement
+        :param prescored: if True then the first generation keeps `ppl.fitness`
+        :returns: per generation stats and the reason the run stopped
+        """
+
+        result = EvolutionResult()
+        best_so_far: Optional[int] = None
+        stale_generations = 0
+
+        generations = self.iter_generations(ppl, fitness_fn, prescored)
+        for _, stats in generations:
+            best = stats.best_fitness
+            result.generations = stats.generation + 1
+            result.best_fitness.append(best)
+            result.average_fitness.append(stats.average_fitness)
+
+            if best >= self.fitness_limit:
+                result.stop_reason = "fitness_limit"
+                break
+
+            if best_so_far is None or best >= best_so_far + min_improvement:
+                best_so_far = best
+                stale_generations = 0
+            else:
+                stale_generations += 1
+
+            if patience is not None and stale_generations >= patience:
+                result.stop_reason = "no_improvement"
+                break
+
+        return result
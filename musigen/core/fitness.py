@@ -0,0 +1,82 @@
+from typing import Callable
+
+import numpy as np
+
+from .genome import Genome, GenomeMatrix, fingerprint_genomes
+from .memo import FitnessMemo
+
+# scores every genome (row) of the matrix in one call, returns one int per genome
+FitnessFunction = Callable[[GenomeMatrix], np.ndarray]
+
+
+def zero_fitness(genomes: GenomeMatrix) -> np.ndarray:
+    """Every genome is unrated, as in the web API"""
+
+    return np.zeros(len(genomes), dtype=np.int64)
+
+
+def bit_count_fitness(genomes: GenomeMatrix) -> np.ndarray:
+    """Fitness is the number of set bits of the genome (the OneMax problem)"""
+
+    return genomes.sum(axis=1, dtype=np.int64)
+
+
+class TargetFitness:
+    """Fitness is the similarity of a genome to a target genome
+
+    The fraction of matching bits is scaled to the range 0 to `max_fitness`, so
+    that it lines up with the human rating scale.
+    """
+
+    def __init__(self, target: Genome, max_fitness: int = 5) -> None:
+        self.target = np.asarray(target, dtype=np.uint8)
+        self.max_fitness = max_fitness
+
+    def __call__(self, genomes: GenomeMatrix) -> np.ndarray:
+        similarity = (genomes == self.target).mean(axis=1)
+        return np.floor(similarity * self.max_fitness).astype(np.int64)
+
+
+def per_genome(score_genome: Callable[[Genome], int]) -> FitnessFunction:
+    """Adapt a fitness function scoring one genome at a time
+
+    Useful for rating functions that can not be vectorized, like asking a human.
+
+    :param score_genome: returns the fitness of a single genome
+    :returns: fitness function scoring a whole genome matrix
+    """
+
+    def score_genomes(genomes: GenomeMatrix) -> np.ndarray:
+        scores = [score_genome(genome) for genome in genomes.tolist()]
+        return np.asarray(scores, dtype=np.int64).reshape(len(genomes))
+
+    return score_genomes
+
+
+def memoized(fitness_fn: FitnessFunction, memo: FitnessMemo) -> FitnessFunction:
+    """Only score genomes whose fitness is not known yet
+
+    Genomes found in the memo get their previous fitness instantly, the others are
+    scored by `fitness_fn` in a single call and remembered.
+
+    :param fitness_fn: scores the genomes not seen before
+    :param memo: fitness of the genomes seen before, updated inplace
+    :returns: fitness function scoring a whole genome matrix
+    """
+
+    def score_genomes(genomes: GenomeMatrix) -> np.ndarray:
+        fingerprints = fingerprint_genomes(genomes)
+        fitness, known = memo.lookup(fingerprints)
+
+        unknown = np.flatnonzero(~known)
+        if len(unknown) > 0:
+            # copies of a genome within the generation are scored once
+            new_fingerprints, first, copies = np.unique(
+                fingerprints[unknown], return_index=True, return_inverse=True
+            )
+            new_fitness = fitness_fn(genomes[unknown[first]])
+            fitness[unknown] = new_fitness[copies.reshape(-1)]
+            memo.update(new_fingerprints, new_fitness)
+        return fitness
+
+    return score_genomes
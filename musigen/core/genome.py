@@ -1,7 +1,17 @@
+import hashlib
 import random
+from typing import Optional
+
+import numpy as np
 
 Genome = list[int]
 
+# population of genomes stored as a contiguous (population, genome_length) matrix
+# of 0/1 bytes, one row per genome
+GenomeMatrix = np.ndarray
+
+BIT_DTYPE = np.uint8
+
 
 def generate_genome(length: int) -> Genome:
     """Generates a random sequence of 0s and 1s of given length
@@ -12,5 +22,90 @@ def generate_genome(length: int) -> Genome:
     return random.choices([0, 1], k=length)
 
 
+def generate_genomes(
+    population_size: int,
+    genome_length: int,
+    rng: Optional[np.random.Generator] = None,
+) -> GenomeMatrix:
+    """Generates a matrix of random genomes in a single call
+
+    :param population_size: number of genomes (rows) to be generated
+    :param genome_length: length of each genome sequence (columns)
+    :param rng: random generator to draw the bits from
+    :returns: matrix of 0s and 1s of shape (population_size, genome_length)
+    """
+
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng.integers(0, 2, size=(population_size, genome_length), dtype=BIT_DTYPE)
+
+
+def genomes_to_matrix(genomes: list[Genome]) -> GenomeMatrix:
+    """Stack a list of genomes into a genome matrix
+
+    :param genomes: list of equal length genomes
+    :returns: matrix of 0s and 1s with one genome per row
+    """
+
+    if len(genomes) == 0:
+        return np.zeros((0, 0), dtype=BIT_DTYPE)
+
+    genome_length = len(genomes[0])
+    if any(len(genome) != genome_length for genome in genomes):
+        raise ValueError("All genomes in a population must be of same length")
+
+    return np.array(genomes, dtype=BIT_DTYPE).reshape(len(genomes), genome_length)
+
+
+def pack_genomes(genomes: GenomeMatrix) -> np.ndarray:
+    """Pack a genome matrix to 8 bits per byte, row-wise (MSB first)
+
+    :param genomes: matrix of 0s and 1s
+    :returns: packed matrix of shape (population_size, ceil(genome_length / 8))
+    """
+
+    return np.packbits(genomes, axis=-1)
+
+
+def unpack_genomes(packed: np.ndarray, genome_length: int) -> GenomeMatrix:
+    """Inverse of `pack_genomes`
+
+    :param packed: row-wise packed genome matrix
+    :param genome_length: number of valid bits in each row
+    :returns: matrix of 0s and 1s
+    """
+
+    return np.unpackbits(packed, axis=-1, count=genome_length)
+
+
+def fingerprint_genomes(genomes: GenomeMatrix) -> np.ndarray:
+    """64 bit fingerprint of every genome, stable across processes and runs
+
+    The genome length is hashed along with the packed bits, which would otherwise
+    be the same for e.g. 101 and 1010.
+
+    :param genomes: matrix of 0s and 1s
+    :returns: uint64 array with the fingerprint of every row
+    """
+
+    genomes = np.asarray(genomes, dtype=BIT_DTYPE)
+    packed = pack_genomes(genomes)
+
+    prefix = hashlib.blake2b(genomes.shape[1].to_bytes(8, "little"), digest_size=8)
+    fingerprints = np.empty(len(genomes), dtype=np.uint64)
+    for i, row in enumerate(packed):
+        digest = prefix.copy()
+        digest.update(row)
+        fingerprints[i] = int.from_bytes(digest.digest(), "little")
+
+    return fingerprints
+
+
+def genome_fingerprint(genome: Genome) -> int:
+    """64 bit fingerprint of a single genome, see `fingerprint_genomes`"""
+
+    return int(fingerprint_genomes(np.asarray([genome]))[0])
+
+
 def genome_to_string(genome: Genome) -> str:
     return "".join(map(str, genome))
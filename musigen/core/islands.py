@@ -0,0 +1,229 @@
+import copy
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from .evolution import Evolution
+from .fitness import FitnessFunction
+from .genome import Genome, unpack_genomes
+from .population import FITNESS_DTYPE, Population
+
+
+@dataclass
+class PackedIsland:
+    """Compact form of an island's population sent to and from the workers
+
+    Genomes travel as a bit-packed byte matrix and fitness as raw int64 bytes,
+    instead of pickled lists of lists.
+    """
+
+    genomes: bytes
+    fitness: bytes
+    population_size: int
+    genome_length: int
+
+    @classmethod
+    def from_population(cls, ppl: Population) -> "PackedIsland":
+        return cls(
+            genomes=ppl.packed().tobytes(),
+            fitness=ppl.fitness.astype(FITNESS_DTYPE).tobytes(),
+            population_size=len(ppl),
+            genome_length=ppl.genome_length,
+        )
+
+    def packed_matrix(self) -> np.ndarray:
+        packed = np.frombuffer(self.genomes, dtype=np.uint8)
+        return packed.reshape(self.population_size, -1)
+
+    def to_population(self) -> Population:
+        ppl = Population(unpack_genomes(self.packed_matrix(), self.genome_length))
+        ppl.fitness = np.frombuffer(self.fitness, dtype=FITNESS_DTYPE)
+        return ppl
+
+
+@dataclass
+class IslandEpoch:
+    island: PackedIsland
+    best_fitness: int
+    stop_reason: str
+
+
+def evolve_island(
+    island: PackedIsland,
+    evo: Evolution,
+    fitness_fn: FitnessFunction,
+    num_generations: int,
+    seed: np.random.SeedSequence,
+    prescored: bool,
+) -> IslandEpoch:
+    """Evolve a single island for one migration interval, run in a worker process
+
+    :param island: packed population of the island
+    :param evo: evolution settings shared by all islands
+    :param fitness_fn: scores all genomes of a generation, must be picklable
+    :param num_generations: number of new generations to be created
+    :param seed: seed of this island's random stream for this interval
+    :param prescored: if True then the fitness of the island is already known
+    :returns: the evolved island, sorted in descending order of fitness
+    """
+
+    ppl = island.to_population()
+
+    island_evo = copy.copy(evo)
+    island_evo.rng = np.random.default_rng(seed)
+    # a prescored population is bred first, then each new generation is scored
+    island_evo.generation_limit = num_generations + int(prescored)
+
+    result = island_evo.run(ppl, fitness_fn, prescored=prescored)
+    return IslandEpoch(
+        island=PackedIsland.from_population(ppl),
+        best_fitness=result.best_fitness[-1],
+        stop_reason=result.stop_reason,
+    )
+
+
+@dataclass
+class IslandResult:
+    """Summary of an `IslandModel.run`"""
+
+    populations: list[Population]
+    generations: int = 0
+    best_fitness: list[int] = field(default_factory=list)
+    stop_reason: str = "generation_limit"
+
+    def best_genome(self) -> Genome:
+        """Fittest genome across all islands"""
+
+        best = max(self.populations, key=lambda ppl: ppl.get_genome_fitness(0))
+        return best.genomes[0]
+
+
+class IslandModel:
+    """Island model evolution, one population per island, islands run in parallel
+
+    Every `migration_interval` generations the islands are collected, and the top
+    `num_migrants` genomes of each island replace the worst genomes of the next
+    island in a ring. The run is bounded by the `generation_limit` and
+    `fitness_limit` of the given evolution.
+    """
+
+    def __init__(
+        self,
+        evo: Evolution,
+        migration_interval: int = 10,
+        num_migrants: int = 2,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        if migration_interval < 1:
+            raise ValueError("Migration interval must be at least 1")
+        if num_migrants < 0:
+            raise ValueError("Number of migrants can only be positive!")
+
+        self.evo = evo
+        self.migration_interval = migration_interval
+        self.num_migrants = num_migrants
+        self.max_workers = max_workers
+
+    def migrate(self, islands: list[PackedIsland]) -> list[PackedIsland]:
+        """Copy the best genomes of every island over the worst of the next one
+
+        Islands are expected sorted in descending order of fitness. Migration works
+        directly on the packed rows, nothing is unpacked.
+        """
+
+        num_islands = len(islands)
+        if num_islands < 2 or self.num_migrants == 0:
+            return islands
+
+        genomes = [island.packed_matrix() for island in islands]
+        fitness = [np.frombuffer(island.fitness, FITNESS_DTYPE) for island in islands]
+
+        migrated = []
+        for i, island in enumerate(islands):
+            source = (i - 1) % num_islands
+            num_migrants = min(self.num_migrants, len(genomes[i]), len(genomes[source]))
+
+            island_genomes = genomes[i].copy()
+            island_fitness = fitness[i].copy()
+            if num_migrants > 0:
+                island_genomes[-num_migrants:] = genomes[source][:num_migrants]
+                island_fitness[-num_migrants:] = fitness[source][:num_migrants]
+
+            migrated.append(
+                PackedIsland(
+                    genomes=island_genomes.tobytes(),
+                    fitness=island_fitness.tobytes(),
+                    population_size=island.population_size,
+                    genome_length=island.genome_length,
+                )
+            )
+
+        return migrated
+
+    def run(
+        self,
+        populations: list[Population],
+        fitness_fn: FitnessFunction,
+        seed: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> IslandResult:
+        """Evolve the populations as islands across a pool of worker processes
+
+        :param populations: initial population of every island
+        :param fitness_fn: scores all genomes of a generation, must be picklable
+        :param seed: seed for reproducible runs
+        :param executor: pool to run the islands on, a process pool by default
+        :returns: evolved island populations and the best fitness per interval
+        """
+
+        islands = [PackedIsland.from_population(ppl) for ppl in populations]
+        seed_sequence = np.random.SeedSequence(seed)
+        result = IslandResult(populations=populations)
+
+        own_executor = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        try:
+            prescored = False
+            while result.generations < self.evo.generation_limit:
+                num_generations = min(
+                    self.migration_interval,
+                    self.evo.generation_limit - result.generations,
+                )
+                futures = [
+                    executor.submit(
+                        evolve_island,
+                        island,
+                        self.evo,
+                        fitness_fn,
+                        num_generations,
+                        island_seed,
+                        prescored,
+                    )
+                    for island, island_seed in zip(
+                        islands, seed_sequence.spawn(len(islands))
+                    )
+                ]
+                epochs = [future.result() for future in futures]
+
+                islands = [epoch.island for epoch in epochs]
+                result.generations += num_generations
+                result.best_fitness.append(max(e.best_fitness for e in epochs))
+                prescored = True
+
+                if result.best_fitness[-1] >= self.evo.fitness_limit:
+                    result.stop_reason = "fitness_limit"
+                    break
+
+                islands = self.migrate(islands)
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        result.populations = [island.to_population() for island in islands]
+        for ppl in result.populations:
+            ppl.sort_by_fitness()
+        return result
@@ -0,0 +1,36 @@
+import numpy as np
+
+from ..utils.lru import LRUCache
+
+DEFAULT_MEMO_SIZE = 100_000
+
+
+class FitnessMemo(LRUCache[int]):
+    """Fitness already assigned to genomes, by genome fingerprint
+
+    Holds at most `max_size` genomes, evicting the least recently used one.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MEMO_SIZE) -> None:
+        super().__init__(max_size)
+
+    def lookup(self, fingerprints: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Fitness of many genomes at once
+
+        :param fingerprints: fingerprint of every genome
+        :returns: fitness of every genome, 0 where unknown, and the mask of the
+            known genomes
+        """
+
+        fitness = np.zeros(len(fingerprints), dtype=np.int64)
+        known = np.zeros(len(fingerprints), dtype=bool)
+        for i, fingerprint in enumerate(fingerprints.tolist()):
+            value = self.get(fingerprint)
+            if value is not None:
+                fitness[i] = value
+                known[i] = True
+        return fitness, known
+
+    def update(self, fingerprints: np.ndarray, fitness: np.ndarray):
+        for fingerprint, value in zip(fingerprints.tolist(), fitness.tolist()):
+            self.put(fingerprint, value)
@@ -0,0 +1,175 @@
+import numpy as np
+
+from ..utils import metrics
+from .genome import GenomeMatrix, fingerprint_genomes
+
+
+def geometric_positions(
+    num_trials: int, probability: float, rng: np.random.Generator
+) -> np.ndarray:
+    """Indices of the successes among `num_trials` Bernoulli trials
+
+    Instead of drawing one uniform per trial, the gaps between successes are drawn
+    from a geometric distribution, so the cost is proportional to the number of
+    successes rather than the number of trials.
+
+    :param num_trials: number of Bernoulli trials
+    :param probability: success probability of each trial
+    :param rng: random generator used for the draws
+    :returns: sorted array of distinct trial indices that succeeded
+    """
+
+    if num_trials <= 0 or probability <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if probability >= 1:
+        return np.arange(num_trials, dtype=np.int64)
+
+    expected = num_trials * probability
+    batch = int(expected + 4 * np.sqrt(expected) + 16)
+
+    chunks = []
+    last = -1
+    while last < num_trials:
+        positions = last + np.cumsum(rng.geometric(probability, size=batch))
+        chunks.append(positions)
+        last = int(positions[-1])
+
+    positions = np.concatenate(chunks)
+    return positions[: np.searchsorted(positions, num_trials)]
+
+
+def apply_flips(
+    genomes: GenomeMatrix, flat_positions: np.ndarray, inplace: bool = False
+) -> GenomeMatrix:
+    """Flip the bits at the given flat positions of the genome matrix
+
+    A position listed an even number of times cancels out. Without `inplace` the
+    matrix is copied on write: the input is returned untouched when nothing flips.
+
+    :param genomes: matrix of genomes, not necessarily contiguous
+    :param flat_positions: positions into the flattened matrix (row-major)
+    :param inplace: if True then the input matrix is modified
+    :returns: genome matrix with the bits flipped
+    """
+
+    if len(flat_positions) == 0:
+        return genomes
+
+    positions, counts = np.unique(flat_positions, return_counts=True)
+    positions = positions[counts % 2 == 1]
+    metrics.count(metrics.MUTATION_FLIPS, len(positions))
+
+    mutated = genomes if inplace else genomes.copy()
+    # indexed by row and column, a view of any strides is flipped inplace
+    mutated[np.unravel_index(positions, mutated.shape)] ^= 1
+    return mutated
+
+
+def mutate_rounds(
+    genomes: GenomeMatrix,
+    num_rounds: int,
+    probability: float,
+    rng: np.random.Generator,
+    inplace: bool = False,
+) -> GenomeMatrix:
+    """Every genome gets `num_rounds` chances of flipping a random bit
+
+    Same distribution as `Evolution.create_mutations` applied to each genome: a
+    round succeeds with `probability` and flips a uniformly chosen bit.
+
+    :param genomes: matrix of genomes to be mutated
+    :param num_rounds: number of mutation rounds per genome
+    :param probability: probability of a round flipping a bit
+    :param rng: random generator used for the draws
+    :param inplace: if True then the input matrix is modified
+    :returns: mutated genome matrix
+    """
+
+    num_genomes, genome_length = genomes.shape
+    if genome_length == 0:
+        return genomes
+
+    positions = round_positions(
+        num_genomes, genome_length, num_rounds, probability, rng
+    )
+    return apply_flips(genomes, positions, inplace)
+
+
+def round_positions(
+    num_genomes: int,
+    genome_length: int,
+    num_rounds: int,
+    probability: float,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Flat positions of the bits flipped by the mutation rounds of `mutate_rounds`
+
+    :returns: positions into the flattened genome matrix (row-major)
+    """
+
+    rounds = geometric_positions(num_genomes * num_rounds, probability, rng)
+    rows = rounds // num_rounds if num_rounds else rounds
+    columns = rng.integers(genome_length, size=len(rounds))
+    return rows * genome_length + columns
+
+
+def mutate_bits(
+    genomes: GenomeMatrix,
+    bit_rate: float,
+    rng: np.random.Generator,
+    inplace: bool = False,
+) -> GenomeMatrix:
+    """Every bit of every genome flips independently with `bit_rate`
+
+    :param genomes: matrix of genomes to be mutated
+    :param bit_rate: probability of each bit flipping
+    :param rng: random generator used for the draws
+    :param inplace: if True then the input matrix is modified
+    :returns: mutated genome matrix
+    """
+
+    positions = geometric_positions(genomes.size, bit_rate, rng)
+    return apply_flips(genomes, positions, inplace)
+
+
+def duplicate_rows(genomes: GenomeMatrix) -> np.ndarray:
+    """Mask of the genomes equal to an earlier genome of the matrix"""
+
+    _, first = np.unique(fingerprint_genomes(genomes), return_index=True)
+    duplicates = np.ones(len(genomes), dtype=bool)
+    duplicates[first] = False
+    return duplicates
+
+
+def dedupe_genomes(
+    genomes: GenomeMatrix,
+    rng: np.random.Generator,
+    max_rounds: int = 8,
+    inplace: bool = False,
+) -> GenomeMatrix:
+    """Flip a random bit of every repeated genome until all genomes are distinct
+
+    The first copy of a genome is kept as is. Gives up after `max_rounds`, e.g.
+    when there are more genomes than distinct genomes of their length.
+
+    :param genomes: matrix of genomes
+    :param rng: random generator used for the draws
+    :param max_rounds: number of attempts at making the genomes distinct
+    :param inplace: if True then the input matrix is modified
+    :returns: genome matrix without repeated genomes
+    """
+
+    num_genomes, genome_length = genomes.shape
+    if genome_length == 0:
+        return genomes
+
+    for _ in range(max_rounds):
+        rows = np.flatnonzero(duplicate_rows(genomes))
+        if len(rows) == 0:
+            break
+
+        columns = rng.integers(genome_length, size=len(rows))
+        genomes = apply_flips(genomes, rows * genome_length + columns, inplace)
+        inplace = True
+
+    return genomes
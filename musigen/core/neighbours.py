@@ -0,0 +1,235 @@
+from itertools import combinations
+from typing import Optional
+
+import numpy as np
+
+from .fitness import FitnessFunction
+from .genome import GenomeMatrix
+from .words import count_words, pack_words
+
+# bit count of every byte value, for numpy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# chunks wider than this make the multi-index tables too sparse to be useful
+MAX_CHUNK_BITS = 32
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Number of set bits of every uint64 word"""
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    as_bytes = words.view(np.uint8).reshape(*words.shape, 8)
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+class HammingIndex:
+    """Nearest neighbours of genomes in Hamming distance
+
+    Genomes are stored as packed 64 bit words, one contiguous array per word
+    position, so the distance to every stored genome is an XOR and a popcount per
+    word position. With `num_tables` set, the genomes are also
+    split into that many chunks, each indexed by value (multi-index hashing).
+    Genomes within distance d share a chunk within distance d // num_tables of the
+    query, so a query only compares the genomes found by probing the chunks near
+    its own, and falls back to a full scan once the probing gets too wide.
+
+    :param genome_length: length of the stored genomes
+    :param num_tables: number of chunks indexed, None for full scans only
+    :param max_probe_radius: widest chunk distance probed before a full scan
+    """
+
+    def __init__(
+        self,
+        genome_length: int,
+        num_tables: Optional[int] = None,
+        max_probe_radius: int = 2,
+    ) -> None:
+        self.genome_length = genome_length
+        self.num_words = count_words(genome_length)
+        self.words = np.zeros((self.num_words, 0), dtype=np.uint64)
+        self.fitness = np.zeros(0, dtype=np.int64)
+        self.size = 0
+
+        self.tables: list[dict[int, list[int]]] = []
+        self.max_probe_radius = max_probe_radius
+        if num_tables is not None:
+            chunk_bits = -(-genome_length // num_tables)
+            if not 0 < chunk_bits <= MAX_CHUNK_BITS:
+                raise ValueError(
+                    f"Chunks must be 1 to {MAX_CHUNK_BITS} bits, use more tables"
+                )
+            self.chunk_bounds = [
+                (start, min(start + chunk_bits, genome_length))
+                for start in range(0, genome_length, chunk_bits)
+            ]
+            self.tables = [{} for _ in self.chunk_bounds]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _chunks(self, genomes: GenomeMatrix) -> np.ndarray:
+        """Value of every chunk of every genome, of shape (num_genomes, num_tables)"""
+
+        values = np.zeros((len(genomes), len(self.chunk_bounds)), dtype=np.int64)
+        for t, (start, stop) in enumerate(self.chunk_bounds):
+            weights = 1 << np.arange(stop - start, dtype=np.int64)
+            values[:, t] = genomes[:, start:stop].astype(np.int64) @ weights
+        return values
+
+    def add(self, genomes: GenomeMatrix, fitness: np.ndarray):
+        """Store rated genomes
+
+        :param genomes: matrix of genomes, `genome_length` columns
+        :param fitness: fitness of every genome
+        """
+
+        genomes = np.asarray(genomes, dtype=np.uint8)
+        if genomes.shape[1] != self.genome_length:
+            raise ValueError("Genomes must be of the index's genome length")
+
+        num_new = len(genomes)
+        if self.size + num_new > len(self.fitness):
+            # grow geometrically, so that adding one genome at a time stays cheap
+            capacity = max(2 * len(self.fitness), self.size + num_new, 64)
+            words = np.zeros((self.num_words, capacity), dtype=np.uint64)
+            words[:, : self.size] = self.words[:, : self.size]
+            fitness_store = np.zeros(capacity, dtype=np.int64)
+            fitness_store[: self.size] = self.fitness[: self.size]
+            self.words, self.fitness = words, fitness_store
+
+        self.words[:, self.size : self.size + num_new] = pack_words(genomes).T
+        self.fitness[self.size : self.size + num_new] = fitness
+
+        if self.tables:
+            ids = range(self.size, self.size + num_new)
+            chunks = self._chunks(genomes)
+            for t, table in enumerate(self.tables):
+                for id_, value in zip(ids, chunks[:, t].tolist()):
+                    table.setdefault(value, []).append(id_)
+
+        self.size += num_new
+
+    def distances(self, genome: GenomeMatrix, ids: Optional[np.ndarray] = None):
+        """Hamming distance of a genome to the stored genomes
+
+        :param genome: a single genome
+        :param ids: stored genomes to compare to, all by default
+        :returns: distance to every compared genome
+        """
+
+        query = pack_words(np.asarray(genome, dtype=np.uint8).reshape(1, -1))[0]
+        stored = self.words[:, : self.size] if ids is None else self.words[:, ids]
+
+        distances = np.zeros(stored.shape[1], dtype=np.int64)
+        for words, word in zip(stored, query):
+            distances += popcount(words ^ word)
+        return distances
+
+    def _probe(self, chunks: np.ndarray, radius: int) -> set[int]:
+        """Ids of the genomes with some chunk exactly `radius` away from the query"""
+
+        found: set[int] = set()
+        for (start, stop), table, value in zip(
+            self.chunk_bounds, self.tables, chunks.tolist()
+        ):
+            for flipped in combinations(range(stop - start), radius):
+                mask = sum(1 << bit for bit in flipped)
+                found.update(table.get(value ^ mask, ()))
+        return found
+
+    def query(self, genome: GenomeMatrix, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """The k stored genomes nearest to a genome
+
+        :param genome: a single genome
+        :param k: number of neighbours
+        :returns: ids and distances of the neighbours, nearest first
+        """
+
+        k = min(k, self.size)
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        genome = np.asarray(genome, dtype=np.uint8).reshape(1, -1)
+        if self.tables:
+            chunks = self._chunks(genome)[0]
+            num_tables = len(self.tables)
+            candidates: set[int] = set()
+            for radius in range(self.max_probe_radius + 1):
+                candidates |= self._probe(chunks, radius)
+                if len(candidates) < k:
+                    continue
+
+                # every genome within this distance has been found by now
+                guaranteed = num_tables * (radius + 1) - 1
+                ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                distances = self.distances(genome, ids)
+                nearest = np.argsort(distances, kind="stable")[:k]
+                if distances[nearest[-1]] <= guaranteed:
+                    return ids[nearest], distances[nearest]
+
+        distances = self.distances(genome)
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return nearest, distances[nearest]
+
+
+class SurrogateFitness:
+    """Fitness predicted from the nearest rated genomes, rating only a few
+
+    Each call predicts the fitness of every genome from its `k` nearest rated
+    neighbours, weighted by closeness. The `num_rated` genomes predicted with the
+    least certainty, the ones farthest from anything rated, are scored by
+    `fitness_fn` instead and added to the index.
+
+    :param fitness_fn: the expensive fitness, e.g. a human rating
+    :param index: rated genomes, updated inplace
+    :param num_rated: genomes scored by `fitness_fn` per call
+    :param k: neighbours used per prediction
+    """
+
+    def __init__(
+        self,
+        fitness_fn: FitnessFunction,
+        index: HammingIndex,
+        num_rated: int,
+        k: int = 5,
+    ) -> None:
+        self.fitness_fn = fitness_fn
+        self.index = index
+        self.num_rated = num_rated
+        self.k = k
+
+    def predict(self, genomes: GenomeMatrix) -> tuple[np.ndarray, np.ndarray]:
+        """Predicted fitness and uncertainty of every genome
+
+        The uncertainty is the mean distance to the neighbours, as a fraction of
+        the genome length, plus the spread of their fitness. Genomes predicted
+        without any rated genome have infinite uncertainty.
+        """
+
+        prediction = np.zeros(len(genomes))
+        uncertainty = np.full(len(genomes), np.inf)
+        for i, genome in enumerate(genomes):
+            ids, distances = self.index.query(genome, self.k)
+            if len(ids) == 0:
+                continue
+
+            weights = 1 / (1 + distances)
+            fitness = self.index.fitness[ids]
+            prediction[i] = np.average(fitness, weights=weights)
+            variance = np.average((fitness - prediction[i]) ** 2, weights=weights)
+            spread = np.sqrt(variance)
+            uncertainty[i] = distances.mean() / self.index.genome_length + spread
+
+        return prediction, uncertainty
+
+    def __call__(self, genomes: GenomeMatrix) -> np.ndarray:
+        prediction, uncertainty = self.predict(genomes)
+        fitness = np.rint(prediction).astype(np.int64)
+
+        rated = np.argsort(-uncertainty, kind="stable")[: self.num_rated]
+        if len(rated) > 0:
+            fitness[rated] = self.fitness_fn(genomes[rated])
+            self.index.add(genomes[rated], fitness[rated])
+        return fitness
@@ -1,38 +1,177 @@
-import random
-from typing import Optional
+from typing import Iterator, Optional, Union
 
-from .genome import Genome, generate_genome
+import numpy as np
+
+from .checkpoint import GenerationHistory, PathLike, write_generation
+from .codec import HEX, decode_population, encode_population
+from .diversity import Diversity
+from .genome import (
+    BIT_DTYPE,
+    Genome,
+    GenomeMatrix,
+    fingerprint_genomes,
+    generate_genomes,
+    genomes_to_matrix,
+    pack_genomes,
+)
+from .sampling import AliasTable
+
+FITNESS_DTYPE = np.int64
+
+
+class GenomeView:
+    """List-like view over the rows of a population's genome matrix
+
+    Reading an item returns the genome as a list of ints, assigning an item writes
+    the genome back into the matrix. This keeps `random.shuffle(ppl.genomes)` and
+    `ppl.genomes[i]` working on top of the array backend.
+    """
+
+    def __init__(self, ppl: "Population") -> None:
+        self._ppl = ppl
+
+    def __len__(self) -> int:
+        return len(self._ppl.bits)
+
+    def __getitem__(self, index: Union[int, slice]):
+        # a slice returns a list of genomes, an int a single genome
+        return self._ppl.bits[index].tolist()
+
+    def __setitem__(self, index: int, genome: Genome):
+        self._ppl.bits[index] = genome
+
+    def __iter__(self) -> Iterator[Genome]:
+        return iter(self._ppl.bits.tolist())
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def index(self, genome: Genome) -> int:
+        matches = np.flatnonzero((self._ppl.bits == np.asarray(genome)).all(axis=1))
+        if len(matches) == 0:
+            raise ValueError("genome is not in population")
+        return int(matches[0])
 
 
 class Population:
-    def __init__(self, genomes: Optional[list[Genome]] = None):
-        self.weighted_population: list[Genome] = []
+    def __init__(
+        self, genomes: Optional[Union[list[Genome], GenomeMatrix]] = None
+    ):
+        self.weighted_distribution: Optional[AliasTable] = None
         if genomes is None:
-            self.genomes: list[Genome] = []
-            self.fitness: list[int] = []
+            self.bits: GenomeMatrix = np.zeros((0, 0), dtype=BIT_DTYPE)
         else:
-            self.genomes: list[Genome] = genomes
-            self.fitness: list[int] = [0] * len(genomes)
+            self.bits = self._as_matrix(genomes)
+        self.fitness = np.zeros(len(self.bits), dtype=FITNESS_DTYPE)
+
+    @staticmethod
+    def _as_matrix(genomes: Union[list[Genome], GenomeMatrix]) -> GenomeMatrix:
+        if isinstance(genomes, np.ndarray):
+            return np.ascontiguousarray(genomes, dtype=BIT_DTYPE)
+        return genomes_to_matrix(genomes)
+
+    @property
+    def genomes(self) -> GenomeView:
+        """Genomes of the population as a list-like view over `bits`"""
+
+        return GenomeView(self)
+
+    @genomes.setter
+    def genomes(self, genomes: Union[list[Genome], GenomeMatrix]):
+        self.bits = self._as_matrix(genomes)
+
+    @property
+    def fitness(self) -> np.ndarray:
+        """Fitness score of every genome, indexed by its row in `bits`"""
+
+        return self._fitness
+
+    @fitness.setter
+    def fitness(self, fitness: Union[list[int], np.ndarray]):
+        self._fitness = np.array(fitness, dtype=FITNESS_DTYPE)
+
+    @property
+    def genome_length(self) -> int:
+        return self.bits.shape[1]
 
     def __len__(self) -> int:
-        return len(self.genomes)
+        return len(self.bits)
+
+    def packed(self) -> np.ndarray:
+        """Genome matrix packed to 8 bits per byte, one row per genome"""
+
+        return pack_genomes(self.bits)
+
+    def fingerprints(self) -> np.ndarray:
+        """64 bit fingerprint of every genome, equal genomes share a fingerprint"""
+
+        return fingerprint_genomes(self.bits)
 
     def eval_genome_fitness(self, genome) -> int:
         """Given a genome, find its fitness score if it exists in the population
 
+        Searches the population for the genome. Prefer `get_genome_fitness` when
+        the index of the genome is already known.
+
         :returns: fitness score of the genome
         """
 
         genome_population_index = self.genomes.index(genome)
-        return self.fitness[genome_population_index]
+        return self.get_genome_fitness(genome_population_index)
 
-    def pair_selection(self) -> tuple[Genome, Genome]:
+    def pair_selection(
+        self, rng: Optional[np.random.Generator] = None
+    ) -> tuple[Genome, Genome]:
         """Randomly select a pair from the weighted population
 
+        :param rng: random generator used for the draws
         :returns: a list of two genomes
         """
-        genome_a, genome_b = random.sample(population=self.weighted_population, k=2)
-        return genome_a, genome_b
+
+        if rng is None:
+            rng = np.random.default_rng()
+
+        index_a, index_b = self.pair_indices_selection(1, rng)
+        return self.genomes[index_a[0]], self.genomes[index_b[0]]
+
+    def pair_indices_selection(
+        self, num_pairs: int, rng: np.random.Generator
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Select `num_pairs` parent pairs from the weighted population at once
+
+        Draws are made from the alias table built by
+        `generate_weighted_distribution`, which is created on demand if missing.
+        As with sampling two distinct copies out of the weighted population, a
+        genome is only paired with itself in proportion to its extra copies.
+
+        :param num_pairs: number of parent pairs to be drawn
+        :param rng: random generator used for the draws
+        :returns: two arrays of row indices, parents a and parents b
+        """
+
+        if self.weighted_distribution is None:
+            self.generate_weighted_distribution()
+        table = self.weighted_distribution
+
+        if table.weights.sum() < 2:
+            raise ValueError("Weighted population must contain at least two genomes")
+
+        index_a = table.draw(num_pairs, rng)
+        index_b = table.draw(num_pairs, rng)
+
+        # redraw the second parent when the same copy of a genome was picked twice,
+        # i.e. with probability 1 / copies when both draws hit the same genome
+        redraw = np.flatnonzero(index_a == index_b)
+        while len(redraw) > 0:
+            copies = table.weights[index_a[redraw]]
+            redraw = redraw[rng.random(len(redraw)) * copies < 1]
+            index_b[redraw] = table.draw(len(redraw), rng)
+            redraw = redraw[index_a[redraw] == index_b[redraw]]
+
+        return index_a, index_b
 
     def get_genome_fitness(self, index: int) -> int:
         """Get the fitness of genome at given index
@@ -41,23 +180,27 @@ class Population:
         :returns: fitness score
         """
 
-        return self.fitness[index]
+        return int(self.fitness[index])
 
     def generate_weighted_distribution(self):
         """Generate a new population weighted on fitness
 
-        Create multiple copies of a specific genome based on its fitness. Hence, if
-        the fitness of genome A is 10, create 10 copies of A in the new population.
-        Similarly, if the fitness of genome B is 3, create 3 copies of it.
+        Each genome is weighted by (fitness + 1) copies. Hence, if the fitness of
+        genome A is 10, it is 11 / 4 times as likely to be drawn as genome B with a
+        fitness of 3. Instead of materialising the copies, an alias table over the
+        weights is built once per generation, so every draw takes O(1).
+        """
+
+        copies = np.maximum(self.fitness + 1, 0)
+        self.weighted_distribution = AliasTable(copies)
 
-        :param population: list of genomes
-        :param fitness_func: to evaluate genome fitness
-        :returns: a new population weighted on fitness
+    def fitness_order(self) -> np.ndarray:
+        """Indices of the genomes in descending order of fitness
+
+        Ties keep their current relative order.
         """
 
-        for genome in self.genomes:
-            genome_copies = [genome] * (self.eval_genome_fitness(genome) + 1)
-            self.weighted_population.extend(genome_copies)
+        return np.argsort(-self.fitness, kind="stable")
 
     def sort_population(self, inplace: bool = False) -> list[Genome]:
         """Sort the genome population based on the provided fitness function
@@ -66,22 +209,39 @@ class Population:
         :returns: population in descending order of fitness
         """
 
-        sorted_genomes = sorted(
-            self.genomes, key=self.eval_genome_fitness, reverse=True
-        )
+        order = self.fitness_order()
+        sorted_genomes = self.bits[order]
         if inplace:
-            self.genomes = sorted_genomes
-        return sorted_genomes
+            self.sort_by_fitness(order)
+        return sorted_genomes.tolist()
+
+    def sort_by_fitness(self, order: Optional[np.ndarray] = None):
+        """Sort genomes and their fitness inplace in descending order of fitness
+
+        :param order: precomputed `fitness_order`
+        """
 
-    def generate_population(self, population_size: int, genome_length: int):
+        if order is None:
+            order = self.fitness_order()
+        self.bits = self.bits[order]
+        self.fitness = self.fitness[order]
+        self.weighted_distribution = None
+
+    def generate_population(
+        self,
+        population_size: int,
+        genome_length: int,
+        rng: Optional[np.random.Generator] = None,
+    ):
         """Generates multiple genomes to form a population
 
         :param population_size: number of genomes to be generated
         :param genome_length: length of genome sequence
+        :param rng: random generator to draw the genomes from
         """
 
-        self.genomes = [generate_genome(genome_length) for _ in range(population_size)]
-        self.fitness = [0] * population_size
+        self.bits = generate_genomes(population_size, genome_length, rng)
+        self.fitness = np.zeros(population_size, dtype=FITNESS_DTYPE)
 
     @classmethod
     def from_hash(cls, population_hash: str):
@@ -94,37 +254,57 @@ class Population:
             false false true false false false true true
             false false true false false false true true
             false false true false false false true true
-        
+
         Note: the MSB is always set, and to be ignored. This is helpful when all
               of the values in a row are false, leading to the hash represented
               as 0. This does not allow the number of columns to be determined.
               However, 1_0000_0000B indicates there are 8 columns.
 
+        Hashes in the more compact `codec.BASE64` encoding are accepted as well.
+
         :param population_hash: hash representation of the list of genomes
+        :raises CodecError: if the hash is malformed or too large
         """
 
-        genomes_hash = population_hash.split("-")
-        genomes_hash_hex = [int(x, 16) for x in genomes_hash]
-
-        def hash_to_genome(genome_hash_hex: int) -> Genome:
-            # ignore the 0b1 (MSB ignore logic in docstring note)
-            hash_binary = bin(genome_hash_hex)[3:]
-            hash_bit_gen = (bit for bit in hash_binary)
-            hash_bit_map = map(int, hash_bit_gen)
-            return list(hash_bit_map)
-        
-        genomes = [hash_to_genome(hash) for hash in genomes_hash_hex]
-        return cls(genomes)
-    
-    def to_hash(self) -> str:
-        def genome_to_hash(genome: Genome) -> str:
-            genome_int_map = "".join(map(str, genome))
-            genome_bin = "1" + genome_int_map
-            return int(genome_bin, 2)
-        
-        genomes_bin = [genome_to_hash(genome) for genome in self.genomes]
-        genomes_hex = [hex(genome_bin)[2:] for genome_bin in genomes_bin]
-        return "-".join(genomes_hex)
+        return cls(decode_population(population_hash))
+
+    def to_hash(self, encoding: str = HEX) -> str:
+        """Condensed representation of the population, inverse of `from_hash`
+
+        :param encoding: `codec.HEX` as described in `from_hash`, or the shorter
+            `codec.BASE64`
+        :returns: hash representation of the list of genomes
+        """
+
+        return encode_population(self.bits, encoding)
+
+    def save(self, path: PathLike, append: bool = False):
+        """Checkpoint the genomes and their fitness to a binary file
+
+        See `checkpoint` for the format. Appending a generation writes only its own
+        record, without rewriting the generations before it.
+
+        :param path: checkpoint file
+        :param append: if True then add to the generations already in the file
+        :raises CheckpointError: if appending to a file of another shape
+        """
+
+        write_generation(path, self.bits, self.fitness, append)
+
+    @classmethod
+    def load(cls, path: PathLike, generation: int = -1) -> "Population":
+        """Resume a population from a checkpoint file
+
+        :param path: checkpoint file
+        :param generation: index of the generation, the last one by default
+        :raises CheckpointError: if the file is not a checkpoint
+        :raises IndexError: if the file holds no such generation
+        """
+
+        history = GenerationHistory(path)
+        ppl = cls(history.genomes(generation))
+        ppl.fitness = np.array(history.fitness(generation), dtype=FITNESS_DTYPE)
+        return ppl
 
     def population_fitness(self) -> int:
         """Calculate population fitness by summing individual genome fitness
@@ -134,16 +314,24 @@ class Population:
         :returns: sum of fitness score of all genomes in population
         """
 
-        return sum(self.fitness)
+        return int(self.fitness.sum())
+
+    def diversity(self) -> Diversity:
+        """Allele frequencies, bit entropy and Hamming diversity of the genomes"""
+
+        return Diversity.from_genomes(self.bits)
 
     def print_stats(self, generation_id: int):
         """Print population stats"""
 
+        diversity = self.diversity()
         print(
             f"GENERATION {generation_id:02d}",
             "======================",
             f"Average Fitness: {(self.population_fitness() / len(self)):.2f}",
             f"   Best Fitness: {self.get_genome_fitness(index=0)}",
             f"  Worst Fitness: {self.get_genome_fitness(index=-1)}",
+            f"    Bit Entropy: {diversity.entropy:.3f}",
+            f"      Diversity: {diversity.hamming_diversity:.3f}",
             sep="\n",
         )
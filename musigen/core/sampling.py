@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class AliasTable:
+    """Walker/Vose alias table for O(1) draws from a discrete distribution
+
+    The table is built once in O(n) from the (unnormalised) weights. Every draw then
+    costs one uniform integer and one uniform float, independent of the number of
+    outcomes or the magnitude of the weights.
+    """
+
+    def __init__(self, weights: np.ndarray) -> None:
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or len(weights) == 0:
+            raise ValueError("Weights must be a non-empty 1-D array")
+        if (weights < 0).any():
+            raise ValueError("Weights can not be negative")
+
+        total = weights.sum()
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+
+        size = len(weights)
+        scaled = weights * (size / total)
+
+        self.weights = weights
+        self.prob = np.ones(size, dtype=np.float64)
+        self.alias = np.arange(size, dtype=np.intp)
+
+        small = np.flatnonzero(scaled < 1.0).tolist()
+        large = np.flatnonzero(scaled >= 1.0).tolist()
+        scaled_list = scaled.tolist()
+
+        while small and large:
+            less, more = small.pop(), large[-1]
+            self.prob[less] = scaled_list[less]
+            self.alias[less] = more
+
+            scaled_list[more] += scaled_list[less] - 1.0
+            if scaled_list[more] < 1.0:
+                small.append(large.pop())
+
+        # leftovers are 1 up to floating point error
+        self.prob[small] = 1.0
+        self.prob[large] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def draw(self, size: int, rng: np.random.Generator) -> np.ndarray:
+        """Draw `size` outcomes with replacement
+
+        :param size: number of draws
+        :param rng: random generator used for the draws
+        :returns: array of drawn outcome indices
+        """
+
+        column = rng.integers(len(self.prob), size=size)
+        coin = rng.random(size)
+        return np.where(coin < self.prob[column], column, self.alias[column])
+
+
+def search_rows(cumulative: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Row-wise `np.searchsorted(side="right")` of many rows in a single call
+
+    The rows of cumulative weights are laid end to end, so a single binary search
+    places the targets of every row.
+
+    :param cumulative: cumulative weights of shape (num_rows, num_outcomes)
+    :param targets: values in [0, row total) of shape (num_rows, num_targets)
+    :returns: outcome indices of shape (num_rows, num_targets)
+    """
+
+    num_rows, num_outcomes = cumulative.shape
+    totals = cumulative[:, -1]
+    offsets = np.concatenate(([0.0], np.cumsum(totals)[:-1]))[:, None]
+
+    flat_cumulative = (cumulative + offsets).ravel()
+    flat_index = np.searchsorted(flat_cumulative, targets + offsets, side="right")
+
+    # guard against floating point error at the end of a row
+    row_start = np.arange(num_rows)[:, None] * num_outcomes
+    return np.clip(flat_index - row_start, 0, num_outcomes - 1)
+
+
+def draw_rows(weights: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw `size` outcomes with replacement from every row of a weight matrix
+
+    :param weights: (unnormalised) weights of shape (num_rows, num_outcomes)
+    :param size: number of draws per row
+    :param rng: random generator used for the draws
+    :returns: outcome indices of shape (num_rows, size)
+    """
+
+    weights = np.asarray(weights, dtype=np.float64)
+    if (weights < 0).any():
+        raise ValueError("Weights can not be negative")
+
+    cumulative = np.cumsum(weights, axis=1)
+    totals = cumulative[:, -1:]
+    if (totals <= 0).any():
+        raise ValueError("At least one weight of every row must be positive")
+
+    targets = rng.random((len(weights), size)) * totals
+    return search_rows(cumulative, targets)
@@ -0,0 +1,194 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from .population import Population
+from .sampling import AliasTable, draw_rows, search_rows
+
+ParentIndices = tuple[np.ndarray, np.ndarray]
+
+
+class SelectionStrategy(ABC):
+    """Selects the parents of a whole generation in a single batched call"""
+
+    @abstractmethod
+    def select_pairs(
+        self, ppl: Population, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        """Select `num_pairs` parent pairs from the population
+
+        :param ppl: population to select the parents from
+        :param num_pairs: number of parent pairs to be drawn
+        :param rng: random generator used for the draws
+        :returns: two arrays of row indices, parents a and parents b
+        """
+
+    def select_batch(
+        self, fitness: np.ndarray, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        """Select `num_pairs` parent pairs from each of many populations at once
+
+        Strategies override this with a vectorized draw, the default falls back to
+        `select_pairs` once per population.
+
+        :param fitness: fitness of shape (num_populations, population_size)
+        :param num_pairs: number of parent pairs to be drawn per population
+        :param rng: random generator used for the draws
+        :returns: two arrays of shape (num_populations, num_pairs) of row indices
+        """
+
+        parents_a, parents_b = [], []
+        for population_fitness in fitness:
+            # selection only looks at the fitness, the genomes can be empty
+            ppl = Population(np.zeros((len(population_fitness), 0), dtype=np.uint8))
+            ppl.fitness = population_fitness
+            index_a, index_b = self.select_pairs(ppl, num_pairs, rng)
+            parents_a.append(index_a)
+            parents_b.append(index_b)
+
+        return np.stack(parents_a), np.stack(parents_b)
+
+
+class FitnessProportionalSelection(SelectionStrategy):
+    """Roulette wheel selection, weighting each genome by (fitness + 1)
+
+    This is the selection `Population.pair_selection` has always performed.
+    """
+
+    def select_pairs(
+        self, ppl: Population, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        ppl.generate_weighted_distribution()
+        return ppl.pair_indices_selection(num_pairs, rng)
+
+    def select_batch(
+        self, fitness: np.ndarray, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        copies = np.maximum(fitness + 1, 0)
+        if (copies.sum(axis=1) < 2).any():
+            raise ValueError("Weighted population must contain at least two genomes")
+
+        index_a = draw_rows(copies, num_pairs, rng)
+        index_b = draw_rows(copies, num_pairs, rng)
+
+        # same copy drawn twice, see Population.pair_indices_selection
+        copies_a = np.take_along_axis(copies, index_a, axis=1)
+        redraw = index_a == index_b
+        while redraw.any():
+            redraw &= rng.random(redraw.shape) * copies_a < 1
+            index_b = np.where(redraw, draw_rows(copies, num_pairs, rng), index_b)
+            redraw &= index_a == index_b
+
+        return index_a, index_b
+
+
+class TournamentSelection(SelectionStrategy):
+    """Each parent is the fittest of `tournament_size` uniformly drawn genomes"""
+
+    def __init__(self, tournament_size: int = 2) -> None:
+        if tournament_size < 1:
+            raise ValueError("Tournament size must be at least 1")
+        self.tournament_size = tournament_size
+
+    def select_pairs(
+        self, ppl: Population, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        contestants = rng.integers(len(ppl), size=(2 * num_pairs, self.tournament_size))
+        winner = np.argmax(ppl.fitness[contestants], axis=1)
+        parents = contestants[np.arange(2 * num_pairs), winner]
+        return parents[0::2], parents[1::2]
+
+    def select_batch(
+        self, fitness: np.ndarray, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        num_populations, population_size = fitness.shape
+        contestants = rng.integers(
+            population_size,
+            size=(num_populations, 2 * num_pairs, self.tournament_size),
+        )
+        rows = np.arange(num_populations)[:, None, None]
+        winner = np.argmax(fitness[rows, contestants], axis=2)
+
+        parents = np.take_along_axis(contestants, winner[..., None], axis=2)[..., 0]
+        return parents[:, 0::2], parents[:, 1::2]
+
+
+class RankSelection(SelectionStrategy):
+    """Linear ranking selection
+
+    Genomes are weighted by their rank instead of their raw fitness, so that the
+    selection pressure does not depend on the spread of the fitness scores. The best
+    genome is `selection_pressure` times as likely to be drawn as an average one,
+    the worst `2 - selection_pressure` times.
+    """
+
+    def __init__(self, selection_pressure: float = 1.5) -> None:
+        if not 1.0 <= selection_pressure <= 2.0:
+            raise ValueError("Selection pressure must be between 1 and 2")
+        self.selection_pressure = selection_pressure
+
+    def select_pairs(
+        self, ppl: Population, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        size = len(ppl)
+        if size < 2:
+            raise ValueError("Population must contain at least two genomes")
+
+        table = AliasTable(self.rank_weights(ppl.fitness))
+        return table.draw(num_pairs, rng), table.draw(num_pairs, rng)
+
+    def select_batch(
+        self, fitness: np.ndarray, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        if fitness.shape[1] < 2:
+            raise ValueError("Population must contain at least two genomes")
+
+        weights = self.rank_weights(fitness)
+        return draw_rows(weights, num_pairs, rng), draw_rows(weights, num_pairs, rng)
+
+    def rank_weights(self, fitness: np.ndarray) -> np.ndarray:
+        """Selection weight of every genome from its rank, along the last axis"""
+
+        size = fitness.shape[-1]
+
+        # rank 0 is the worst genome, rank size - 1 the best
+        order = np.argsort(fitness, axis=-1, kind="stable")
+        ranks = np.argsort(order, axis=-1, kind="stable").astype(np.float64)
+
+        pressure = self.selection_pressure
+        return (2 - pressure) + 2 * (pressure - 1) * ranks / (size - 1)
+
+
+class StochasticUniversalSampling(SelectionStrategy):
+    """Fitness proportional selection with evenly spaced pointers
+
+    All parents of the generation are picked with a single spin: 2 * num_pairs
+    pointers, one wheel slot apart, over the (fitness + 1) weighted wheel. Every
+    genome gets within one of its expected number of parents.
+    """
+
+    def select_pairs(
+        self, ppl: Population, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        index_a, index_b = self.select_batch(ppl.fitness[None], num_pairs, rng)
+        return index_a[0], index_b[0]
+
+    def select_batch(
+        self, fitness: np.ndarray, num_pairs: int, rng: np.random.Generator
+    ) -> ParentIndices:
+        weights = np.maximum(fitness + 1, 0).astype(np.float64)
+        cumulative = np.cumsum(weights, axis=1)
+        totals = cumulative[:, -1:]
+        if (totals <= 0).any():
+            raise ValueError("At least one genome must have a positive weight")
+
+        num_parents = 2 * num_pairs
+        step = totals / num_parents
+        spin = rng.random((len(fitness), 1))
+        pointers = (spin + np.arange(num_parents)) * step
+
+        parents = search_rows(cumulative, pointers)
+        # the pointers walk the cumulative weights in row order, so the parents come
+        # out sorted by row and neighbouring rows would mate, shuffle before pairing
+        parents = rng.permuted(parents, axis=1)
+        return parents[:, 0::2], parents[:, 1::2]
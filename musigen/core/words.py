@@ -0,0 +1,231 @@
+"""Genome matrices packed to 64 bit words, for genomes of up to millions of bits
+
+Bit i of a genome is bit i % 64 (LSB first) of word i // 64, the last word is zero
+padded. A cut point then splits a genome at a single word, and crossover of a whole
+generation is a handful of bitwise operations over the word matrices.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from ..utils import metrics
+from .genome import BIT_DTYPE, GenomeMatrix
+
+WORD_BITS = 64
+WORD_DTYPE = np.dtype("<u8")
+ALL_ONES = np.uint64(0xFFFF_FFFF_FFFF_FFFF)
+
+
+def count_words(genome_length: int) -> int:
+    return max(-(-genome_length // WORD_BITS), 1)
+
+
+def pack_words(
+    genomes: GenomeMatrix, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Pack a genome matrix to 64 bit words
+
+    :param genomes: matrix of 0s and 1s
+    :param out: word matrix to write to, of shape
+        (num_genomes, ceil(genome_length / 64))
+    :returns: the packed word matrix
+    """
+
+    genomes = np.asarray(genomes, dtype=BIT_DTYPE)
+    num_genomes, genome_length = genomes.shape
+    if out is None:
+        out = np.empty((num_genomes, count_words(genome_length)), dtype=WORD_DTYPE)
+
+    packed = np.packbits(genomes, axis=-1, bitorder="little")
+    as_bytes = out.view(np.uint8)
+    as_bytes[:, : packed.shape[1]] = packed
+    as_bytes[:, packed.shape[1] :] = 0
+    return out
+
+
+def unpack_words(words: np.ndarray, genome_length: int) -> GenomeMatrix:
+    """Inverse of `pack_words`"""
+
+    as_bytes = np.ascontiguousarray(words, dtype=WORD_DTYPE).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=-1, count=genome_length, bitorder="little")
+
+
+def multi_point_masks(
+    num_pairs: int,
+    genome_length: int,
+    num_points: int,
+    rng: np.random.Generator,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Crossover masks cutting every genome pair at `num_points` random points
+
+    Set bits take the first parent. The segments between cut points alternate
+    between the parents, starting with the first. A cut point drawn twice cancels
+    out, as in `apply_flips`. With a single point this is the distribution of
+    `Evolution.crossover`.
+
+    :param num_pairs: number of genome pairs
+    :param genome_length: length of the genomes, at least 2
+    :param num_points: number of cut points per pair
+    :param rng: random generator used for the draws
+    :param out: word matrix to write the masks to
+    :returns: word matrix of shape (num_pairs, ceil(genome_length / 64))
+    """
+
+    num_words = count_words(genome_length)
+    if out is None:
+        out = np.empty((num_pairs, num_words), dtype=WORD_DTYPE)
+    out[:] = 0
+
+    cuts = rng.integers(1, genome_length, size=(num_pairs, num_points))
+    rows = np.repeat(np.arange(num_pairs), num_points)
+    word = cuts.reshape(-1) // WORD_BITS
+    bit = (cuts.reshape(-1) % WORD_BITS).astype(np.uint64)
+
+    # a cut flips every bit after it: whole words from the next word on, toggled
+    # at that word then spread with a running XOR, and the upper part of its own
+    following = word + 1 < num_words
+    np.bitwise_xor.at(out, (rows[following], word[following] + 1), ALL_ONES)
+    np.bitwise_xor.accumulate(out, axis=1, out=out)
+    np.bitwise_xor.at(out, (rows, word), ALL_ONES << bit)
+
+    return np.invert(out, out=out)
+
+
+def uniform_masks(
+    num_pairs: int,
+    genome_length: int,
+    rng: np.random.Generator,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Crossover masks taking every bit from either parent with equal probability
+
+    :param num_pairs: number of genome pairs
+    :param genome_length: length of the genomes
+    :param rng: random generator used for the draws
+    :param out: word matrix to write the masks to
+    :returns: word matrix of shape (num_pairs, ceil(genome_length / 64))
+    """
+
+    shape = (num_pairs, count_words(genome_length))
+    # Generator.integers has no out argument, all the words are drawn in one call
+    # and copied into out
+    words = rng.integers(ALL_ONES, size=shape, dtype=WORD_DTYPE, endpoint=True)
+    if out is None:
+        return words
+    np.copyto(out, words)
+    return out
+
+
+def crossover_words(
+    parents_a: np.ndarray,
+    parents_b: np.ndarray,
+    masks: np.ndarray,
+    out_a: np.ndarray,
+    out_b: np.ndarray,
+):
+    """Cross every row pair of two packed parent matrices
+
+    Offspring a takes the bits of parent a where the mask is set and those of
+    parent b elsewhere, offspring b the opposite. Computed without temporaries, the
+    outputs must not overlap the parents or the masks.
+
+    :param parents_a: word matrix of first parents
+    :param parents_b: word matrix of second parents
+    :param masks: crossover mask of every pair
+    :param out_a: word matrix the first offspring are written to
+    :param out_b: word matrix the second offspring are written to
+    """
+
+    # out_b holds the bits that differ between the parents and are masked
+    np.bitwise_xor(parents_a, parents_b, out=out_b)
+    np.bitwise_and(out_b, masks, out=out_b)
+    np.bitwise_xor(parents_b, out_b, out=out_a)
+    np.bitwise_xor(parents_a, out_b, out=out_b)
+
+
+def flip_words(words: np.ndarray, genome_length: int, flat_positions: np.ndarray):
+    """Flip the bits at the given flat positions of a packed genome matrix inplace
+
+    A position listed an even number of times cancels out and is not counted as a
+    flip, as with `apply_flips`.
+
+    :param words: word matrix of the genomes
+    :param genome_length: length of the genomes
+    :param flat_positions: positions into the flattened unpacked matrix
+        (row-major), as with `apply_flips`
+    """
+
+    if len(flat_positions) == 0:
+        return
+
+    positions, counts = np.unique(flat_positions, return_counts=True)
+    positions = positions[counts % 2 == 1]
+    metrics.count(metrics.MUTATION_FLIPS, len(positions))
+
+    rows, columns = np.divmod(positions, genome_length)
+    bits = np.left_shift(np.uint64(1), (columns % WORD_BITS).astype(np.uint64))
+    # distinct bits of the same word are XORed in one after the other
+    np.bitwise_xor.at(words, (rows, columns // WORD_BITS), bits)
+
+
+class GenerationBuffers:
+    """Preallocated packed genomes of a fixed size population
+
+    The current and the next generation are two buffers, swapped once the next one
+    has been bred, so a generation allocates no genome sized memory. The parents
+    and crossover masks of a generation have buffers of their own.
+
+    :param population_size: number of genomes
+    :param genome_length: length of the genomes
+    """
+
+    def __init__(self, population_size: int, genome_length: int) -> None:
+        if population_size < 2:
+            raise ValueError("Population must contain at least two genomes")
+
+        self.population_size = population_size
+        self.genome_length = genome_length
+        self.num_words = count_words(genome_length)
+
+        # an odd sized population breeds one offspring too many, later dropped
+        num_pairs = (population_size + 1) // 2
+        shape = (2 * num_pairs, self.num_words)
+        self.generations = [np.zeros(shape, dtype=WORD_DTYPE) for _ in range(2)]
+
+        shape = (num_pairs, self.num_words)
+        self.parents_a = np.zeros(shape, dtype=WORD_DTYPE)
+        self.parents_b = np.zeros(shape, dtype=WORD_DTYPE)
+        self.masks = np.zeros(shape, dtype=WORD_DTYPE)
+
+    @classmethod
+    def from_genomes(cls, genomes: GenomeMatrix) -> "GenerationBuffers":
+        buffers = cls(*genomes.shape)
+        pack_words(genomes, out=buffers.current)
+        return buffers
+
+    @property
+    def nbytes(self) -> int:
+        arrays = self.generations + [self.parents_a, self.parents_b, self.masks]
+        return sum(array.nbytes for array in arrays)
+
+    @property
+    def current(self) -> np.ndarray:
+        """Word matrix of the current generation"""
+
+        return self.generations[0][: self.population_size]
+
+    @property
+    def next(self) -> np.ndarray:
+        """Word matrix the next generation is bred into, pairs included"""
+
+        return self.generations[1]
+
+    def swap(self):
+        self.generations.reverse()
+
+    def genomes(self) -> GenomeMatrix:
+        """Genome matrix of the current generation, unpacked into memory"""
+
+        return unpack_words(self.current, self.genome_length)
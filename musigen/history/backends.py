@@ -0,0 +1,221 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+from ..core.genome import BIT_DTYPE, Genome, pack_genomes, unpack_genomes
+
+MONGO_URI_ENV = "MUSIGEN_MONGO_URI"
+DEFAULT_MONGO_URI = "mongodb://localhost:27017"
+
+
+def format_fingerprint(fingerprint: int) -> str:
+    """Fingerprints are stored as fixed width hex, databases lack unsigned 64 bit"""
+
+    return f"{fingerprint:016x}"
+
+
+@dataclass
+class RatingRecord:
+    """A genome rated once, in a given generation of an interactive session"""
+
+    fingerprint: int
+    genome: bytes
+    genome_length: int
+    fitness: int
+    generation: int = 0
+    session: str = ""
+    timestamp: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_genome(
+        cls, genome: Genome, fingerprint: int, fitness: int, **kwargs: Any
+    ) -> "RatingRecord":
+        packed = pack_genomes(np.asarray([genome], dtype=BIT_DTYPE))[0].tobytes()
+        return cls(int(fingerprint), packed, len(genome), int(fitness), **kwargs)
+
+    def genome_bits(self) -> Genome:
+        packed = np.frombuffer(self.genome, dtype=np.uint8)[None, :]
+        return unpack_genomes(packed, self.genome_length)[0].tolist()
+
+
+class HistoryBackend(ABC):
+    """Storage of rating records, indexed by genome fingerprint
+
+    Writes come from a single writer thread, lookups from any thread.
+    """
+
+    @abstractmethod
+    def write_many(self, records: list[RatingRecord]):
+        """Store a batch of records"""
+
+    @abstractmethod
+    def find(self, fingerprint: int) -> list[RatingRecord]:
+        """Every record of the genome with the given fingerprint, oldest first"""
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(HistoryBackend):
+    def __init__(self) -> None:
+        self.records: dict[int, list[RatingRecord]] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self.records.values())
+
+    def write_many(self, records: list[RatingRecord]):
+        with self.lock:
+            for record in records:
+                self.records.setdefault(record.fingerprint, []).append(record)
+
+    def find(self, fingerprint: int) -> list[RatingRecord]:
+        with self.lock:
+            return list(self.records.get(fingerprint, []))
+
+
+class SQLiteBackend(HistoryBackend):
+    """Records in a local SQLite database, or in memory by default"""
+
+    COLUMNS = (
+        "fingerprint",
+        "genome",
+        "genome_length",
+        "fitness",
+        "generation",
+        "session",
+        "timestamp",
+    )
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS ratings ("
+                "fingerprint TEXT NOT NULL, genome BLOB NOT NULL, "
+                "genome_length INTEGER NOT NULL, fitness INTEGER NOT NULL, "
+                "generation INTEGER NOT NULL, session TEXT NOT NULL, "
+                "timestamp REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS ratings_fingerprint "
+                "ON ratings (fingerprint)"
+            )
+
+    def write_many(self, records: list[RatingRecord]):
+        rows = [
+            (
+                format_fingerprint(r.fingerprint),
+                r.genome,
+                r.genome_length,
+                r.fitness,
+                r.generation,
+                r.session,
+                r.timestamp,
+            )
+            for r in records
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT INTO ratings ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                rows,
+            )
+
+    def find(self, fingerprint: int) -> list[RatingRecord]:
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM ratings "
+                "WHERE fingerprint = ? ORDER BY rowid",
+                (format_fingerprint(fingerprint),),
+            ).fetchall()
+
+        return [RatingRecord(int(row[0], 16), *row[1:]) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class MongoBackend(HistoryBackend):
+    """Records in a MongoDB collection, through a pooled client
+
+    :param uri: connection string of the server
+    :param database: name of the database
+    :param collection: name of the collection
+    :param max_pool_size: connections kept open by the client
+    :param client: client to use instead of connecting to `uri`, e.g. a local
+        stand-in such as `mongomock.MongoClient()`
+    """
+
+    def __init__(
+        self,
+        uri: str = DEFAULT_MONGO_URI,
+        database: str = "musigen",
+        collection: str = "ratings",
+        max_pool_size: int = 10,
+        client: Optional[Any] = None,
+    ) -> None:
+        self.own_client = client is None
+        if client is None:
+            # pymongo is only needed by deployments storing ratings in MongoDB
+            import pymongo
+
+            client = pymongo.MongoClient(uri, maxPoolSize=max_pool_size)
+
+        self.client = client
+        self.collection = client[database][collection]
+        self.collection.create_index("fingerprint")
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "MongoBackend":
+        """Backend connected to the MUSIGEN_MONGO_URI server"""
+
+        return cls(os.environ.get(MONGO_URI_ENV, DEFAULT_MONGO_URI), **kwargs)
+
+    def write_many(self, records: list[RatingRecord]):
+        if not records:
+            return
+
+        documents = [
+            {
+                "fingerprint": format_fingerprint(r.fingerprint),
+                "genome": r.genome,
+                "genome_length": r.genome_length,
+                "fitness": r.fitness,
+                "generation": r.generation,
+                "session": r.session,
+                "timestamp": r.timestamp,
+            }
+            for r in records
+        ]
+        self.collection.insert_many(documents, ordered=False)
+
+    def find(self, fingerprint: int) -> list[RatingRecord]:
+        documents = self.collection.find(
+            {"fingerprint": format_fingerprint(fingerprint)}
+        ).sort("_id", 1)
+
+        return [
+            RatingRecord(
+                int(d["fingerprint"], 16),
+                bytes(d["genome"]),
+                d["genome_length"],
+                d["fitness"],
+                d["generation"],
+                d["session"],
+                d["timestamp"],
+            )
+            for d in documents
+        ]
+
+    def close(self):
+        if self.own_client:
+            self.client.close()
@@ -0,0 +1,167 @@
+import threading
+from typing import Optional
+
+from ..core.genome import (
+    Genome,
+    fingerprint_genomes,
+    genome_fingerprint,
+    pack_genomes,
+)
+from ..core.population import Population
+from ..utils.logger import Logger
+from .backends import HistoryBackend, RatingRecord
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class RatingStore:
+    """Write-behind buffer of ratings in front of a history backend
+
+    Recording a rating only appends it to a buffer. A background thread writes the
+    buffer to the backend in batches, once `batch_size` records are pending or
+    every `flush_interval` seconds, so the interactive loop never waits on storage.
+    Failed batches are logged and dropped.
+    """
+
+    def __init__(
+        self,
+        backend: HistoryBackend,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = Logger.get_logger()
+
+        self.pending: list[RatingRecord] = []
+        self.writing: list[RatingRecord] = []
+        self.flush_requested = False
+        self.closed = False
+        self.condition = threading.Condition()
+
+        self.writer = threading.Thread(
+            target=self._write_behind, name="rating-store", daemon=True
+        )
+        self.writer.start()
+
+    def __enter__(self) -> "RatingStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(
+        self, genome: Genome, fitness: int, generation: int = 0, session: str = ""
+    ):
+        """Buffer the rating of a single genome"""
+
+        record = RatingRecord.from_genome(
+            genome,
+            genome_fingerprint(genome),
+            fitness,
+            generation=generation,
+            session=session,
+        )
+        self._append([record])
+
+    def record_population(self, ppl: Population, generation: int, session: str = ""):
+        """Buffer the ratings of every genome of a rated population"""
+
+        fingerprints = fingerprint_genomes(ppl.bits).tolist()
+        packed = pack_genomes(ppl.bits)
+        records = [
+            RatingRecord(
+                fingerprint,
+                row.tobytes(),
+                ppl.genome_length,
+                fitness,
+                generation=generation,
+                session=session,
+            )
+            for fingerprint, row, fitness in zip(
+                fingerprints, packed, ppl.fitness.tolist()
+            )
+        ]
+        self._append(records)
+
+    def find(self, genome: Genome) -> list[RatingRecord]:
+        """Every rating of the genome, including those not written out yet"""
+
+        fingerprint = genome_fingerprint(genome)
+        with self.condition:
+            unwritten = [
+                record
+                for record in self.writing + self.pending
+                if record.fingerprint == fingerprint
+            ]
+
+        # a batch written meanwhile shows up in both
+        stored = self.backend.find(fingerprint)
+        return stored + [record for record in unwritten if record not in stored]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every buffered rating has been written
+
+        :param timeout: seconds to wait at most
+        :returns: False if the timeout expired first
+        """
+
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify_all()
+            return self.condition.wait_for(
+                lambda: not self.pending and not self.writing, timeout
+            )
+
+    def close(self):
+        """Write out the buffer, stop the writer thread and close the backend"""
+
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        self.writer.join()
+        self.backend.close()
+
+    def _append(self, records: list[RatingRecord]):
+        with self.condition:
+            if self.closed:
+                raise ValueError("Rating store is closed")
+            self.pending.extend(records)
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+
+    def _write_behind(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: len(self.pending) >= self.batch_size
+                    or self.flush_requested
+                    or self.closed,
+                    self.flush_interval,
+                )
+                if self.closed and not self.pending:
+                    self.condition.notify_all()
+                    return
+
+                self.writing = self.pending[: self.batch_size]
+                del self.pending[: self.batch_size]
+                if not self.pending:
+                    self.flush_requested = False
+                if not self.writing:
+                    continue
+
+            try:
+                self.backend.write_many(self.writing)
+            except Exception:
+                self.logger.exception("Dropped %d ratings", len(self.writing))
+
+            with self.condition:
+                self.writing = []
+                self.condition.notify_all()
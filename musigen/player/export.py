@@ -0,0 +1,170 @@
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from ..core.genome import GenomeMatrix, pack_genomes, unpack_genomes
+from .melody import decode_melodies, scale_table
+from .midi import encode_batch_midi
+from .server import AudioServer
+from .tune import TuneMetadata
+
+DEFAULT_CHUNK_SIZE = 1024
+
+Destination = Union[str, Path, BinaryIO]
+
+
+def render_midi_chunk(
+    packed_genomes: np.ndarray,
+    genome_length: int,
+    names: list[str],
+    tune: TuneMetadata,
+    scale: np.ndarray,
+    outdir: Optional[str] = None,
+) -> list[tuple[str, bytes]]:
+    """Render a chunk of genomes to MIDI files, run in a worker process
+
+    :param packed_genomes: bit-packed genome matrix of the chunk
+    :param genome_length: number of valid bits in each row
+    :param names: file name of every genome of the chunk
+    :param tune: dataclass containing tune metadata
+    :param scale: `scale_table` of the tune
+    :param outdir: if given, files are written there instead of being returned
+    :returns: (name, contents) of every file not written to `outdir`
+    """
+
+    genomes = unpack_genomes(packed_genomes, genome_length)
+    batch = decode_melodies(genomes, tune, scale, AudioServer.BITS_PER_NOTE)
+
+    files = []
+    for i, name in enumerate(names):
+        midi_data = encode_batch_midi(batch, i, tune.bpm, track_name=Path(name).stem)
+        if outdir is None:
+            files.append((name, midi_data))
+        else:
+            filepath = Path(outdir) / name
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_bytes(midi_data)
+
+    return files
+
+
+def _chunks(
+    generations: Sequence[GenomeMatrix], chunk_size: int
+) -> Iterator[tuple[np.ndarray, int, list[str]]]:
+    for generation_id, genomes in enumerate(generations):
+        prefix = f"gen-{generation_id:04d}/" if len(generations) > 1 else ""
+        for start in range(0, len(genomes), chunk_size):
+            chunk = genomes[start : start + chunk_size]
+            names = [
+                f"{prefix}{index:06d}.mid"
+                for index in range(start, start + len(chunk))
+            ]
+            yield pack_genomes(chunk), chunk.shape[1], names
+
+
+def _render_completed(
+    executor: Executor,
+    chunks: Iterator[tuple[np.ndarray, int, list[str]]],
+    max_in_flight: int,
+    *args,
+) -> Iterator[list[tuple[str, bytes]]]:
+    # submit at most max_in_flight chunks, and hand back every result as soon as it
+    # completes, so that neither the chunks nor their files pile up in memory
+    pending = set()
+    for packed, genome_length, names in chunks:
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(
+            executor.submit(render_midi_chunk, packed, genome_length, names, *args)
+        )
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def export_generations(
+    generations: Sequence[GenomeMatrix],
+    tune: TuneMetadata,
+    scale: Sequence[int],
+    destination: Destination,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Optional[Executor] = None,
+) -> int:
+    """Export the melodies of every genome of every generation as MIDI files
+
+    Genomes are rendered in chunks across worker processes, with at most two
+    chunks per worker in flight. Files are named by genome index, inside a folder
+    per generation when more than one is given, and written in the order the chunks
+    complete.
+
+    :param generations: genome matrix of every generation to be exported
+    :param tune: dataclass containing tune metadata
+    :param scale: notes of the tune's scale
+    :param destination: a directory, a path ending in ".zip", or a writable binary
+        stream which receives a streamed ZIP archive
+    :param max_workers: number of worker processes, the CPU count by default
+    :param chunk_size: number of genomes rendered per task
+    :param executor: pool to render on, a process pool by default
+    :returns: number of files exported
+    """
+
+    table = scale_table(scale)
+    is_path = isinstance(destination, (str, Path))
+    to_directory = is_path and Path(destination).suffix != ".zip"
+    outdir = str(destination) if to_directory else None
+
+    own_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+    try:
+        chunks = _chunks(generations, chunk_size)
+        results = _render_completed(
+            executor, chunks, max_in_flight, tune, table, outdir
+        )
+
+        if to_directory:
+            for _ in results:
+                pass
+            return sum(len(genomes) for genomes in generations)
+
+        num_files = 0
+        with zipfile.ZipFile(destination, "w", zipfile.ZIP_DEFLATED) as archive:
+            for files in results:
+                for name, midi_data in files:
+                    archive.writestr(name, midi_data)
+                    num_files += 1
+        return num_files
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def export_population(
+    genomes: GenomeMatrix,
+    tune: TuneMetadata,
+    scale: Sequence[int],
+    destination: Destination,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Optional[Executor] = None,
+) -> int:
+    """Export the melody of every genome of a population as MIDI files
+
+    See `export_generations`.
+    """
+
+    return export_generations(
+        [genomes], tune, scale, destination, max_workers, chunk_size, executor
+    )
@@ -1,10 +1,113 @@
-import pyo
+from dataclasses import dataclass
+from typing import Sequence
 
-from ..core.genome import Genome
-from ..utils.helper import int_from_bits
+import numpy as np
+
+from ..core.genome import Genome, GenomeMatrix
 from ..utils.logger import Logger
 from .tune import TuneMetadata
 
+NOTE_VELOCITY = 127
+
+
+def scale_table(scale: Sequence[int]) -> np.ndarray:
+    """Lookup table of the midi notes of a scale, indexable by note value"""
+
+    return np.array([int(scale[i]) for i in range(len(scale))], dtype=np.int64)
+
+
+@dataclass
+class MelodyBatch:
+    """Melodies of many genomes as padded arrays
+
+    Row i holds the melody of genome i, its first `lengths[i]` events are valid and
+    the remaining ones are padding with 0 velocity and beat.
+
+    notes: midi notes of shape (num_genomes, num_steps, max_events)
+    velocity: velocity of shape (num_genomes, max_events)
+    beat: length of each event in beats, of shape (num_genomes, max_events)
+    lengths: number of events of each melody, of shape (num_genomes,)
+    """
+
+    notes: np.ndarray
+    velocity: np.ndarray
+    beat: np.ndarray
+    lengths: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+
+def decode_melodies(
+    genomes: GenomeMatrix,
+    tune: TuneMetadata,
+    scale: Sequence[int],
+    bits_per_note: int,
+) -> MelodyBatch:
+    """Converts the melodies encoded in all genomes of a population at once
+
+    Same conversion as `Melody.from_genome`, done with array operations over the
+    whole genome matrix.
+
+    :param genomes: matrix of genomes encoding the melodies
+    :param tune: dataclass containing tune metadata
+    :param scale: notes of the scale, or its `scale_table`
+    :param bits_per_note: number of genome bits encoding a note
+    :returns: padded arrays of the notes, velocities and beats of every melody
+    """
+
+    genomes = np.asarray(genomes)
+    num_genomes = len(genomes)
+    num_chunks = tune.num_bars * tune.num_notes
+    if genomes.shape[1] < num_chunks * bits_per_note:
+        raise ValueError("Genomes are too short for the tune")
+
+    note_length = 4 / tune.num_notes
+    pause_threshhold = 1 << (bits_per_note - 1)
+
+    # subsequences are read least significant bit first
+    chunks = genomes[:, : num_chunks * bits_per_note].reshape(
+        num_genomes, num_chunks, bits_per_note
+    )
+    values = chunks.astype(np.int64) @ (1 << np.arange(bits_per_note))
+
+    if not tune.pauses:
+        values %= pause_threshhold
+
+    pauses = values >= pause_threshhold
+    note_values = np.where(pauses, 0, values)
+
+    # a pause always starts an event, a note only if it differs from the previous
+    previous = np.full((num_genomes, num_chunks), -1, dtype=np.int64)
+    previous[:, 1:] = note_values[:, :-1]
+    starts = pauses | (previous != values)
+
+    event = np.cumsum(starts, axis=1) - 1
+    lengths = starts.sum(axis=1)
+    max_events = int(lengths.max()) if num_genomes else 0
+
+    rows = np.broadcast_to(np.arange(num_genomes)[:, None], event.shape)
+    beat = np.zeros((num_genomes, max_events), dtype=np.float64)
+    np.add.at(beat, (rows, event), note_length)
+
+    event_values = np.zeros((num_genomes, max_events), dtype=np.int64)
+    event_values[rows[starts], event[starts]] = note_values[starts]
+
+    velocity = np.zeros((num_genomes, max_events), dtype=np.int64)
+    velocity[rows[starts], event[starts]] = np.where(
+        pauses[starts], 0, NOTE_VELOCITY
+    )
+
+    # transpose every step by two scale degrees
+    table = scale_table(scale) if not isinstance(scale, np.ndarray) else scale
+    steps = 2 * np.arange(tune.num_steps)[None, :, None]
+    notes = table[(event_values[:, None, :] + steps) % len(table)]
+
+    valid = np.arange(max_events) < lengths[:, None]
+    notes = np.where(valid[:, None, :], notes, 0)
+
+    return MelodyBatch(notes=notes, velocity=velocity, beat=beat, lengths=lengths)
+
 
 class Melody:
     def __init__(self, bits_per_note) -> None:
@@ -14,51 +117,18 @@ class Melody:
         self.bits_per_note = bits_per_note
         self.logger = Logger.get_logger()
 
-    def from_genome(self, genome: Genome, tune: TuneMetadata, scale: pyo.EventScale):
+    def from_genome(self, genome: Genome, tune: TuneMetadata, scale: Sequence[int]):
         """Converts the data encoded in the genome to musical melody
 
         :param genome: the genome encoding the melody
         :param tune: dataclass containing tune metadata
+        :param scale: notes of the tune's scale
         """
 
-        note_length = 4 / tune.num_notes
-        pause_threshhold = 1 << (self.bits_per_note - 1)
-
-        # default unattainable value to remove length check (remove later)
-        note_values: list[int] = [-1]
-
-        # break genome into list of its subsequences (encoding musical notes)
-        genome_chunks = [
-            genome[i * self.bits_per_note : (i + 1) * self.bits_per_note]
-            for i in range(tune.num_bars * tune.num_notes)
-        ]
-
-        for genome_chunk in genome_chunks:
-            subsequence_value = int_from_bits(genome_chunk)
-
-            if not tune.pauses:
-                subsequence_value %= pause_threshhold
-
-            # generates a pause
-            if subsequence_value >= pause_threshhold:
-                note_values.append(0)
-                self.velocity.append(0)
-                self.beat.append(note_length)
-
-            else:
-                # prolong the previous note if same note_value
-                if note_values[-1] == subsequence_value:
-                    self.beat[-1] += note_length
-                else:
-                    note_values.append(subsequence_value)
-                    self.velocity.append(127)
-                    self.beat.append(note_length)
-
-        note_values.remove(-1)
-
-        for step in range(tune.num_steps):
-            note = [
-                int(scale[(note_value + step * 2) % len(scale)])
-                for note_value in note_values
-            ]
-            self.notes.append(note)
+        batch = decode_melodies([genome], tune, scale, self.bits_per_note)
+        num_events = int(batch.lengths[0])
+
+        self.velocity.extend(batch.velocity[0, :num_events].tolist())
+        self.beat.extend(batch.beat[0, :num_events].tolist())
+        for step_notes in batch.notes[0]:
+            self.notes.append(step_notes[:num_events].tolist())
@@ -1,15 +1,150 @@
 import os
+import struct
 from pathlib import Path
-from posixpath import basename
 
-import pyo
-from midiutil import MIDIFile
+import numpy as np
 
 from ..core.genome import Genome
-from .melody import Melody
+from .melody import Melody, MelodyBatch
+from .scale import tune_scale
 from .server import AudioServer
 from .tune import TuneMetadata
 
+TICKS_PER_QUARTERNOTE = 960
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+
+END_OF_TRACK = b"\x00\xff\x2f\x00"
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return chunk_type + struct.pack(">I", len(data)) + data
+
+
+def _variable_length(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """MIDI variable length quantities of many values at once
+
+    :param values: non-negative integers below 2**28
+    :returns: (num_values, 4) byte matrix, most significant group first and
+        right aligned, and a mask of the bytes in use
+    """
+
+    shifts = np.array([21, 14, 7, 0])
+    groups = (values[:, None] >> shifts) & 0x7F
+
+    num_bytes = 1 + (values >= 1 << 7) + (values >= 1 << 14) + (values >= 1 << 21)
+    used = np.arange(4) >= 4 - num_bytes[:, None]
+
+    # continuation bit on every byte but the last
+    groups[:, :3] |= 0x80
+    return groups.astype(np.uint8), used
+
+
+def _tempo_track(bpm: int) -> bytes:
+    microseconds_per_quarternote = int(60_000_000 / bpm)
+    tempo = b"\x00\xff\x51\x03" + microseconds_per_quarternote.to_bytes(3, "big")
+    return _chunk(b"MTrk", tempo + END_OF_TRACK)
+
+
+def _note_track(
+    notes: np.ndarray,
+    velocity: np.ndarray,
+    beat: np.ndarray,
+    track_name: str,
+    channel: int = 0,
+) -> bytes:
+    name = track_name.encode("utf-8")
+    name_length, name_length_used = _variable_length(np.array([len(name)]))
+    header = b"\x00\xff\x03" + name_length[0][name_length_used[0]].tobytes() + name
+
+    ticks = np.rint(np.cumsum(beat) * TICKS_PER_QUARTERNOTE).astype(np.int64)
+    end = ticks
+    start = np.concatenate(([0], ticks[:-1]))
+
+    sounding = velocity > 0
+    num_steps = len(notes)
+    pitch = notes[:, sounding].ravel()
+    vel = np.tile(velocity[sounding], num_steps)
+    on_tick = np.tile(start[sounding], num_steps)
+    off_tick = np.tile(end[sounding], num_steps)
+
+    tick = np.concatenate((on_tick, off_tick))
+    status = np.concatenate(
+        (
+            np.full(len(pitch), NOTE_ON | channel),
+            np.full(len(pitch), NOTE_OFF | channel),
+        )
+    )
+    data_1 = np.concatenate((pitch, pitch))
+    data_2 = np.concatenate((vel, vel))
+
+    # note offs go before note ons of the same tick
+    order = np.lexsort((status == NOTE_ON | channel, tick))
+    tick = tick[order]
+    messages = np.stack((status, data_1, data_2), axis=1)[order].astype(np.uint8)
+
+    # steps landing on the same note would repeat the exact same event
+    event_key = (tick << 24) | (messages.astype(np.int64) << [16, 8, 0]).sum(axis=1)
+    _, first = np.unique(event_key, return_index=True)
+    first.sort()
+    tick, messages = tick[first], messages[first]
+
+    delta = np.diff(tick, prepend=0)
+    groups, used = _variable_length(delta)
+
+    events = np.concatenate((groups, messages), axis=1)
+    events_used = np.concatenate((used, np.ones(messages.shape, dtype=bool)), axis=1)
+
+    data = header + events[events_used].tobytes() + END_OF_TRACK
+    return _chunk(b"MTrk", data)
+
+
+def encode_midi(
+    notes: np.ndarray,
+    velocity: np.ndarray,
+    beat: np.ndarray,
+    bpm: int,
+    track_name: str = "Sample Track",
+) -> bytes:
+    """Encodes a melody as a standard MIDI file, straight from its arrays
+
+    The file has a tempo track and one note track, as written by MIDIUtil.
+
+    :param notes: midi notes of shape (num_steps, num_events)
+    :param velocity: velocity of each event, 0 for a pause
+    :param beat: length of each event in beats
+    :param bpm: tempo of the tune
+    :param track_name: name of the note track
+    :returns: contents of the MIDI file
+    """
+
+    notes = np.asarray(notes, dtype=np.int64).reshape(-1, len(velocity))
+    velocity = np.asarray(velocity, dtype=np.int64)
+    beat = np.asarray(beat, dtype=np.float64)
+
+    header = _chunk(b"MThd", struct.pack(">HHH", 1, 2, TICKS_PER_QUARTERNOTE))
+    return (
+        header
+        + _tempo_track(bpm)
+        + _note_track(notes, velocity, beat, track_name)
+    )
+
+
+def encode_batch_midi(
+    batch: MelodyBatch, index: int, bpm: int, track_name: str = "Sample Track"
+) -> bytes:
+    """Encodes the melody at `index` of a decoded melody batch as a MIDI file"""
+
+    num_events = int(batch.lengths[index])
+    return encode_midi(
+        batch.notes[index, :, :num_events],
+        batch.velocity[index, :num_events],
+        batch.beat[index, :num_events],
+        bpm,
+        track_name,
+    )
+
 
 def save_genome_data(
     genome: Genome,
@@ -24,9 +159,8 @@ def save_genome_data(
     :param tune_md: the tune's metadata
     """
 
-    scale = pyo.EventScale(root=tune_md.key, scale=tune_md.scale, first=tune_md.root)
     melody = Melody(bits_per_note=AudioServer.BITS_PER_NOTE)
-    melody.from_genome(genome, tune_md, scale)
+    melody.from_genome(genome, tune_md, tune_scale(tune_md))
 
     if any(
         (
@@ -36,21 +170,10 @@ def save_genome_data(
     ):
         raise ValueError
 
-    track = 0
-    channel = 0
-    time = 0.0
-
-    midi_file = MIDIFile()
-    midi_file.addTrackName(track, time, track_name)
-    midi_file.addTempo(track, time, tune_md.bpm)
-
-    for i, vel in enumerate(melody.velocity):
-        if vel > 0:
-            for step in melody.notes:
-                midi_file.addNote(track, channel, step[i], time, melody.beat[i], vel)
-
-        time += melody.beat[i]
+    midi_data = encode_midi(
+        melody.notes, melody.velocity, melody.beat, tune_md.bpm, track_name
+    )
 
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     with open(filepath, "wb") as f:
-        midi_file.writeFile(f)
+        f.write(midi_data)
@@ -0,0 +1,75 @@
+import numpy as np
+
+from .tune import TuneMetadata
+
+ROOT_DEGREES = {
+    "C": 0,
+    "C#": 1,
+    "Db": 1,
+    "D": 2,
+    "D#": 3,
+    "Eb": 3,
+    "E": 4,
+    "F": 5,
+    "F#": 6,
+    "Gb": 6,
+    "G": 7,
+    "G#": 8,
+    "Ab": 8,
+    "A": 9,
+    "A#": 10,
+    "Bb": 10,
+    "B": 11,
+}
+
+SCALES = {
+    "major": [0, 2, 4, 5, 7, 9, 11],
+    "minorH": [0, 2, 3, 5, 7, 8, 11],
+    "minorM": [0, 2, 3, 5, 7, 9, 11],
+    "ionian": [0, 2, 4, 5, 7, 9, 11],
+    "dorian": [0, 2, 3, 5, 7, 9, 10],
+    "phrygian": [0, 1, 3, 5, 7, 8, 10],
+    "lydian": [0, 2, 4, 6, 7, 9, 11],
+    "mixolydian": [0, 2, 4, 5, 7, 9, 10],
+    "aeolian": [0, 2, 3, 5, 7, 8, 10],
+    "locrian": [0, 1, 3, 5, 6, 8, 10],
+    "wholeTone": [0, 2, 4, 6, 8, 10],
+    "majorPenta": [0, 2, 4, 7, 9],
+    "minorPenta": [0, 3, 5, 7, 10],
+    "egyptian": [0, 2, 5, 7, 10],
+    "majorBlues": [0, 2, 5, 7, 9],
+    "minorBlues": [0, 3, 5, 8, 10],
+    "minorHungarian": [0, 2, 3, 6, 7, 8, 11],
+}
+
+
+def build_scale(
+    root: str = "C", scale: str = "major", first: int = 4, octaves: int = 2
+) -> list[int]:
+    """Midi notes of a scale, the same ones `pyo.EventScale` generates
+
+    :param root: name of the fundamental note
+    :param scale: name of the scale, one of `SCALES`
+    :param first: first octave of the scale, 4 starts a C scale at midi note 48
+    :param octaves: number of octaves, the root of the octave after is included
+    :raises ValueError: if the root or scale is unknown
+    :returns: midi notes in ascending order
+    """
+
+    if root not in ROOT_DEGREES:
+        raise ValueError(f"Unknown root note {root!r}!")
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale {scale!r}!")
+
+    degrees = SCALES[scale]
+    length = len(degrees)
+    return [
+        degrees[i % length] + (int(first) + i // length) * 12 + ROOT_DEGREES[root]
+        for i in range(length * octaves + 1)
+    ]
+
+
+def tune_scale(tune: TuneMetadata) -> np.ndarray:
+    """Lookup table of the midi notes of the tune's scale, indexable by note value"""
+
+    return np.array(build_scale(tune.key, tune.scale, tune.root), dtype=np.int64)
@@ -1,9 +1,13 @@
-import pyo
+from typing import TYPE_CHECKING
 
 from ..core.genome import Genome
 from .melody import Melody
+from .scale import tune_scale
 from .tune import TuneMetadata
 
+if TYPE_CHECKING:
+    import pyo
+
 
 class AudioServer:
 
@@ -14,6 +18,9 @@ class AudioServer:
     RELEASE = 0.005
 
     def __init__(self) -> None:
+        # pyo probes the audio backends on import, only pay for it on playback
+        import pyo
+
         self.server = pyo.Server().boot()
 
     def stop_server(self):
@@ -23,7 +30,7 @@ class AudioServer:
 
     def genome_to_events(
         self, genome: Genome, tune_md: TuneMetadata
-    ) -> list[pyo.Events]:
+    ) -> list["pyo.Events"]:
         """Generates pyo events corresponding to the melody encoded by the genome
 
         :param genome: the genome encoding the melody
@@ -31,11 +38,10 @@ class AudioServer:
         :returns: pyo events encoding the melody
         """
 
-        scale = pyo.EventScale(
-            root=tune_md.key, scale=tune_md.scale, first=tune_md.root
-        )
+        import pyo
+
         melody = Melody(bits_per_note=self.BITS_PER_NOTE)
-        melody.from_genome(genome, tune_md, scale)
+        melody.from_genome(genome, tune_md, tune_scale(tune_md))
 
         return [
             pyo.Events(
@@ -79,12 +85,14 @@ class AudioServer:
         self.server.stop()
 
     @staticmethod
-    def play_metronome(bpm: int) -> pyo.Sine:
+    def play_metronome(bpm: int) -> "pyo.Sine":
         """Plays the metronome for the given beat count
 
         :param bpm: beat count
         """
 
+        import pyo
+
         met = pyo.Metro(time=60 / bpm).play()
         t = pyo.CosTable([(0, 0), (50, 1), (200, 0.3), (500, 0)])
         amp = pyo.TrigEnv(met, table=t, dur=0.25, mul=1)
@@ -0,0 +1,195 @@
+import io
+import wave
+from pathlib import Path
+from typing import BinaryIO, Sequence, Union
+
+import numpy as np
+
+from ..core.genome import GenomeMatrix
+from ..core.sampling import search_rows
+from .melody import MelodyBatch, decode_melodies
+from .server import AudioServer
+from .tune import TuneMetadata
+
+DEFAULT_SAMPLE_RATE = 22050
+DEFAULT_GAIN = 0.2
+# samples render_batch synthesizes at once, bounding its float64 temporaries
+DEFAULT_CHUNK_SAMPLES = 1 << 19
+
+
+def midi_to_frequency(notes: np.ndarray) -> np.ndarray:
+    return 440.0 * 2.0 ** ((notes - 69) / 12)
+
+
+def adsr_envelope(elapsed: np.ndarray, duration: np.ndarray) -> np.ndarray:
+    """Amplitude of the AudioServer ADSR envelope at the given times
+
+    :param elapsed: seconds since the note started
+    :param duration: seconds the note is held, the release follows it
+    :returns: amplitude between 0 and 1
+    """
+
+    attack, decay = AudioServer.ATTACK, AudioServer.DECAY
+    sustain, release = AudioServer.SUSTAIN, AudioServer.RELEASE
+
+    held = np.minimum(elapsed, duration)
+    level = np.where(
+        held < attack,
+        held / attack,
+        np.maximum(sustain, 1 - (1 - sustain) * (held - attack) / decay),
+    )
+
+    released = np.clip(1 - (elapsed - duration) / release, 0, 1)
+    return np.where(elapsed < 0, 0, level * np.where(elapsed > duration, released, 1))
+
+
+def render_batch(
+    batch: MelodyBatch,
+    bpm: int,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    gain: float = DEFAULT_GAIN,
+    chunk_samples: int = DEFAULT_CHUNK_SAMPLES,
+) -> np.ndarray:
+    """Synthesize the melodies of a batch offline
+
+    Every event plays a sine per step, shaped by the AudioServer ADSR envelope. The
+    release of an event rings over the start of the next one.
+
+    The melodies are rendered in chunks of rows, each written to the output before
+    the next one is rendered, so the float64 temporaries cover about
+    `chunk_samples` samples, or a single melody if that is longer, whatever the
+    size of the batch.
+
+    :param batch: decoded melodies
+    :param bpm: tempo of the tune
+    :param sample_rate: samples per second of the output
+    :param gain: amplitude of a single note at full velocity
+    :param chunk_samples: samples rendered at once, over all melodies of a chunk
+    :returns: float32 samples in [-1, 1] of shape (num_melodies, num_samples),
+        shorter melodies are padded with silence
+    """
+
+    num_melodies, num_events = batch.velocity.shape
+
+    # one silent event past the end of every melody
+    duration = np.zeros((num_melodies, num_events + 1))
+    duration[:, :num_events] = batch.beat * 60 / bpm
+    velocity = np.zeros((num_melodies, num_events + 1))
+    velocity[:, :num_events] = batch.velocity / 127
+    notes = np.zeros((num_melodies, batch.notes.shape[1], num_events + 1))
+    notes[:, :, :num_events] = batch.notes
+
+    end = np.cumsum(duration, axis=1)
+    start = end - duration
+
+    length = end[:, -1].max(initial=0) + AudioServer.RELEASE
+    num_samples = int(np.ceil(length * sample_rate))
+    time = np.arange(num_samples) / sample_rate
+
+    out = np.empty((num_melodies, num_samples), dtype=np.float32)
+    chunk_size = max(chunk_samples // max(num_samples, 1), 1)
+    for first in range(0, num_melodies, chunk_size):
+        rows = slice(first, first + chunk_size)
+        samples = _render_rows(
+            start[rows],
+            end[rows],
+            duration[rows],
+            velocity[rows],
+            notes[rows],
+            batch.lengths[rows],
+            time,
+        )
+        samples *= gain
+        out[rows] = np.clip(samples, -1, 1, out=samples)
+    return out
+
+
+def _render_rows(
+    start: np.ndarray,
+    end: np.ndarray,
+    duration: np.ndarray,
+    velocity: np.ndarray,
+    notes: np.ndarray,
+    lengths: np.ndarray,
+    time: np.ndarray,
+) -> np.ndarray:
+    """Unscaled float64 samples of a chunk of melodies, see `render_batch`"""
+
+    num_rows = len(lengths)
+    num_events = duration.shape[1] - 1
+    total = end[:, -1]
+    time = np.broadcast_to(time, (num_rows, len(time)))
+
+    # event sounding at every sample, the one after the last once a melody ended
+    current = search_rows(end[:, :num_events], np.minimum(time, total[:, None]))
+    current = np.where(time < total[:, None], current, lengths[:, None])
+    previous = np.maximum(current - 1, 0)
+
+    samples = np.zeros(time.shape)
+    for event in (current, previous):
+        elapsed = time - np.take_along_axis(start, event, axis=1)
+        held = np.take_along_axis(duration, event, axis=1)
+        envelope = adsr_envelope(elapsed, held)
+        if event is previous:
+            # only the release tail of the previous event is still sounding
+            envelope = np.where((current > 0) & (elapsed > held), envelope, 0)
+        amplitude = envelope * np.take_along_axis(velocity, event, axis=1)
+
+        for step_notes in np.moveaxis(notes, 1, 0):
+            frequency = midi_to_frequency(np.take_along_axis(step_notes, event, axis=1))
+            samples += amplitude * np.sin(2 * np.pi * frequency * elapsed)
+
+    return samples
+
+
+def render_genomes(
+    genomes: GenomeMatrix,
+    tune: TuneMetadata,
+    scale: Sequence[int],
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+) -> np.ndarray:
+    """Synthesize the melodies encoded by a population of genomes
+
+    :param genomes: matrix of genomes encoding the melodies
+    :param tune: dataclass containing tune metadata
+    :param scale: notes of the tune's scale
+    :param sample_rate: samples per second of the output
+    :returns: float32 samples of shape (num_genomes, num_samples)
+    """
+
+    batch = decode_melodies(genomes, tune, scale, AudioServer.BITS_PER_NOTE)
+    return render_batch(batch, tune.bpm, sample_rate)
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    """Raw little endian 16 bit PCM of float samples in [-1, 1]"""
+
+    return (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def write_wav(
+    destination: Union[str, Path, BinaryIO],
+    samples: np.ndarray,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+):
+    """Write mono float samples as a 16 bit PCM WAV file
+
+    :param destination: path or writable binary stream
+    :param samples: float samples in [-1, 1]
+    :param sample_rate: samples per second
+    """
+
+    destination = str(destination) if isinstance(destination, Path) else destination
+    with wave.open(destination, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(to_pcm16(samples))
+
+
+def wav_bytes(samples: np.ndarray, sample_rate: int = DEFAULT_SAMPLE_RATE) -> bytes:
+    """Contents of a WAV file of the samples, e.g. for an audio preview response"""
+
+    buffer = io.BytesIO()
+    write_wav(buffer, samples, sample_rate)
+    return buffer.getvalue()
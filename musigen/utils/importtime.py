@@ -0,0 +1,129 @@
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+# modules served or used headless, which must import without the playback stack
+GUARDED_MODULES = [
+    "musigen.core.evolution",
+    "musigen.core.batch",
+    "musigen.core.islands",
+    "musigen.player.export",
+    "musigen.player.midi",
+    "musigen.player.synth",
+    "musigen.utils.logger",
+]
+
+# only loaded once live playback or colored logging is actually used
+LAZY_MODULES = ["pyo", "colorlog"]
+
+
+@dataclass
+class ImportReport:
+    module: str
+    total_us: int
+    imported: dict[str, int]
+
+    def slowest(self, count: int = 5) -> list[tuple[str, int]]:
+        return sorted(self.imported.items(), key=lambda item: -item[1])[:count]
+
+
+def parse_importtime(stderr: str, module: str) -> dict[str, int]:
+    """Modules imported by `module` according to `-X importtime` logs
+
+    Every module is logged after the modules it imported, which are indented deeper.
+
+    :param stderr: output of the interpreter run with `-X importtime`
+    :param module: dotted name of the imported module
+    :returns: cumulative import time in microseconds of the module and of every
+        module it imported
+    """
+
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = len(name) - len(name.lstrip())
+        entries.append((name.strip(), int(cumulative), depth))
+
+    imported = {}
+    for position, (name, cumulative, depth) in enumerate(entries):
+        if name != module:
+            continue
+        imported[name] = cumulative
+        for child, child_cumulative, child_depth in reversed(entries[:position]):
+            if child_depth <= depth:
+                break
+            imported[child] = child_cumulative
+
+    return imported
+
+
+def measure_import(module: str) -> ImportReport:
+    """Import a module in a fresh interpreter and record what it pulls in
+
+    :param module: dotted name of the module
+    :raises ImportError: if the module cannot be imported
+    :returns: cumulative import time of the module and of everything it imported
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise ImportError(f"Importing {module} failed:\n{result.stderr}")
+
+    imported = parse_importtime(result.stderr, module)
+    return ImportReport(module, imported.pop(module, 0), imported)
+
+
+def check_imports(
+    modules: list[str], budget_ms: Optional[float] = None
+) -> list[str]:
+    """Measure the import of every module and collect the violations
+
+    :param modules: dotted names of the modules to be checked
+    :param budget_ms: largest allowed cumulative import time of a module
+    :returns: description of every lazy module imported or budget exceeded
+    """
+
+    problems = []
+    for module in modules:
+        report = measure_import(module)
+        total_ms = report.total_us / 1000
+        print(f"{module:30s} {total_ms:9.1f} ms")
+        for name, cumulative in report.slowest():
+            print(f"    {name:26s} {cumulative / 1000:9.1f} ms")
+
+        for lazy in LAZY_MODULES:
+            if lazy in report.imported:
+                problems.append(f"{module} imports {lazy} at startup")
+        if budget_ms is not None and total_ms > budget_ms:
+            problems.append(f"{module} takes {total_ms:.1f} ms to import")
+
+    return problems
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m musigen.utils.importtime",
+        description="Guard the startup time of the headless import paths",
+    )
+    parser.add_argument("modules", nargs="*", default=GUARDED_MODULES)
+    parser.add_argument(
+        "--budget-ms", type=float, help="fail if a module takes longer to import"
+    )
+    args = parser.parse_args(argv)
+
+    problems = check_imports(args.modules, args.budget_ms)
+    for problem in problems:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,46 @@
+import atexit
+import json
 import logging
-from colorlog import ColoredFormatter
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# listeners still writing, stopped at exit so that their queued records are written
+_running_listeners: set[QueueListener] = set()
+
+
+@atexit.register
+def _stop_listeners():
+    for listener in list(_running_listeners):
+        listener.stop()
+    _running_listeners.clear()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as a compact JSON object on a single line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues records unformatted, so that the listener thread formats them
+
+    The message arguments are only read once the record is written, and must not
+    be changed after the logging call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 class Logger:
@@ -20,25 +61,76 @@ class Logger:
         "%(log_color)s%(message)s%(reset)s"
     )
 
-    def __init__(self):
+    def __init__(self, use_queue: bool = False):
+        """Configure the app logger, without handlers
+
+        The logger level follows the lowest handler level, so calls below it return
+        before any formatting. Pass arguments lazily, as in
+        `logger.debug("fitness %s", fitness)`, to skip building the message too.
+
+        :param use_queue: if True then handlers format and write from a background
+            thread, and logging calls only put the record on a queue
+        """
+
         self.logger = logging.getLogger(Logger.APP_LOGGER_NAME)
-        logging.root.setLevel("DEBUG")
         self.logger.handlers.clear()
+        self.logger.setLevel(logging.NOTSET)
+
+        self.handlers: list[logging.Handler] = []
+        self.use_queue = use_queue
+        self.listener: Optional[QueueListener] = None
+        if use_queue:
+            self.queue: queue.SimpleQueue = queue.SimpleQueue()
+            self.logger.addHandler(DeferredQueueHandler(self.queue))
+
+    def _add_handler(self, handler: logging.Handler, log_level: str):
+        handler.setLevel(log_level)
+        self.handlers.append(handler)
+        self.logger.setLevel(min(h.level for h in self.handlers))
+
+        if not self.use_queue:
+            self.logger.addHandler(handler)
+            return
 
-    def add_file_handler(self, filename: str, log_level: str = "WARNING"):
-        f_formatter = logging.Formatter(self.FILE_LOGFORMAT)
+        # the listener's handlers are fixed once started
+        self.stop()
+        self.listener = QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        _running_listeners.add(self.listener)
+
+    def add_file_handler(
+        self, filename: str, log_level: str = "WARNING", json_lines: bool = False
+    ):
+        if json_lines:
+            f_formatter: logging.Formatter = JsonLinesFormatter()
+        else:
+            f_formatter = logging.Formatter(self.FILE_LOGFORMAT)
         self.file_handler = logging.FileHandler(filename)
         self.file_handler.setFormatter(f_formatter)
-        self.file_handler.setLevel(log_level)
-        self.logger.addHandler(self.file_handler)
+        self._add_handler(self.file_handler, log_level)
+
+    def add_stream_handler(self, log_level: str = "DEBUG", json_lines: bool = False):
+        if json_lines:
+            s_formatter: logging.Formatter = JsonLinesFormatter()
+        else:
+            # colorlog is only needed for the console, not by importers of the logger
+            from colorlog import ColoredFormatter
 
-    def add_stream_handler(self, log_level: str = "DEBUG"):
-        s_formatter = ColoredFormatter(self.STREAM_LOGFORMAT)
+            s_formatter = ColoredFormatter(self.STREAM_LOGFORMAT)
         self.stream_handler = logging.StreamHandler()
         self.stream_handler.setFormatter(s_formatter)
-        self.stream_handler.setLevel(log_level)
-        self.logger.addHandler(self.stream_handler)
-    
+        self._add_handler(self.stream_handler, log_level)
+
+    def stop(self):
+        """Write out the queued records and stop the background writer"""
+
+        if self.listener is not None:
+            self.listener.stop()
+            _running_listeners.discard(self.listener)
+            self.listener = None
+
     @staticmethod
     def get_logger() -> logging.Logger:
         return logging.getLogger(Logger.APP_LOGGER_NAME)
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+Value = TypeVar("Value")
+
+
+class LRUCache(Generic[Value]):
+    """Bounded mapping evicting the least recently used entry when full"""
+
+    def __init__(self, max_size: int) -> None:
+        if max_size < 0:
+            raise ValueError("Cache size can only be positive!")
+        self.max_size = max_size
+        self.entries: OrderedDict[Hashable, Value] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> Optional[Value]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Value):
+        if self.max_size == 0:
+            return
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
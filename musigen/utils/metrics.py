@@ -0,0 +1,257 @@
+import functools
+import math
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, TypeVar
+
+METRICS_ENV = "MUSIGEN_METRICS"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds, from a fast codec call to a slow evolution job
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+STAGE_SECONDS = "musigen_stage_seconds"
+JOB_SECONDS = "musigen_job_seconds"
+REQUEST_SECONDS = "musigen_request_seconds"
+CROSSOVERS = "musigen_crossovers_total"
+MUTATION_FLIPS = "musigen_mutation_flips_total"
+SELECTION_DRAWS = "musigen_selection_draws_total"
+
+HELP = {
+    STAGE_SECONDS: "Time spent in each stage of the core and codec",
+    JOB_SECONDS: "Time from submitting an evolution job to its result",
+    REQUEST_SECONDS: "Time spent answering requests",
+    CROSSOVERS: "Genome pairs crossed over",
+    MUTATION_FLIPS: "Genome bits flipped by mutation",
+    SELECTION_DRAWS: "Parents drawn by selection",
+}
+
+Labels = tuple[tuple[str, str], ...]
+Key = tuple[str, Labels]
+Snapshot = tuple[dict[Key, float], dict[Key, tuple[list[int], float]]]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    """Observation counts per bucket, the last bucket catches everything above"""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Counters, histograms and gauges exposed in the Prometheus text format
+
+    Watched metrics are callbacks read when the metrics are rendered, so that they
+    report the live value of e.g. the jobs in flight.
+    """
+
+    def __init__(self) -> None:
+        self.counters: dict[Key, float] = {}
+        self.histograms: dict[Key, Histogram] = {}
+        self.watched: dict[Key, tuple[str, str, Callable[[], float]]] = {}
+
+    def count(self, name: str, amount: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def watch(
+        self,
+        name: str,
+        description: str,
+        read: Callable[[], float],
+        kind: str = "gauge",
+        **labels: str,
+    ):
+        """Report `read()` under the name and labels, replacing an earlier watch
+
+        :param labels: tell apart the same metric watched by e.g. several apps
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        self.watched[key] = (kind, description, read)
+
+    def snapshot(self) -> Snapshot:
+        """Picklable copy of the counters and histograms, see `merge`"""
+
+        histograms = {
+            key: (list(histogram.counts), histogram.sum)
+            for key, histogram in self.histograms.items()
+        }
+        return dict(self.counters), histograms
+
+    def merge(self, snapshot: Snapshot):
+        """Add the counters and histograms recorded by another registry"""
+
+        counters, histograms = snapshot
+        for (name, labels), amount in counters.items():
+            self.count(name, amount, **dict(labels))
+        for key, (counts, total) in histograms.items():
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.sum += total
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+
+        lines: list[str] = []
+
+        def header(name: str, kind: str, description: Optional[str] = None):
+            lines.append(f"# HELP {name} {description or HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name in sorted({name for name, _ in self.counters}):
+            header(name, "counter")
+            for (counter, labels), amount in sorted(self.counters.items()):
+                if counter == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_number(amount)}")
+
+        for name in sorted({name for name, _ in self.histograms}):
+            header(name, "histogram")
+            for (histogram_name, labels), histogram in sorted(self.histograms.items()):
+                if histogram_name != name:
+                    continue
+                cumulative = 0
+                bounds = [*map(_number, histogram.buckets), "+Inf"]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    bucket_labels = _format_labels((*labels, ("le", bound)))
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        watched = sorted(self.watched.items(), key=lambda item: item[0])
+        for name in sorted({name for name, _ in self.watched}):
+            samples = [(key[1], *value) for key, value in watched if key[0] == name]
+            _, kind, description, _ = samples[0]
+            header(name, kind, description)
+            for labels, _, _, read in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_number(read())}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"')) for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = Registry()
+
+# registry the hooks record into while `call_recorded` runs, in this thread only
+_recording: ContextVar[Optional[Registry]] = ContextVar("recording", default=None)
+_enabled = os.environ.get(METRICS_ENV, "") not in ("", "0")
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True):
+    """Turn the core hooks on or off, they are off unless MUSIGEN_METRICS is set"""
+
+    global _enabled
+    _enabled = on
+
+
+def _active() -> Registry:
+    return _recording.get() or registry
+
+
+def count(name: str, amount: float = 1, **labels: str):
+    """Increment a counter, if the hooks are enabled"""
+
+    if _enabled:
+        _active().count(name, amount, **labels)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator recording the duration of every call in the stage histogram
+
+    While the hooks are disabled the only overhead is a flag check.
+    """
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                _active().observe(STAGE_SECONDS, duration, stage=stage)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def call_recorded(fn: Callable[..., Any], *args) -> tuple[Any, Snapshot]:
+    """Call `fn(*args)` and collect the metrics its hooks record
+
+    Meant to run in a worker process, whose registry the server never renders. The
+    returned snapshot is merged into the server's registry.
+
+    :returns: result of the call and the snapshot of its metrics
+    """
+
+    recorder = Registry()
+    token = _recording.set(recorder)
+    try:
+        return fn(*args), recorder.snapshot()
+    finally:
+        _recording.reset(token)
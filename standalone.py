@@ -3,8 +3,13 @@ import random
 from pathlib import Path
 import itertools
 
+import numpy as np
+
 from musigen.core.evolution import Evolution
-from musigen.core.population import Population
+from musigen.core.memo import FitnessMemo
+from musigen.core.population import FITNESS_DTYPE, Population
+from musigen.history.backends import SQLiteBackend
+from musigen.history.store import RatingStore
 from musigen.utils import helper
 from musigen.player import midi
 from musigen.player.server import AudioServer
@@ -13,7 +18,7 @@ from musigen.utils.logger import Logger
 
 
 def main():
-    musigen_logger = Logger()
+    musigen_logger = Logger(use_queue=True)
     musigen_logger.add_file_handler(filename="file.log")
     musigen_logger.add_stream_handler(log_level="DEBUG")
 
@@ -35,6 +40,8 @@ def main():
         num_mutation_rounds=2,
         fitness_limit=5,
         generation_limit=3,
+        dedupe=True,
+        adaptive_mutation=True,
     )
 
     ppl = Population()
@@ -44,24 +51,49 @@ def main():
     )
 
     player = AudioServer()
+    ratings = RatingStore(SQLiteBackend("ratings.db"))
+    memo = FitnessMemo()
+    session = f"{datetime.datetime.now():%d-%m-%Y-%H-%M}"
+
+    outdir_name.mkdir(parents=True, exist_ok=True)
+    checkpoint = outdir_name / "generations.ckpt"
 
     for population_id in itertools.count(start=0):
         try:
             random.shuffle(ppl.genomes)
 
-            # generate fitness scores
-            for i, genome in enumerate(ppl.genomes):
+            # generate fitness scores, genomes rated before keep their rating
+            for i, (genome, fingerprint) in enumerate(
+                zip(ppl.genomes, ppl.fingerprints().tolist())
+            ):
+                known_fitness = memo.get(fingerprint)
+                if known_fitness is not None:
+                    ppl.fitness[i] = known_fitness
+                    continue
+
                 player.play_tune(genome, tune, with_metronome=True)
                 ppl.fitness[i] = helper.get_fitness_score()
+                memo.put(fingerprint, int(ppl.fitness[i]))
+            ratings.record_population(ppl, population_id, session)
+            ppl.save(checkpoint, append=True)
 
-            evo.run_evolution(ppl)
+            ppl.sort_by_fitness()
             ppl.print_stats(population_id)
+            if ppl.get_genome_fitness(index=0) >= evo.fitness_limit:
+                break
+
+            # the next generation is rated from scratch, apart from memoized genomes
+            ppl.genomes = evo.run_evolution(ppl)
+            ppl.fitness = np.zeros(len(ppl), dtype=FITNESS_DTYPE)
 
         except KeyboardInterrupt:
             player.stop_server()
             print()
             break
 
+    ratings.close()
+    ppl.sort_by_fitness()
+
     print("Playing the best tune generated...")
     player.play_tune(ppl.genomes[0], tune)
 
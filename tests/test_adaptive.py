@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from musigen.core.diversity import Diversity
+from musigen.core.evolution import DEFAULT_TARGET_DIVERSITY, Evolution
+from musigen.core.fitness import zero_fitness
+from musigen.core.population import Population
+
+
+def evolution(**kwargs) -> Evolution:
+    options = dict(
+        mutation_probability=0.1,
+        num_mutation_rounds=1,
+        fitness_limit=100,
+        generation_limit=5,
+        rng=np.random.default_rng(0),
+        adaptive_mutation=True,
+    )
+    options.update(kwargs)
+    return Evolution(**options)
+
+
+def diversity(hamming_diversity: float, genome_length: int = 100) -> Diversity:
+    # two genomes differing at a fraction of the positions
+    counts = np.zeros(genome_length, dtype=np.int64)
+    counts[: round(hamming_diversity * genome_length)] = 1
+    return Diversity(2, counts)
+
+
+def test_random_genomes_keep_about_the_configured_rates():
+    genomes = np.random.default_rng(1).integers(0, 2, (64, 256), np.uint8)
+    scale = evolution().adapt_mutation(Diversity.from_genomes(genomes))
+
+    assert scale == pytest.approx(DEFAULT_TARGET_DIVERSITY / 0.5, rel=0.1)
+
+
+def test_mutation_is_raised_below_and_lowered_above_the_target():
+    evo = evolution(target_diversity=0.2)
+
+    assert evo.adapt_mutation(diversity(0.1)) == pytest.approx(2.0)
+    assert evo.adapt_mutation(diversity(0.4)) == pytest.approx(0.5)
+    assert evo.adapt_mutation(diversity(0.2)) == pytest.approx(1.0)
+
+
+def test_mutation_scale_is_bounded_either_way():
+    evo = evolution(target_diversity=0.5, max_mutation_scale=3.0)
+
+    assert evo.adapt_mutation(diversity(0.0)) == 3.0
+    evo.target_diversity = 0.01
+    assert evo.adapt_mutation(diversity(0.9)) == pytest.approx(1 / 3)
+
+
+def test_scale_applies_to_both_mutation_rates():
+    evo = evolution(bit_mutation_rate=0.3)
+    evo.mutation_scale = 4.0
+
+    assert evo.mutation_rates() == (pytest.approx(0.4), 1.0)
+
+
+def test_adapt_mutation_does_nothing_unless_enabled():
+    evo = evolution(adaptive_mutation=False)
+
+    assert evo.adapt_mutation(diversity(0.0)) == 1.0
+    assert evo.mutation_rates() == (0.1, None)
+
+
+def test_converged_populations_mutate_more():
+    ppl = Population(np.zeros((20, 50), dtype=np.uint8))
+    generations = evolution().iter_generations(ppl, zero_fitness)
+
+    _, stats = next(generations)
+    assert stats.hamming_diversity == 0.0 and stats.mutation_scale == 1.0
+    _, stats = next(generations)
+    assert stats.mutation_scale == 4.0
+
+
+def test_next_generation_uses_the_given_diversity():
+    ppl = Population(np.random.default_rng(2).integers(0, 2, (10, 40), np.uint8))
+    evo = evolution(target_diversity=0.2)
+    evo.next_generation(ppl, diversity(0.05))
+
+    assert evo.mutation_scale == pytest.approx(4.0)
+
+
+@pytest.mark.parametrize(
+    "options", [{"target_diversity": 0.0}, {"max_mutation_scale": 0.5}]
+)
+def test_invalid_parameters_are_rejected(options):
+    with pytest.raises(ValueError):
+        evolution(**options)
@@ -0,0 +1,230 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import webserver
+from musigen.api import mint
+from musigen.api.cache import LRUCache, etag_matches, make_etag
+from musigen.api.executor import CoalescingExecutor, ServerOverloaded
+from musigen.api.hash import encodeGridUrl
+from musigen.api.stream import INVALID_PAYLOAD, TRY_AGAIN_LATER, run_stream
+
+
+def thread_executor(max_workers: int = 2, max_queue: int = 8) -> CoalescingExecutor:
+    return CoalescingExecutor(max_workers, max_queue, ThreadPoolExecutor)
+
+
+def overloaded_executor() -> CoalescingExecutor:
+    executor = thread_executor(max_queue=0)
+    executor.max_workers = 0
+    return executor
+
+
+def test_executor_coalesces_jobs_with_the_same_key():
+    calls = []
+    release = threading.Event()
+
+    def job(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    async def main():
+        executor = thread_executor()
+        first = asyncio.ensure_future(executor.run("key", job, 21))
+        second = asyncio.ensure_future(executor.run("key", job, 21))
+        other = asyncio.ensure_future(executor.run("other", job, 1))
+        await asyncio.sleep(0.05)
+        assert len(executor.in_flight) == 2
+        release.set()
+        results = await asyncio.gather(first, second, other)
+        executor.shutdown()
+        return results
+
+    assert asyncio.run(main()) == [42, 42, 2]
+    assert sorted(calls) == [1, 21]
+
+
+def test_executor_sheds_load_beyond_its_limit():
+    release = threading.Event()
+
+    async def main():
+        executor = thread_executor(max_workers=1, max_queue=1)
+        running = [
+            asyncio.ensure_future(executor.run(key, release.wait, 5)) for key in "ab"
+        ]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServerOverloaded):
+            await executor.run("c", release.wait, 5)
+        # joining a job in flight is still fine
+        joined = asyncio.ensure_future(executor.run("a", release.wait, 5))
+        release.set()
+        await asyncio.gather(*running, joined)
+        assert not executor.in_flight
+        executor.shutdown()
+
+    asyncio.run(main())
+
+
+def test_lru_cache_evicts_the_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_etag_matching():
+    etag = make_etag("content")
+
+    assert etag == make_etag("content") != make_etag("other")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"x", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"x"', etag)
+
+
+@pytest.fixture
+def client():
+    default_executor, default_cache = webserver.executor, webserver.cache
+    webserver.app.state.executor = thread_executor()
+    webserver.app.state.cache = LRUCache(16)
+    with TestClient(webserver.app) as client:
+        yield client
+    webserver.app.state.executor = default_executor
+    webserver.app.state.cache = default_cache
+
+
+@pytest.fixture
+def url():
+    grid = np.random.default_rng(0).integers(0, 2, (8, 16), np.uint8)
+    return encodeGridUrl(grid, "major", 120)
+
+
+def test_seeded_responses_are_cached_with_an_etag(client, url):
+    first = client.get(f"/{url}", params={"seed": 7})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert "immutable" in first.headers["cache-control"]
+
+    second = client.get(f"/{url}", params={"seed": 7})
+    assert second.json() == first.json()
+    assert second.headers["etag"] == etag
+    assert client.app.state.cache.hits == 1
+
+    revalidated = client.get(
+        f"/{url}", params={"seed": 7}, headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_unseeded_responses_are_not_cached(client, url):
+    response = client.get(f"/{url}")
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-store"
+    assert len(client.app.state.cache) == 0
+
+
+def test_overloaded_server_answers_503(client, url):
+    client.app.state.executor = overloaded_executor()
+
+    response = client.get(f"/{url}")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_invalid_grids_answer_400(client):
+    assert client.get("/zz-major-120").status_code == 400
+    assert client.get("/stats/zz-major-120").status_code == 400
+    # a single genome decodes, but can not be evolved
+    assert client.get("/1f-major-120").status_code == 400
+
+
+def test_stats(client, url):
+    stats = client.get(f"/stats/{url}").json()
+
+    assert stats["num_genomes"] == 8
+    assert stats["genome_length"] == 16
+    assert len(stats["allele_frequencies"]) == 16
+    assert 0 < stats["hamming_diversity"] < 1
+
+
+def test_metrics_are_labelled_by_app(client, url):
+    client.get(f"/{url}", params={"seed": 1})
+    text = client.get("/metrics").text
+
+    assert 'musigen_cache_entries{app="webserver"} 1' in text
+    assert 'musigen_jobs_in_flight{app="webserver"} 0' in text
+    assert "musigen_request_seconds_count{" in text
+
+
+def receive_all(client, path: str) -> tuple[list[dict], int]:
+    messages = []
+    with client.websocket_connect(path) as websocket:
+        try:
+            while True:
+                messages.append(websocket.receive_json())
+        except WebSocketDisconnect as e:
+            return messages, e.code
+
+
+def test_stream_is_reproducible(client, url):
+    messages, code = receive_all(client, f"/ws/{url}?generations=3&seed=5")
+
+    assert code == 1000
+    assert [message["generation"] for message in messages] == [1, 2, 3]
+    assert {"best_fitness", "average_fitness", "mutation_scale"} <= set(messages[0])
+    assert receive_all(client, f"/ws/{url}?generations=3&seed=5")[0] == messages
+
+
+def test_stream_evolves_each_generation_from_the_previous(url):
+    stream = list(webserver.stream_url(url, 3, seed=5))
+    evolved = webserver.evolve_url(url, 5)
+
+    # the first generation is the one a single request answers
+    assert len(stream) == 3
+    assert stream[0][0] == evolved
+    assert [stats.generation for _, stats in stream] == [1, 2, 3]
+
+
+def test_mint_stream_keeps_the_grid_encoding():
+    grid_url = "1ff-1f0-10f-major-120"
+    stream = list(mint.stream_url(grid_url, 2, seed=1))
+
+    assert [stats.generation for _, stats in stream] == [1, 2]
+    for evolved, _ in stream:
+        assert evolved.endswith("-major-120")
+        assert len(evolved.split("-")) == 5
+
+
+def test_stream_job_stops_between_generations(url):
+    messages, stop = queue.Queue(), threading.Event()
+    stop.set()
+    run_stream(webserver.stream_url, url, 50, 1, messages, stop)
+
+    assert messages.get_nowait()["generation"] == 1
+    assert messages.get_nowait() is None
+    assert messages.empty()
+
+
+def test_stream_of_an_invalid_grid_closes_with_invalid_payload(client):
+    assert receive_all(client, "/ws/1f-major-120") == ([], INVALID_PAYLOAD)
+
+
+def test_stream_of_an_overloaded_server_closes_with_try_again_later(client, url):
+    client.app.state.executor = overloaded_executor()
+    assert receive_all(client, f"/ws/{url}") == ([], TRY_AGAIN_LATER)
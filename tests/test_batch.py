@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from musigen.core.batch import evolve_batch, evolve_hashes, evolve_populations
+from musigen.core.evolution import Evolution
+from musigen.core.population import Population
+
+
+def evolution(seed: int = 0, **kwargs) -> Evolution:
+    options = dict(
+        mutation_probability=0.5,
+        num_mutation_rounds=2,
+        fitness_limit=10,
+        generation_limit=1,
+        rng=np.random.default_rng(seed),
+    )
+    options.update(kwargs)
+    return Evolution(**options)
+
+
+def stack(seed: int = 0, shape=(4, 6, 12)) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 2, shape, dtype=np.uint8)
+
+
+def test_evolve_batch_keeps_the_shape():
+    genomes = stack()
+    next_generation = evolve_batch(evolution(), genomes)
+
+    assert next_generation.shape == genomes.shape
+    assert next_generation.dtype == np.uint8
+    assert set(np.unique(next_generation)) <= {0, 1}
+
+
+def test_evolve_batch_is_reproducible_with_a_seeded_rng():
+    genomes, fitness = stack(), stack(1, (4, 6)).astype(np.int64)
+
+    np.testing.assert_array_equal(
+        evolve_batch(evolution(3), genomes, fitness),
+        evolve_batch(evolution(3), genomes, fitness),
+    )
+
+
+def test_finished_populations_are_carried_forward_sorted():
+    genomes = stack()
+    fitness = np.zeros((4, 6), dtype=np.int64)
+    fitness[2, 4] = 10
+
+    next_generation = evolve_batch(evolution(), genomes, fitness)
+
+    expected = genomes[2][np.argsort(-fitness[2], kind="stable")]
+    np.testing.assert_array_equal(next_generation[2], expected)
+
+
+def test_single_genome_populations_raise_like_next_generation():
+    evo = evolution()
+    ppl = Population(stack(shape=(1, 8)))
+    with pytest.raises(ValueError):
+        evo.next_generation(ppl)
+    with pytest.raises(ValueError):
+        evolve_populations(evo, [ppl])
+
+
+def test_adaptive_mutation_scales_each_population():
+    evo = evolution(adaptive_mutation=True)
+    scales = []
+    mutate = evo.mutate
+
+    def record_scale(genomes, inplace=False):
+        scales.append(evo.mutation_scale)
+        return mutate(genomes, inplace)
+
+    evo.mutate = record_scale
+    converged = np.zeros((1, 6, 12), dtype=np.uint8)
+    evolve_batch(evo, np.concatenate([stack(shape=(1, 6, 12)), converged]))
+
+    assert len(scales) == 2
+    assert scales[0] < scales[1] == evo.max_mutation_scale
+
+
+def test_evolve_populations_groups_shapes_and_keeps_the_order():
+    populations = [
+        Population(stack(1, (5, 8))),
+        Population(stack(2, (3, 4))),
+        Population(stack(3, (5, 8))),
+    ]
+    before = [ppl.bits.copy() for ppl in populations]
+
+    next_populations = evolve_populations(evolution(), populations)
+
+    assert [ppl.bits.shape for ppl in next_populations] == [(5, 8), (3, 4), (5, 8)]
+    for ppl, bits in zip(populations, before):
+        np.testing.assert_array_equal(ppl.bits, bits)
+
+
+def test_evolve_hashes_round_trips_the_grid_shape():
+    hashes = [Population(stack(i, (4, 16))).to_hash() for i in range(3)]
+    evolved = evolve_hashes(evolution(), hashes)
+
+    assert len(evolved) == 3
+    for population_hash in evolved:
+        assert Population.from_hash(population_hash).bits.shape == (4, 16)
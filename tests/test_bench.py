@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from musigen.bench.cases import CASES
+from musigen.bench.runner import compare, main, run_benchmarks
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_every_case_runs_on_a_small_shape(case):
+    (record,) = run_benchmarks([case], [4], [128], repeat=1)
+
+    assert "skipped" not in record
+    assert record["best_seconds"] <= record["mean_seconds"]
+    assert record["peak_memory_bytes"] > 0
+
+
+def test_shapes_out_of_range_are_skipped():
+    case = next(case for case in CASES if case.min_population_size == 2)
+    too_small, too_large = run_benchmarks([case], [1, 64], [128], max_bits=4096)
+
+    assert too_small["skipped"] == "population too small"
+    assert too_large["skipped"] == "more than 4096 bits"
+
+
+def test_cases_that_do_not_apply_are_skipped():
+    case = next(case for case in CASES if case.name == "melody.decode_batch")
+    (record,) = run_benchmarks([case], [4], [8], repeat=1)
+
+    assert record["skipped"] == "Genome is too short for a single bar"
+
+
+def test_main_writes_and_compares_results(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    options = ["--sizes", "8", "--lengths", "64", "--repeat", "1"]
+    options += ["--cases", "population.sort"]
+
+    assert main([*options, "--output", str(baseline)]) == 0
+    report = json.loads(baseline.read_text())
+    assert report["environment"]["repeat"] == 1
+    assert [r["case"] for r in report["results"]] == ["population.sort"]
+
+    new = ["--output", str(tmp_path / "new.json"), "--compare", str(baseline)]
+    assert main([*options, *new]) == 0
+    assert "x speed" in capsys.readouterr().out
+
+
+def test_compare_against_the_same_run(capsys):
+    results = run_benchmarks(CASES[:1], [8], [64], repeat=1)
+    compare(results, results)
+
+    assert "1.00x speed" in capsys.readouterr().out
+
+
+def test_unknown_case_prefix_is_an_error():
+    with pytest.raises(SystemExit):
+        main(["--cases", "nothing"])
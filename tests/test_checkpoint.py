@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from musigen.core.checkpoint import (
+    HEADER,
+    CheckpointError,
+    GenerationHistory,
+    read_header,
+    record_size,
+    write_generation,
+)
+
+
+@pytest.fixture
+def generations():
+    rng = np.random.default_rng(0)
+    return [
+        (rng.integers(0, 2, (6, 75), np.uint8), rng.integers(-5, 50, 6))
+        for _ in range(4)
+    ]
+
+
+def test_round_trip(tmp_path, generations):
+    path = tmp_path / "run.ckpt"
+    for genomes, fitness in generations:
+        write_generation(path, genomes, fitness, append=True)
+
+    assert read_header(path) == (6, 75)
+    assert path.stat().st_size == HEADER.size + 4 * record_size(6, 75)
+
+    history = GenerationHistory(path)
+    assert len(history) == 4
+    for i, (genomes, fitness) in enumerate(generations):
+        np.testing.assert_array_equal(history.genomes(i), genomes)
+        np.testing.assert_array_equal(history.fitness(i), fitness)
+    np.testing.assert_array_equal(
+        history.best_fitness(), [fitness.max() for _, fitness in generations]
+    )
+
+
+def test_write_without_append_replaces(tmp_path, generations):
+    path = tmp_path / "run.ckpt"
+    for genomes, fitness in generations:
+        write_generation(path, genomes, fitness)
+
+    history = GenerationHistory(path)
+    assert len(history) == 1
+    np.testing.assert_array_equal(history.genomes(0), generations[-1][0])
+
+
+def test_partial_record_is_dropped(tmp_path, generations):
+    path = tmp_path / "run.ckpt"
+    (genomes, fitness), (next_genomes, next_fitness) = generations[:2]
+    write_generation(path, genomes, fitness)
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 10)
+
+    assert len(GenerationHistory(path)) == 1
+    write_generation(path, next_genomes, next_fitness, append=True)
+    history = GenerationHistory(path)
+    assert len(history) == 2
+    np.testing.assert_array_equal(history.genomes(1), next_genomes)
+
+
+def test_append_of_another_shape_raises(tmp_path, generations):
+    path = tmp_path / "run.ckpt"
+    genomes, fitness = generations[0]
+    write_generation(path, genomes, fitness)
+
+    with pytest.raises(CheckpointError):
+        write_generation(path, genomes[:, :10], fitness, append=True)
+
+
+def test_not_a_checkpoint(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(CheckpointError):
+        GenerationHistory(path)
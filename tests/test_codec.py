@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from musigen.core.codec import (
+    BASE64,
+    HEX,
+    MAX_GENOMES,
+    CodecError,
+    decode_population,
+    detect_encoding,
+    encode_population,
+)
+
+
+def reference_hex(genomes) -> str:
+    """Hex population hash as built genome by genome, a set MSB before every row"""
+
+    rows = (int("1" + "".join(map(str, genome)), 2) for genome in genomes)
+    return "-".join(hex(row)[2:] for row in rows)
+
+
+def reference_genomes(population_hash: str) -> list[list[int]]:
+    return [list(map(int, bin(int(row, 16))[3:])) for row in population_hash.split("-")]
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 7), (8, 16), (5, 64), (2, 131)])
+def test_hex_matches_reference(shape):
+    genomes = np.random.default_rng(0).integers(0, 2, size=shape, dtype=np.uint8)
+    population_hash = encode_population(genomes, HEX)
+
+    assert population_hash == reference_hex(genomes.tolist())
+    np.testing.assert_array_equal(
+        decode_population(population_hash), reference_genomes(population_hash)
+    )
+
+
+@pytest.mark.parametrize("encoding", [HEX, BASE64])
+@pytest.mark.parametrize("shape", [(1, 1), (4, 9), (16, 64), (3, 1000)])
+def test_round_trip(encoding, shape):
+    genomes = np.random.default_rng(1).integers(0, 2, size=shape, dtype=np.uint8)
+    population_hash = encode_population(genomes, encoding)
+
+    assert detect_encoding(population_hash) == encoding
+    decoded = decode_population(population_hash)
+    assert decoded.dtype == np.uint8
+    np.testing.assert_array_equal(decoded, genomes)
+
+
+def test_all_zero_rows_keep_their_length():
+    genomes = np.zeros((2, 12), dtype=np.uint8)
+    for encoding in (HEX, BASE64):
+        assert decode_population(encode_population(genomes, encoding)).shape == (2, 12)
+
+
+@pytest.mark.parametrize(
+    "population_hash",
+    [
+        "",
+        "xyz",
+        "1f-zz",
+        "1f-3",
+        "2.4.AA.AA",
+        "2.4.!!",
+        "2.4.AAAA",
+        "0.4.",
+        f"{MAX_GENOMES + 1}.1.AA",
+        "f" * (64 * 1024 + 1),
+    ],
+)
+def test_malformed_hashes_raise(population_hash):
+    with pytest.raises(CodecError):
+        decode_population(population_hash)
+
+
+def test_unknown_encoding_raises():
+    with pytest.raises(ValueError):
+        encode_population(np.zeros((1, 1), dtype=np.uint8), "base32")
@@ -0,0 +1,71 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from musigen.core.diversity import Diversity, allele_counts_words, bit_sliced_counts
+from musigen.core.words import pack_words
+
+
+@pytest.mark.parametrize("shape", [(1, 5), (2, 64), (3, 65), (17, 130), (64, 7)])
+def test_bit_sliced_counts_match_column_sums(shape):
+    genomes = np.random.default_rng(0).integers(0, 2, shape, np.uint8)
+    words = pack_words(genomes)
+
+    np.testing.assert_array_equal(
+        allele_counts_words(words, shape[1]), genomes.sum(axis=0)
+    )
+
+
+def test_bit_sliced_planes_hold_binary_counts():
+    genomes = np.ones((5, 3), dtype=np.uint8)
+    genomes[:, 1] = 0
+    genomes[:2, 2] = 0
+
+    planes = bit_sliced_counts(pack_words(genomes))
+
+    def count(position: int) -> int:
+        return sum(int(plane[0] >> position & 1) << k for k, plane in enumerate(planes))
+
+    assert [count(position) for position in range(3)] == [5, 0, 3]
+
+
+def test_from_words_equals_from_genomes():
+    genomes = np.random.default_rng(1).integers(0, 2, (33, 200), np.uint8)
+
+    from_words = Diversity.from_words(pack_words(genomes), 200)
+    from_genomes = Diversity.from_genomes(genomes)
+
+    assert from_words.num_genomes == from_genomes.num_genomes == 33
+    np.testing.assert_array_equal(from_words.allele_counts, genomes.sum(axis=0))
+    np.testing.assert_array_equal(from_genomes.allele_counts, genomes.sum(axis=0))
+
+
+def test_mean_hamming_distance_matches_pairwise():
+    genomes = np.random.default_rng(2).integers(0, 2, (12, 40), np.uint8)
+    diversity = Diversity.from_genomes(genomes)
+
+    distances = [np.sum(a != b) for a, b in combinations(genomes, 2)]
+    assert diversity.mean_hamming_distance == pytest.approx(np.mean(distances))
+    assert diversity.hamming_diversity == pytest.approx(np.mean(distances) / 40)
+
+
+def test_identical_genomes_have_no_diversity():
+    genomes = np.tile(np.array([1, 0, 1, 1], dtype=np.uint8), (5, 1))
+    diversity = Diversity.from_genomes(genomes)
+
+    assert diversity.entropy == 0.0
+    assert diversity.hamming_diversity == 0.0
+
+
+def test_entropy_of_balanced_positions():
+    genomes = np.array([[0, 1], [1, 1]], dtype=np.uint8)
+    diversity = Diversity.from_genomes(genomes)
+
+    np.testing.assert_allclose(diversity.bit_entropy, [1.0, 0.0])
+    assert diversity.entropy == pytest.approx(0.5)
+
+
+def test_empty_populations():
+    assert Diversity.from_genomes(np.zeros((0, 8), np.uint8)).entropy == 0.0
+    assert Diversity.from_genomes(np.zeros((3, 0), np.uint8)).hamming_diversity == 0.0
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from musigen.core.evolution import Evolution
+from musigen.core.fitness import bit_count_fitness, zero_fitness
+from musigen.core.population import Population
+
+
+def evolution(seed: int = 0, **kwargs) -> Evolution:
+    options = dict(
+        mutation_probability=0.5,
+        num_mutation_rounds=1,
+        fitness_limit=100,
+        generation_limit=10,
+        rng=np.random.default_rng(seed),
+    )
+    options.update(kwargs)
+    return Evolution(**options)
+
+
+def population(seed: int = 0, size: int = 20, length: int = 16) -> Population:
+    ppl = Population()
+    ppl.generate_population(size, length, np.random.default_rng(seed))
+    return ppl
+
+
+def test_iter_generations_yields_sorted_scored_generations():
+    calls = []
+
+    def fitness_fn(genomes):
+        calls.append(len(genomes))
+        return bit_count_fitness(genomes)
+
+    ppl = population()
+    generations = list(evolution().iter_generations(ppl, fitness_fn))
+
+    assert [stats.generation for _, stats in generations] == list(range(10))
+    assert calls == [20] * 10
+    for genomes, stats in generations:
+        fitness = bit_count_fitness(genomes)
+        assert (np.diff(fitness) <= 0).all()
+        assert stats.best_fitness == fitness[0]
+        assert stats.average_fitness == pytest.approx(fitness.mean())
+        assert 0 <= stats.hamming_diversity <= 1
+
+
+def test_iter_generations_is_lazy():
+    calls = []
+
+    def fitness_fn(genomes):
+        calls.append(1)
+        return zero_fitness(genomes)
+
+    generations = evolution().iter_generations(population(), fitness_fn)
+    next(generations)
+    next(generations)
+
+    assert len(calls) == 2
+
+
+def test_iter_generations_keeps_prescored_fitness():
+    ppl = population()
+    ppl.fitness = np.arange(20)
+
+    _, stats = next(evolution().iter_generations(ppl, zero_fitness, prescored=True))
+
+    assert stats.best_fitness == 19
+
+
+def test_iter_generations_stops_at_the_fitness_limit():
+    ppl = population()
+    generations = list(
+        evolution(fitness_limit=0).iter_generations(ppl, bit_count_fitness)
+    )
+
+    assert len(generations) == 1
+
+
+def test_run_improves_onemax_and_leaves_the_last_generation():
+    ppl = population(size=40, length=32)
+    result = evolution(generation_limit=30).run(ppl, bit_count_fitness)
+
+    assert result.generations == 30
+    assert result.stop_reason == "generation_limit"
+    assert len(result.best_fitness) == len(result.average_fitness) == 30
+    assert result.average_fitness[-1] > result.average_fitness[0]
+    assert ppl.get_genome_fitness(index=0) == result.best_fitness[-1]
+
+
+def test_run_stops_at_the_fitness_limit():
+    result = evolution(fitness_limit=12).run(population(), bit_count_fitness)
+
+    assert result.stop_reason == "fitness_limit"
+    assert result.best_fitness[-1] >= 12
+    assert result.generations == len(result.best_fitness)
+
+
+def test_run_stops_without_improvement():
+    result = evolution(generation_limit=50).run(
+        population(), zero_fitness, patience=3
+    )
+
+    assert result.stop_reason == "no_improvement"
+    assert result.generations == 4
+
+
+def test_run_is_reproducible_with_a_seeded_rng():
+    first, second = population(), population()
+    evolution(seed=7).run(first, bit_count_fitness)
+    evolution(seed=7).run(second, bit_count_fitness)
+
+    np.testing.assert_array_equal(first.bits, second.bits)
+
+
+def test_next_generation_keeps_the_population_shape():
+    ppl = population(size=7, length=9)
+    ppl.fitness = bit_count_fitness(ppl.bits)
+    offspring = evolution().next_generation(ppl)
+
+    assert offspring.shape == (7, 9)
+    assert offspring.dtype == np.uint8
@@ -0,0 +1,119 @@
+import io
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from musigen.player.export import export_generations, export_population
+from musigen.player.melody import decode_melodies, scale_table
+from musigen.player.midi import encode_batch_midi
+from musigen.player.server import AudioServer
+from musigen.player.tune import TuneMetadata
+
+SCALE = [60, 62, 64, 65, 67, 69, 71, 72]
+TUNE = TuneMetadata(
+    num_bars=2,
+    num_notes=4,
+    num_steps=1,
+    pauses=True,
+    key="C",
+    scale="major",
+    root=4,
+    bpm=128,
+)
+GENOME_LENGTH = TUNE.num_bars * TUNE.num_notes * AudioServer.BITS_PER_NOTE
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool recording the most chunks in flight at once"""
+
+    def __init__(self, max_workers: int) -> None:
+        super().__init__(max_workers)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self.finished)
+        return future
+
+    def finished(self, _future):
+        with self.lock:
+            self.in_flight -= 1
+
+
+def genomes(num_genomes: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 2, (num_genomes, GENOME_LENGTH), dtype=np.uint8)
+
+
+def expected_midi(population: np.ndarray, index: int, name: str) -> bytes:
+    batch = decode_melodies(
+        population, TUNE, scale_table(SCALE), AudioServer.BITS_PER_NOTE
+    )
+    return encode_batch_midi(batch, index, TUNE.bpm, track_name=name)
+
+
+def test_export_to_a_zip_stream():
+    generations = [genomes(5, 0), genomes(5, 1)]
+    stream = io.BytesIO()
+
+    with ThreadPoolExecutor(2) as executor:
+        num_files = export_generations(
+            generations, TUNE, SCALE, stream, chunk_size=2, executor=executor
+        )
+
+    assert num_files == 10
+    with zipfile.ZipFile(stream) as archive:
+        names = sorted(archive.namelist())
+        assert names[0] == "gen-0000/000000.mid"
+        assert names[-1] == "gen-0001/000004.mid"
+        contents = archive.read("gen-0001/000003.mid")
+    assert contents == expected_midi(generations[1], 3, "000003")
+
+
+def test_export_population_to_a_directory(tmp_path):
+    population = genomes(3)
+
+    with ThreadPoolExecutor(2) as executor:
+        num_files = export_population(
+            population, TUNE, SCALE, tmp_path / "out", executor=executor
+        )
+
+    assert num_files == 3
+    files = sorted(path.name for path in (tmp_path / "out").iterdir())
+    assert files == ["000000.mid", "000001.mid", "000002.mid"]
+    assert (tmp_path / "out" / "000002.mid").read_bytes() == expected_midi(
+        population, 2, "000002"
+    )
+
+
+def test_export_bounds_the_chunks_in_flight():
+    executor = CountingExecutor(2)
+    with executor:
+        export_generations(
+            [genomes(40)],
+            TUNE,
+            SCALE,
+            io.BytesIO(),
+            max_workers=2,
+            chunk_size=1,
+            executor=executor,
+        )
+
+    assert 1 <= executor.max_in_flight <= 4
+
+
+def test_export_in_worker_processes(tmp_path):
+    num_files = export_population(
+        genomes(4), TUNE, SCALE, tmp_path / "tunes.zip", max_workers=2, chunk_size=2
+    )
+
+    assert num_files == 4
+    with zipfile.ZipFile(tmp_path / "tunes.zip") as archive:
+        assert len(archive.namelist()) == 4
@@ -0,0 +1,38 @@
+import hashlib
+
+import numpy as np
+
+from musigen.core.genome import (
+    fingerprint_genomes,
+    genome_fingerprint,
+    pack_genomes,
+    unpack_genomes,
+)
+
+
+def test_pack_round_trip():
+    genomes = np.random.default_rng(0).integers(0, 2, (4, 21), np.uint8)
+    np.testing.assert_array_equal(unpack_genomes(pack_genomes(genomes), 21), genomes)
+
+
+def test_fingerprint_is_blake2b_of_length_and_packed_bits():
+    genome = [1, 0, 1, 1, 0, 0, 0, 0, 1]
+    digest = hashlib.blake2b((9).to_bytes(8, "little"), digest_size=8)
+    digest.update(bytes([0b10110000, 0b10000000]))
+
+    assert genome_fingerprint(genome) == int.from_bytes(digest.digest(), "little")
+
+
+def test_equal_genomes_share_a_fingerprint():
+    genomes = np.random.default_rng(1).integers(0, 2, (50, 40), np.uint8)
+    genomes[7] = genomes[3]
+    fingerprints = fingerprint_genomes(genomes)
+
+    assert fingerprints.dtype == np.uint64
+    assert fingerprints[7] == fingerprints[3]
+    assert len(np.unique(fingerprints)) == 49
+    assert genome_fingerprint(genomes[3].tolist()) == fingerprints[3]
+
+
+def test_fingerprint_depends_on_the_length():
+    assert genome_fingerprint([1, 0, 1]) != genome_fingerprint([1, 0, 1, 0])
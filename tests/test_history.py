@@ -0,0 +1,205 @@
+import threading
+
+import numpy as np
+import pytest
+
+from musigen.core.genome import genome_fingerprint
+from musigen.core.population import Population
+from musigen.history.backends import (
+    HistoryBackend,
+    MemoryBackend,
+    MongoBackend,
+    RatingRecord,
+    SQLiteBackend,
+)
+from musigen.history.store import RatingStore
+
+
+class FakeCursor:
+    def __init__(self, documents: list[dict]) -> None:
+        self.documents = documents
+
+    def sort(self, key: str, direction: int) -> "FakeCursor":
+        ordered = sorted(self.documents, key=lambda d: d[key])
+        return FakeCursor(ordered if direction > 0 else ordered[::-1])
+
+    def __iter__(self):
+        return iter(self.documents)
+
+
+class FakeCollection:
+    """The slice of a pymongo collection the Mongo backend uses"""
+
+    def __init__(self) -> None:
+        self.documents: list[dict] = []
+        self.indexes: list[str] = []
+
+    def create_index(self, key: str):
+        self.indexes.append(key)
+
+    def insert_many(self, documents: list[dict], ordered: bool = True):
+        for document in documents:
+            self.documents.append({"_id": len(self.documents), **document})
+
+    def find(self, query: dict) -> FakeCursor:
+        return FakeCursor(
+            [
+                document
+                for document in self.documents
+                if all(document[key] == value for key, value in query.items())
+            ]
+        )
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name: str) -> FakeCollection:
+        self[name] = FakeCollection()
+        return self[name]
+
+
+class FakeMongoClient:
+    def __init__(self) -> None:
+        self.databases: dict[str, FakeDatabase] = {}
+        self.closed = False
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        return self.databases.setdefault(name, FakeDatabase())
+
+    def close(self):
+        self.closed = True
+
+
+class BlockingBackend(MemoryBackend):
+    """Memory backend whose writes wait until released"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+        self.batches: list[int] = []
+
+    def write_many(self, records: list[RatingRecord]):
+        self.release.wait()
+        self.batches.append(len(records))
+        super().write_many(records)
+
+
+class FailingBackend(MemoryBackend):
+    def write_many(self, records: list[RatingRecord]):
+        raise RuntimeError("database is down")
+
+
+@pytest.fixture(params=["memory", "sqlite", "mongo"])
+def backend(request, tmp_path) -> HistoryBackend:
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "ratings.db"))
+    return MongoBackend(client=FakeMongoClient())
+
+
+def record(genome: list[int], fitness: int, **kwargs) -> RatingRecord:
+    return RatingRecord.from_genome(
+        genome, genome_fingerprint(genome), fitness, **kwargs
+    )
+
+
+def test_record_round_trips_the_genome():
+    genome = [1, 0, 1, 1, 0, 0, 1, 0, 1, 1]
+
+    assert record(genome, 3).genome_bits() == genome
+
+
+def test_backend_finds_the_records_of_a_genome_oldest_first(backend):
+    genome, other = [1, 0, 1, 1, 0], [0, 0, 0, 1, 1]
+    backend.write_many(
+        [
+            record(genome, 1, generation=0, session="a", timestamp=1.0),
+            record(other, 4, generation=0, session="a", timestamp=2.0),
+            record(genome, 5, generation=1, session="a", timestamp=3.0),
+        ]
+    )
+
+    found = backend.find(genome_fingerprint(genome))
+    assert [r.fitness for r in found] == [1, 5]
+    assert [r.generation for r in found] == [0, 1]
+    assert found[0].genome_bits() == genome
+    assert found[0].session == "a" and found[0].timestamp == 1.0
+    assert backend.find(genome_fingerprint([1, 1, 1, 1, 1])) == []
+    backend.close()
+
+
+def test_fingerprints_above_the_signed_range_are_kept(backend):
+    high = record([1, 0, 1], 2)
+    high.fingerprint = 2**64 - 1
+    backend.write_many([high])
+
+    assert backend.find(2**64 - 1)[0].fingerprint == 2**64 - 1
+
+
+def test_mongo_backend_indexes_and_closes_only_its_own_client():
+    client = FakeMongoClient()
+    backend = MongoBackend(database="db", collection="ratings", client=client)
+    backend.write_many([])
+    backend.close()
+
+    assert client["db"]["ratings"].indexes == ["fingerprint"]
+    assert client["db"]["ratings"].documents == []
+    assert not client.closed
+
+
+def test_store_writes_behind_in_batches():
+    backend = BlockingBackend()
+    store = RatingStore(backend, batch_size=2, flush_interval=60)
+    genome = [1, 0, 1, 0]
+
+    for fitness in range(5):
+        store.record(genome, fitness)
+
+    # nothing is written yet, but the ratings are found in the buffer
+    assert len(backend) == 0
+    assert [r.fitness for r in store.find(genome)] == [0, 1, 2, 3, 4]
+
+    backend.release.set()
+    assert store.flush(timeout=5)
+    assert [r.fitness for r in backend.find(genome_fingerprint(genome))] == list(
+        range(5)
+    )
+    assert max(backend.batches) <= 2
+    store.close()
+
+
+def test_store_records_a_population(backend):
+    ppl = Population(np.random.default_rng(0).integers(0, 2, (6, 12), np.uint8))
+    ppl.fitness = np.arange(6)
+
+    with RatingStore(backend, flush_interval=60) as store:
+        store.record_population(ppl, generation=3, session="s")
+        assert store.flush(timeout=5)
+
+        found = store.find(ppl.genomes[4])
+        assert [(r.fitness, r.generation) for r in found] == [(4, 3)]
+
+
+def test_close_writes_out_the_buffer():
+    backend = MemoryBackend()
+    store = RatingStore(backend, flush_interval=60)
+    store.record([1, 1, 0], 2)
+    store.close()
+
+    assert len(backend) == 1
+    with pytest.raises(ValueError):
+        store.record([1, 1, 0], 2)
+
+
+def test_failed_batches_are_dropped():
+    store = RatingStore(FailingBackend(), flush_interval=60)
+    store.record([1, 0], 1)
+
+    assert store.flush(timeout=5)
+    assert store.pending == [] and store.writing == []
+    store.close()
+
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        RatingStore(MemoryBackend(), batch_size=0)
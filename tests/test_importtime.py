@@ -0,0 +1,50 @@
+import pytest
+
+from musigen.utils.importtime import (
+    GUARDED_MODULES,
+    check_imports,
+    main,
+    measure_import,
+    parse_importtime,
+)
+
+LOG = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   numpy.core
+import time:        50 |         50 |     numpy.linalg
+import time:       300 |        450 |   numpy
+import time:        20 |         20 |   wave
+import time:        10 |        480 | musigen.player.synth
+import time:         5 |          5 | unrelated
+"""
+
+
+def test_parse_importtime_collects_the_modules_imported_by_the_module():
+    imported = parse_importtime(LOG, "musigen.player.synth")
+
+    assert imported == {
+        "musigen.player.synth": 480,
+        "wave": 20,
+        "numpy": 450,
+        "numpy.linalg": 50,
+        "numpy.core": 100,
+    }
+
+
+def test_parse_importtime_of_a_module_not_imported():
+    assert parse_importtime(LOG, "pyo") == {}
+
+
+@pytest.mark.parametrize("module", GUARDED_MODULES)
+def test_guarded_modules_do_not_import_the_playback_stack(module):
+    assert check_imports([module]) == []
+
+
+def test_budget_violations_are_reported(capsys):
+    assert main(["musigen.core.genome", "--budget-ms", "0"]) == 1
+    assert "FAIL: musigen.core.genome takes" in capsys.readouterr().err
+
+
+def test_measure_import_of_a_missing_module():
+    with pytest.raises(ImportError):
+        measure_import("musigen.does_not_exist")
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from musigen.core.evolution import Evolution
+from musigen.core.fitness import bit_count_fitness
+from musigen.core.islands import IslandModel, PackedIsland
+from musigen.core.population import Population
+
+
+def evolution(generation_limit: int = 12, fitness_limit: int = 100) -> Evolution:
+    return Evolution(
+        mutation_probability=0.5,
+        num_mutation_rounds=1,
+        fitness_limit=fitness_limit,
+        generation_limit=generation_limit,
+    )
+
+
+def populations(num_islands: int = 3, seed: int = 0) -> list[Population]:
+    rng = np.random.default_rng(seed)
+    islands = []
+    for _ in range(num_islands):
+        ppl = Population()
+        ppl.generate_population(10, 20, rng)
+        islands.append(ppl)
+    return islands
+
+
+def run(model: IslandModel, seed: int):
+    with ThreadPoolExecutor(2) as executor:
+        return model.run(populations(), bit_count_fitness, seed, executor)
+
+
+def test_packed_island_round_trip():
+    ppl = populations(1)[0]
+    ppl.fitness = np.arange(10)
+    unpacked = PackedIsland.from_population(ppl).to_population()
+
+    np.testing.assert_array_equal(unpacked.bits, ppl.bits)
+    np.testing.assert_array_equal(unpacked.fitness, ppl.fitness)
+
+
+def test_migration_copies_the_best_over_the_worst_of_the_next_island():
+    islands = populations(3)
+    for i, ppl in enumerate(islands):
+        ppl.fitness = np.arange(10)[::-1] + 100 * i
+    packed = [PackedIsland.from_population(ppl) for ppl in islands]
+
+    migrated = IslandModel(evolution(), num_migrants=2).migrate(packed)
+    result = [island.to_population() for island in migrated]
+
+    for i, ppl in enumerate(result):
+        source = islands[(i - 1) % 3]
+        np.testing.assert_array_equal(ppl.bits[-2:], source.bits[:2])
+        np.testing.assert_array_equal(ppl.fitness[-2:], source.fitness[:2])
+        np.testing.assert_array_equal(ppl.bits[:-2], islands[i].bits[:-2])
+
+
+def test_run_counts_generations_per_interval():
+    result = run(IslandModel(evolution(12), migration_interval=5), seed=1)
+
+    assert result.generations == 12
+    assert len(result.best_fitness) == 3
+    assert result.stop_reason == "generation_limit"
+    for ppl in result.populations:
+        assert ppl.bits.shape == (10, 20)
+        assert (np.diff(ppl.fitness) <= 0).all()
+    assert sum(result.best_genome()) == result.best_fitness[-1]
+
+
+def test_run_stops_at_the_fitness_limit():
+    result = run(IslandModel(evolution(50, fitness_limit=14)), seed=1)
+
+    assert result.stop_reason == "fitness_limit"
+    assert result.best_fitness[-1] >= 14
+
+
+def test_seeded_runs_are_reproducible():
+    model = IslandModel(evolution(), migration_interval=4)
+    first, second = run(model, seed=5), run(model, seed=5)
+
+    assert first.best_fitness == second.best_fitness
+    for a, b in zip(first.populations, second.populations):
+        np.testing.assert_array_equal(a.bits, b.bits)
+
+
+def test_seeded_runs_match_across_executors():
+    # every island draws from its own seeded stream, whichever worker runs it
+    model = IslandModel(evolution(6), migration_interval=3, max_workers=2)
+    in_threads = run(model, seed=9)
+    in_processes = model.run(populations(), bit_count_fitness, seed=9)
+
+    for a, b in zip(in_threads.populations, in_processes.populations):
+        np.testing.assert_array_equal(a.bits, b.bits)
+
+
+@pytest.mark.parametrize(
+    "options", [{"migration_interval": 0}, {"num_migrants": -1}]
+)
+def test_invalid_parameters_are_rejected(options):
+    with pytest.raises(ValueError):
+        IslandModel(evolution(), **options)
@@ -0,0 +1,138 @@
+import io
+
+import numpy as np
+import pytest
+
+from musigen.player.melody import Melody, decode_melodies
+from musigen.player.midi import encode_batch_midi, encode_midi
+from musigen.player.server import AudioServer
+from musigen.player.tune import TuneMetadata
+
+SCALE = [60, 62, 64, 65, 67, 69, 71, 72]
+BITS_PER_NOTE = AudioServer.BITS_PER_NOTE
+
+
+def tune(pauses: bool = True, num_steps: int = 2) -> TuneMetadata:
+    return TuneMetadata(
+        num_bars=4,
+        num_notes=4,
+        num_steps=num_steps,
+        pauses=pauses,
+        key="C",
+        scale="major",
+        root=4,
+        bpm=128,
+    )
+
+
+def reference_melody(genome, tune: TuneMetadata, scale):
+    """Melody decoded note by note: notes per step, velocity and beat"""
+
+    note_length = 4 / tune.num_notes
+    pause_threshold = 1 << (BITS_PER_NOTE - 1)
+    note_values: list[int] = []
+    velocity: list[int] = []
+    beat: list[float] = []
+
+    for i in range(tune.num_bars * tune.num_notes):
+        chunk = genome[i * BITS_PER_NOTE : (i + 1) * BITS_PER_NOTE]
+        value = sum(bit << index for index, bit in enumerate(chunk))
+        if not tune.pauses:
+            value %= pause_threshold
+
+        if value >= pause_threshold:
+            note_values.append(0)
+            velocity.append(0)
+            beat.append(note_length)
+        elif note_values and note_values[-1] == value:
+            beat[-1] += note_length
+        else:
+            note_values.append(value)
+            velocity.append(127)
+            beat.append(note_length)
+
+    notes = [
+        [int(scale[(value + step * 2) % len(scale)]) for value in note_values]
+        for step in range(tune.num_steps)
+    ]
+    return notes, velocity, beat
+
+
+def genomes(num_genomes: int, seed: int = 0) -> np.ndarray:
+    length = 4 * 4 * BITS_PER_NOTE
+    rng = np.random.default_rng(seed)
+    genomes = rng.integers(0, 2, (num_genomes, length), np.uint8)
+    # repeated notes, which are merged into one longer event
+    genomes[0, BITS_PER_NOTE : 2 * BITS_PER_NOTE] = genomes[0, :BITS_PER_NOTE]
+    genomes[1] = 0
+    return genomes
+
+
+@pytest.mark.parametrize("pauses", [True, False])
+@pytest.mark.parametrize("num_steps", [1, 3])
+def test_decode_melodies_matches_reference(pauses, num_steps):
+    population = genomes(20)
+    batch = decode_melodies(population, tune(pauses, num_steps), SCALE, BITS_PER_NOTE)
+
+    for i, genome in enumerate(population.tolist()):
+        notes, velocity, beat = reference_melody(genome, tune(pauses, num_steps), SCALE)
+        length = batch.lengths[i]
+
+        assert length == len(velocity)
+        assert batch.notes[i, :, :length].tolist() == notes
+        assert batch.velocity[i, :length].tolist() == velocity
+        assert batch.beat[i, :length].tolist() == pytest.approx(beat)
+        assert not batch.velocity[i, length:].any() and not batch.beat[i, length:].any()
+
+
+def test_from_genome_matches_reference():
+    genome = genomes(2, seed=3)[0].tolist()
+    melody = Melody(bits_per_note=BITS_PER_NOTE)
+    melody.from_genome(genome, tune(), SCALE)
+
+    notes, velocity, beat = reference_melody(genome, tune(), SCALE)
+    assert melody.notes == notes
+    assert melody.velocity == velocity
+    assert melody.beat == pytest.approx(beat)
+
+
+def reference_midi(notes, velocity, beat, bpm: int) -> bytes:
+    """The MIDI file MIDIUtil writes for a melody"""
+
+    midiutil = pytest.importorskip("midiutil")
+    midi_file = midiutil.MIDIFile()
+    midi_file.addTrackName(0, 0.0, "Sample Track")
+    midi_file.addTempo(0, 0.0, bpm)
+
+    time = 0.0
+    for i, vel in enumerate(velocity):
+        if vel > 0:
+            for step in notes:
+                midi_file.addNote(0, 0, step[i], time, beat[i], vel)
+        time += beat[i]
+
+    buffer = io.BytesIO()
+    midi_file.writeFile(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_midi_matches_midiutil(seed):
+    population = genomes(4, seed)
+    batch = decode_melodies(population, tune(), SCALE, BITS_PER_NOTE)
+
+    for i, genome in enumerate(population.tolist()):
+        notes, velocity, beat = reference_melody(genome, tune(), SCALE)
+        expected = reference_midi(notes, velocity, beat, 128)
+
+        assert encode_midi(notes, velocity, beat, 128) == expected
+        assert encode_batch_midi(batch, i, 128) == expected
+
+
+def test_midi_header():
+    data = encode_midi([[60]], [127], [1.0], 120)
+
+    assert data[:14] == b"MThd\x00\x00\x00\x06\x00\x01\x00\x02\x03\xc0"
+    assert data.count(b"MTrk") == 2
+    # tempo of 500000 microseconds per quarter note
+    assert b"\xff\x51\x03\x07\xa1\x20" in data
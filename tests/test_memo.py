@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from musigen.api.cache import LRUCache
+from musigen.core.evolution import Evolution
+from musigen.core.fitness import bit_count_fitness, memoized
+from musigen.core.genome import fingerprint_genomes
+from musigen.core.memo import FitnessMemo
+from musigen.core.mutation import dedupe_genomes, duplicate_rows
+from musigen.core.population import Population
+from musigen.utils import lru
+
+
+def test_memo_evicts_the_least_recently_used_genome():
+    memo = FitnessMemo(2)
+    memo.put(1, 10)
+    memo.put(2, 20)
+    assert memo.get(1) == 10
+    memo.put(3, 30)
+
+    assert 2 not in memo
+    assert memo.get(1) == 10 and memo.get(3) == 30
+    assert memo.get(2) is None
+    assert (memo.hits, memo.misses) == (3, 1)
+
+
+def test_memo_and_response_cache_share_the_lru():
+    assert isinstance(FitnessMemo(), lru.LRUCache)
+    assert isinstance(LRUCache(), lru.LRUCache)
+    assert len(FitnessMemo(0)) == 0
+    with pytest.raises(ValueError):
+        FitnessMemo(-1)
+
+
+def test_memo_lookup_and_update():
+    memo = FitnessMemo()
+    memo.update(np.array([5, 7], dtype=np.uint64), np.array([3, 0]))
+    fitness, known = memo.lookup(np.array([7, 6, 5], dtype=np.uint64))
+
+    np.testing.assert_array_equal(fitness, [0, 0, 3])
+    np.testing.assert_array_equal(known, [True, False, True])
+
+
+def test_memoized_scores_every_genome_once():
+    scored = []
+
+    def fitness_fn(genomes):
+        scored.append(len(genomes))
+        return bit_count_fitness(genomes)
+
+    memo = FitnessMemo()
+    score = memoized(fitness_fn, memo)
+    genomes = np.array([[1, 1, 0], [0, 0, 1], [1, 1, 0]], dtype=np.uint8)
+
+    np.testing.assert_array_equal(score(genomes), [2, 1, 2])
+    assert scored == [2]
+
+    more = np.array([[0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+    np.testing.assert_array_equal(score(more), [1, 3])
+    assert scored == [2, 1]
+    assert len(memo) == 3
+
+
+def test_memoized_keeps_human_ratings():
+    memo = FitnessMemo()
+    genomes = np.array([[1, 0, 1, 0]], dtype=np.uint8)
+    memo.update(fingerprint_genomes(genomes), np.array([5]))
+
+    score = memoized(lambda g: pytest.fail("known genomes are not rescored"), memo)
+    np.testing.assert_array_equal(score(genomes), [5])
+
+
+def test_dedupe_genomes_makes_the_rows_distinct():
+    genomes = np.zeros((8, 16), dtype=np.uint8)
+    genomes[4:] = 1
+    deduped = dedupe_genomes(genomes, np.random.default_rng(0))
+
+    assert not duplicate_rows(deduped).any()
+    np.testing.assert_array_equal(deduped[0], genomes[0])
+    np.testing.assert_array_equal(deduped[4], genomes[4])
+    assert not genomes[:4].any()
+
+
+def test_dedupe_gives_up_when_the_rows_can_not_be_distinct():
+    genomes = np.zeros((5, 2), dtype=np.uint8)
+    deduped = dedupe_genomes(genomes, np.random.default_rng(0), max_rounds=3)
+
+    assert len(np.unique(deduped, axis=0)) <= 4
+
+
+def test_evolution_with_dedupe_breeds_distinct_genomes():
+    evo = Evolution(
+        mutation_probability=0.0,
+        num_mutation_rounds=1,
+        fitness_limit=100,
+        generation_limit=1,
+        rng=np.random.default_rng(0),
+        dedupe=True,
+    )
+    ppl = Population(np.tile([1, 0, 1, 1, 0, 0, 1, 0], (10, 1)))
+
+    assert not duplicate_rows(evo.next_generation(ppl)).any()
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from musigen.core.mutation import apply_flips, geometric_positions
+from musigen.core.words import flip_words, pack_words, unpack_words
+from musigen.utils import metrics
+
+
+@pytest.fixture
+def recorded():
+    """Registry the mutation hooks record into during the test"""
+
+    registry = metrics.Registry()
+    token = metrics._recording.set(registry)
+    enabled = metrics.enabled()
+    metrics.enable()
+    yield registry
+    metrics.enable(enabled)
+    metrics._recording.reset(token)
+
+
+def flips(registry: metrics.Registry) -> float:
+    return registry.counters.get((metrics.MUTATION_FLIPS, ()), 0)
+
+
+@pytest.mark.parametrize("probability", [0.001, 0.05, 0.5])
+def test_geometric_positions_are_distinct_and_in_range(probability):
+    positions = geometric_positions(100_000, probability, np.random.default_rng(0))
+
+    assert (np.diff(positions) > 0).all()
+    assert positions.min() >= 0 and positions.max() < 100_000
+    expected = 100_000 * probability
+    assert abs(len(positions) - expected) < 5 * np.sqrt(expected) + 1
+
+
+def test_geometric_positions_edge_probabilities():
+    rng = np.random.default_rng(0)
+    assert len(geometric_positions(10, 0.0, rng)) == 0
+    assert len(geometric_positions(0, 0.5, rng)) == 0
+    np.testing.assert_array_equal(geometric_positions(5, 1.0, rng), np.arange(5))
+
+
+def test_geometric_positions_success_rate_per_trial():
+    rng = np.random.default_rng(2)
+    hits = np.zeros(50)
+    for _ in range(4000):
+        np.add.at(hits, geometric_positions(50, 0.2, rng), 1)
+    np.testing.assert_allclose(hits / 4000, 0.2, atol=0.03)
+
+
+def test_apply_flips_cancels_even_repeats(recorded):
+    genomes = np.zeros((2, 4), dtype=np.uint8)
+    flipped = apply_flips(genomes, np.array([1, 1, 2, 6, 6, 6]))
+
+    np.testing.assert_array_equal(flipped, [[0, 0, 1, 0], [0, 0, 1, 0]])
+    assert not genomes.any()
+    assert flips(recorded) == 2
+
+
+def test_apply_flips_inplace_on_non_contiguous_view():
+    storage = np.zeros((3, 8), dtype=np.uint8)
+    view = storage[:, ::2]
+
+    apply_flips(view, np.array([0, 5, 11]), inplace=True)
+
+    np.testing.assert_array_equal(view, [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1]])
+    assert not storage[:, 1::2].any()
+
+
+def test_flip_words_matches_apply_flips(recorded):
+    rng = np.random.default_rng(3)
+    genomes = rng.integers(0, 2, size=(5, 131), dtype=np.uint8)
+    positions = rng.integers(genomes.size, size=200)
+    positions = np.concatenate([positions, positions[:20]])
+
+    expected = apply_flips(genomes, positions)
+    counted = flips(recorded)
+    words = pack_words(genomes)
+    flip_words(words, 131, positions)
+
+    np.testing.assert_array_equal(unpack_words(words, 131), expected)
+    assert flips(recorded) == 2 * counted
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from musigen.core.neighbours import HammingIndex, SurrogateFitness, popcount
+
+
+def test_popcount():
+    words = np.array([0, 1, 0b1011, 2**64 - 1], dtype=np.uint64)
+    np.testing.assert_array_equal(popcount(words), [0, 1, 3, 64])
+
+
+@pytest.mark.parametrize("num_tables", [None, 4, 16])
+@pytest.mark.parametrize("k", [1, 5])
+def test_query_matches_brute_force(num_tables, k):
+    rng = np.random.default_rng(0)
+    stored = rng.integers(0, 2, (300, 96), np.uint8)
+    index = HammingIndex(96, num_tables=num_tables)
+    # added in two batches, growing the storage
+    index.add(stored[:40], np.arange(40))
+    index.add(stored[40:], np.arange(40, 300))
+
+    queries = np.concatenate([stored[:10] ^ (rng.random((10, 96)) < 0.03), stored[:3]])
+    for query in queries:
+        brute = np.sort((stored != query).sum(axis=1))[:k]
+        ids, distances = index.query(query, k)
+
+        np.testing.assert_array_equal(distances, brute)
+        np.testing.assert_array_equal((stored[ids] != query).sum(axis=1), distances)
+
+
+def test_query_of_an_empty_index():
+    ids, distances = HammingIndex(10).query(np.zeros(10, np.uint8), k=3)
+    assert len(ids) == len(distances) == 0
+
+
+def test_add_rejects_other_genome_lengths():
+    with pytest.raises(ValueError):
+        HammingIndex(10).add(np.zeros((1, 11), np.uint8), np.zeros(1))
+
+
+def test_surrogate_rates_the_least_certain_genomes():
+    rated = []
+
+    def fitness_fn(genomes):
+        rated.append(len(genomes))
+        return genomes.sum(axis=1)
+
+    genomes = np.random.default_rng(1).integers(0, 2, (8, 32), np.uint8)
+    surrogate = SurrogateFitness(fitness_fn, HammingIndex(32), num_rated=3, k=2)
+
+    fitness = surrogate(genomes)
+
+    assert rated == [3]
+    assert len(surrogate.index) == 3
+    np.testing.assert_array_equal(fitness[:3], genomes[:3].sum(axis=1))
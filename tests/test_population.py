@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pytest
+
+from musigen.core.population import Population
+
+
+@pytest.fixture
+def ppl() -> Population:
+    return Population([[0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 0]])
+
+
+def test_genomes_read_rows_as_lists(ppl):
+    assert len(ppl.genomes) == 4
+    assert ppl.genomes[1] == [1, 0, 1]
+    assert ppl.genomes[-1] == [0, 1, 0]
+    assert ppl.genomes[1:3] == [[1, 0, 1], [1, 1, 1]]
+    assert list(ppl.genomes) == ppl.bits.tolist()
+    assert ppl.genomes == [[0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 0]]
+
+
+def test_assigning_a_genome_writes_the_matrix(ppl):
+    ppl.genomes[0] = [1, 1, 0]
+
+    np.testing.assert_array_equal(ppl.bits[0], [1, 1, 0])
+    assert ppl.bits.dtype == np.uint8
+
+
+def test_shuffle_permutes_the_rows(ppl):
+    before = sorted(ppl.genomes)
+    random.Random(3).shuffle(ppl.genomes)
+
+    assert sorted(ppl.genomes) == before
+    assert sorted(ppl.bits.tolist()) == before
+
+
+def test_index_finds_the_first_matching_row(ppl):
+    ppl.genomes[3] = [1, 0, 1]
+
+    assert ppl.genomes.index([1, 0, 1]) == 1
+    with pytest.raises(ValueError):
+        ppl.genomes.index([0, 0, 0])
+
+
+def test_setting_genomes_replaces_the_matrix():
+    ppl = Population()
+    assert len(ppl.genomes) == 0
+
+    ppl.genomes = [[1, 0], [0, 1]]
+    assert ppl.bits.shape == (2, 2)
+    with pytest.raises(ValueError):
+        ppl.genomes = [[1, 0], [0]]
+
+
+def test_eval_genome_fitness_looks_up_the_row(ppl):
+    ppl.fitness = [4, 3, 2, 1]
+
+    assert ppl.eval_genome_fitness([1, 1, 1]) == 2
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from musigen.core.sampling import AliasTable, search_rows
+
+
+def alias_probabilities(table: AliasTable) -> np.ndarray:
+    """Exact probability of every outcome of an alias table"""
+
+    size = len(table)
+    probabilities = table.prob.copy()
+    np.add.at(probabilities, table.alias, 1 - table.prob)
+    return probabilities / size
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [[1.0], [1, 1, 1, 1], [0, 3, 0, 1], [5, 1, 1, 1, 1, 1], [1e-9, 1e9, 3.5]],
+)
+def test_alias_table_is_exact(weights):
+    table = AliasTable(np.array(weights))
+    expected = np.array(weights, dtype=np.float64) / sum(weights)
+    np.testing.assert_allclose(alias_probabilities(table), expected, atol=1e-12)
+
+
+def test_alias_table_never_draws_zero_weights():
+    table = AliasTable(np.array([0, 2, 0, 1, 0]))
+    draws = table.draw(10_000, np.random.default_rng(0))
+    assert set(np.unique(draws)) == {1, 3}
+    assert abs((draws == 1).mean() - 2 / 3) < 0.02
+
+
+@pytest.mark.parametrize("weights", [[], [-1, 2], [0, 0], [[1, 2]]])
+def test_alias_table_rejects_invalid_weights(weights):
+    with pytest.raises(ValueError):
+        AliasTable(np.array(weights))
+
+
+def test_search_rows_matches_searchsorted():
+    rng = np.random.default_rng(1)
+    cumulative = np.cumsum(rng.integers(1, 5, size=(6, 9)), axis=1).astype(float)
+    targets = rng.random((6, 20)) * cumulative[:, -1:]
+
+    expected = np.stack(
+        [np.searchsorted(c, t, side="right") for c, t in zip(cumulative, targets)]
+    )
+    np.testing.assert_array_equal(search_rows(cumulative, targets), expected)
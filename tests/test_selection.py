@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from musigen.core.population import Population
+from musigen.core.selection import (
+    FitnessProportionalSelection,
+    RankSelection,
+    StochasticUniversalSampling,
+    TournamentSelection,
+)
+
+STRATEGIES = [
+    FitnessProportionalSelection(),
+    TournamentSelection(3),
+    RankSelection(1.8),
+    StochasticUniversalSampling(),
+]
+
+
+def population(fitness: list[int]) -> Population:
+    ppl = Population(np.zeros((len(fitness), 4), dtype=np.uint8))
+    ppl.fitness = fitness
+    return ppl
+
+
+def parent_counts(parents: tuple[np.ndarray, np.ndarray], size: int) -> np.ndarray:
+    return np.bincount(np.concatenate(parents).ravel(), minlength=size)
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=lambda s: type(s).__name__)
+def test_select_pairs_shape_and_range(strategy):
+    index_a, index_b = strategy.select_pairs(
+        population([0, 5, 2, 9, 1]), 7, np.random.default_rng(0)
+    )
+
+    assert index_a.shape == index_b.shape == (7,)
+    assert min(index_a.min(), index_b.min()) >= 0
+    assert max(index_a.max(), index_b.max()) < 5
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=lambda s: type(s).__name__)
+def test_select_batch_shape_and_range(strategy):
+    fitness = np.random.default_rng(1).integers(0, 20, (6, 9))
+    index_a, index_b = strategy.select_batch(fitness, 5, np.random.default_rng(0))
+
+    assert index_a.shape == index_b.shape == (6, 5)
+    assert min(index_a.min(), index_b.min()) >= 0
+    assert max(index_a.max(), index_b.max()) < 9
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=lambda s: type(s).__name__)
+def test_fitter_genomes_are_drawn_more_often(strategy):
+    fitness = [0, 0, 0, 50]
+    counts = parent_counts(
+        strategy.select_pairs(population(fitness), 2000, np.random.default_rng(2)), 4
+    )
+
+    assert counts[3] > counts[:3].max()
+
+
+def test_fitness_proportional_weights_are_fitness_plus_one():
+    counts = parent_counts(
+        FitnessProportionalSelection().select_batch(
+            np.array([[0, 1, 3]]), 20_000, np.random.default_rng(3)
+        ),
+        3,
+    )
+
+    np.testing.assert_allclose(counts / counts.sum(), [1 / 7, 2 / 7, 4 / 7], atol=0.01)
+
+
+def test_tournament_of_one_is_uniform():
+    counts = parent_counts(
+        TournamentSelection(1).select_pairs(
+            population([0, 100, 0, 0]), 20_000, np.random.default_rng(4)
+        ),
+        4,
+    )
+
+    np.testing.assert_allclose(counts / counts.sum(), 0.25, atol=0.01)
+
+
+def test_rank_weights_ignore_the_fitness_spread():
+    strategy = RankSelection(2.0)
+
+    np.testing.assert_allclose(strategy.rank_weights(np.array([3, 1, 2])), [2, 0, 1])
+    np.testing.assert_allclose(
+        strategy.rank_weights(np.array([3000, 1, 2])), [2, 0, 1]
+    )
+
+
+def test_sus_gives_every_genome_its_expected_parents():
+    fitness = np.array([[0, 4, 1, 9, 5]])
+    index_a, index_b = StochasticUniversalSampling().select_batch(
+        fitness, 10, np.random.default_rng(5)
+    )
+    counts = parent_counts((index_a, index_b), 5)
+    expected = 20 * (fitness[0] + 1) / (fitness[0] + 1).sum()
+
+    assert (np.abs(counts - expected) < 1).all()
+
+
+def test_sus_pairs_are_shuffled():
+    # without the shuffle the parents come out in row order
+    index_a, index_b = StochasticUniversalSampling().select_batch(
+        np.zeros((1, 50), dtype=np.int64), 25, np.random.default_rng(6)
+    )
+    parents = np.stack((index_a[0], index_b[0]), axis=1).ravel()
+
+    assert (np.diff(parents) < 0).any()
+
+
+@pytest.mark.parametrize(
+    "strategy, fitness",
+    [
+        (FitnessProportionalSelection(), [[0]]),
+        (RankSelection(), [[3]]),
+        (StochasticUniversalSampling(), [[-1, -1]]),
+    ],
+    ids=["proportional", "rank", "sus"],
+)
+def test_select_batch_rejects_degenerate_populations(strategy, fitness):
+    with pytest.raises(ValueError):
+        strategy.select_batch(np.array(fitness), 1, np.random.default_rng(0))
+
+
+@pytest.mark.parametrize(
+    "factory", [lambda: TournamentSelection(0), lambda: RankSelection(2.5)]
+)
+def test_invalid_parameters_are_rejected(factory):
+    with pytest.raises(ValueError):
+        factory()
@@ -0,0 +1,125 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from musigen.player.melody import MelodyBatch
+from musigen.player.server import AudioServer
+from musigen.player.synth import (
+    adsr_envelope,
+    midi_to_frequency,
+    render_batch,
+    render_genomes,
+    to_pcm16,
+    wav_bytes,
+    write_wav,
+)
+from musigen.player.tune import TuneMetadata
+
+SAMPLE_RATE = 8000
+
+
+def single_note(note: int = 69, beats: float = 1.0, velocity: int = 127):
+    return MelodyBatch(
+        notes=np.array([[[note]]]),
+        velocity=np.array([[velocity]]),
+        beat=np.array([[beats]]),
+        lengths=np.array([1]),
+    )
+
+
+def test_midi_to_frequency():
+    frequency = midi_to_frequency(np.array([69, 81, 57]))
+    np.testing.assert_allclose(frequency, [440, 880, 220])
+
+
+def test_adsr_envelope_shape():
+    attack, sustain = AudioServer.ATTACK, AudioServer.SUSTAIN
+    elapsed = np.array([-0.1, attack / 2, attack, 0.5, 1.0 + AudioServer.RELEASE])
+    envelope = adsr_envelope(elapsed, np.full(5, 1.0))
+
+    np.testing.assert_allclose(envelope, [0, 0.5, 1, sustain, 0], atol=1e-9)
+
+
+def test_render_batch_plays_the_note_for_its_beats():
+    samples = render_batch(single_note(beats=2.0), bpm=120, sample_rate=SAMPLE_RATE)
+
+    # two beats at 120 bpm last one second, followed by the release
+    expected = int(np.ceil((1.0 + AudioServer.RELEASE) * SAMPLE_RATE))
+    assert samples.shape == (1, expected)
+    assert samples.dtype == np.float32
+
+    spectrum = np.abs(np.fft.rfft(samples[0, :SAMPLE_RATE]))
+    assert np.argmax(spectrum) == 440
+
+
+def test_render_batch_pads_shorter_melodies_with_silence():
+    batch = MelodyBatch(
+        notes=np.array([[[60, 60]], [[64, 0]]]),
+        velocity=np.array([[100, 100], [100, 0]]),
+        beat=np.array([[1.0, 1.0], [1.0, 0.0]]),
+        lengths=np.array([2, 1]),
+    )
+    samples = render_batch(batch, bpm=60, sample_rate=SAMPLE_RATE)
+
+    tail = int((1.0 + AudioServer.RELEASE) * SAMPLE_RATE) + 2
+    assert np.abs(samples[0, tail : 2 * SAMPLE_RATE]).max() > 0
+    assert not samples[1, tail:].any()
+
+
+def test_render_batch_chunks_do_not_change_the_samples():
+    rng = np.random.default_rng(0)
+    batch = MelodyBatch(
+        notes=rng.integers(48, 72, (5, 2, 4)),
+        velocity=rng.integers(0, 128, (5, 4)),
+        beat=rng.choice([0.5, 1.0], (5, 4)),
+        lengths=np.full(5, 4),
+    )
+
+    whole = render_batch(batch, bpm=140, sample_rate=SAMPLE_RATE)
+    chunked = render_batch(batch, bpm=140, sample_rate=SAMPLE_RATE, chunk_samples=1)
+    np.testing.assert_array_equal(whole, chunked)
+
+
+def test_to_pcm16_clips_and_scales():
+    pcm = np.frombuffer(to_pcm16(np.array([0.0, 0.5, -1.0, 2.0])), dtype="<i2")
+
+    np.testing.assert_array_equal(pcm, [0, 16383, -32767, 32767])
+
+
+@pytest.mark.parametrize("to_path", [False, True])
+def test_write_wav_is_mono_16_bit(tmp_path, to_path):
+    samples = np.linspace(-1, 1, 100, dtype=np.float32)
+    destination = tmp_path / "note.wav" if to_path else io.BytesIO()
+    write_wav(destination, samples, SAMPLE_RATE)
+
+    if to_path:
+        destination = str(destination)
+    else:
+        destination.seek(0)
+    with wave.open(destination, "rb") as wav:
+        assert wav.getnchannels() == 1
+        assert wav.getsampwidth() == 2
+        assert wav.getframerate() == SAMPLE_RATE
+        assert wav.readframes(wav.getnframes()) == to_pcm16(samples)
+
+
+def test_wav_bytes_of_rendered_genomes():
+    tune = TuneMetadata(
+        num_bars=1,
+        num_notes=4,
+        num_steps=1,
+        pauses=False,
+        key="C",
+        scale="major",
+        root=4,
+        bpm=120,
+    )
+    genomes = np.ones((2, 4 * AudioServer.BITS_PER_NOTE), dtype=np.uint8)
+    samples = render_genomes(genomes, tune, [60, 62, 64, 65], SAMPLE_RATE)
+
+    assert samples.shape[0] == 2
+    contents = wav_bytes(samples[0], SAMPLE_RATE)
+    assert contents[:4] == b"RIFF" and contents[8:12] == b"WAVE"
+    assert len(contents) == 44 + 2 * samples.shape[1]
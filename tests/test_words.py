@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from musigen.core.evolution import MULTI_POINT, UNIFORM, Evolution
+from musigen.core.words import (
+    GenerationBuffers,
+    crossover_words,
+    multi_point_masks,
+    pack_words,
+    uniform_masks,
+    unpack_words,
+)
+
+
+@pytest.mark.parametrize("genome_length", [1, 63, 64, 65, 200])
+def test_pack_round_trip(genome_length):
+    genomes = np.random.default_rng(0).integers(0, 2, (7, genome_length), np.uint8)
+    words = pack_words(genomes)
+
+    assert words.shape == (7, -(-genome_length // 64))
+    np.testing.assert_array_equal(unpack_words(words, genome_length), genomes)
+
+
+def test_pack_is_lsb_first():
+    genomes = np.zeros((1, 70), dtype=np.uint8)
+    genomes[0, [0, 3, 64]] = 1
+    np.testing.assert_array_equal(pack_words(genomes), [[0b1001, 1]])
+
+
+def test_crossover_words_takes_masked_bits_from_the_first_parent():
+    rng = np.random.default_rng(1)
+    a, b, masks = (rng.integers(0, 2, (4, 150), np.uint8) for _ in range(3))
+    out_a = np.empty((4, 3), dtype=np.uint64)
+    out_b = np.empty((4, 3), dtype=np.uint64)
+
+    crossover_words(pack_words(a), pack_words(b), pack_words(masks), out_a, out_b)
+
+    np.testing.assert_array_equal(unpack_words(out_a, 150), np.where(masks, a, b))
+    np.testing.assert_array_equal(unpack_words(out_b, 150), np.where(masks, b, a))
+
+
+@pytest.mark.parametrize("num_points", [1, 2, 5])
+@pytest.mark.parametrize("genome_length", [2, 64, 130])
+def test_multi_point_masks_alternate_at_the_cuts(num_points, genome_length):
+    masks = multi_point_masks(6, genome_length, num_points, np.random.default_rng(2))
+
+    # same draws as the masks: a bit takes the first parent after an even number
+    # of cuts at or before it
+    cuts = np.random.default_rng(2).integers(1, genome_length, size=(6, num_points))
+    positions = np.arange(genome_length)
+    num_cuts = (cuts[:, :, None] <= positions).sum(axis=1)
+    expected = (num_cuts % 2 == 0).astype(np.uint8)
+
+    np.testing.assert_array_equal(unpack_words(masks, genome_length), expected)
+
+
+def test_uniform_masks_are_fair():
+    masks = uniform_masks(200, 640, np.random.default_rng(3))
+    assert abs(unpack_words(masks, 640).mean() - 0.5) < 0.01
+
+
+def test_uniform_masks_fill_the_given_buffer():
+    out = np.zeros((7, 3), dtype=np.uint64)
+    masks = uniform_masks(7, 150, np.random.default_rng(5), out)
+
+    assert masks is out
+    np.testing.assert_array_equal(out, uniform_masks(7, 150, np.random.default_rng(5)))
+
+
+def test_generation_buffers_round_trip_and_swap():
+    genomes = np.random.default_rng(4).integers(0, 2, (5, 100), np.uint8)
+    buffers = GenerationBuffers.from_genomes(genomes)
+
+    np.testing.assert_array_equal(buffers.genomes(), genomes)
+    assert buffers.next.shape == (6, 2)
+
+    buffers.next[:5] = pack_words(1 - genomes)
+    buffers.swap()
+    np.testing.assert_array_equal(buffers.genomes(), 1 - genomes)
+
+
+def test_generation_buffers_need_two_genomes():
+    with pytest.raises(ValueError):
+        GenerationBuffers(1, 10)
+
+
+def evolution(crossover_method: str, mutation_probability: float = 0.0) -> Evolution:
+    return Evolution(
+        mutation_probability=mutation_probability,
+        num_mutation_rounds=1,
+        fitness_limit=1000,
+        generation_limit=1,
+        rng=np.random.default_rng(0),
+        crossover_method=crossover_method,
+    )
+
+
+@pytest.mark.parametrize("crossover_method", [MULTI_POINT, UNIFORM])
+def test_next_generation_words_breeds_into_the_swapped_buffers(crossover_method):
+    genomes = np.random.default_rng(1).integers(0, 2, (7, 130), np.uint8)
+    buffers = GenerationBuffers.from_genomes(genomes)
+    previous = buffers.current
+
+    current = evolution(crossover_method).next_generation_words(buffers, np.arange(7))
+
+    assert current.shape == (7, 3)
+    assert np.shares_memory(current, buffers.generations[0])
+    assert not np.shares_memory(current, previous)
+    np.testing.assert_array_equal(unpack_words(previous, 130), genomes)
+
+
+@pytest.mark.parametrize("crossover_method", [MULTI_POINT, UNIFORM])
+def test_next_generation_words_keeps_the_offspring_of_a_pair_together(
+    crossover_method,
+):
+    pattern = np.random.default_rng(2).integers(0, 2, 100, np.uint8)
+    genomes = np.stack([pattern, 1 - pattern] * 4)
+    buffers = GenerationBuffers.from_genomes(genomes)
+
+    evolution(crossover_method).next_generation_words(buffers, np.zeros(8))
+    offspring = buffers.genomes()
+
+    # crossing p with its complement gives two complements, p with p two copies
+    pairs = offspring[0::2] ^ offspring[1::2]
+    assert (pairs.min(axis=1) == pairs.max(axis=1)).all()
+
+
+def test_next_generation_words_mutates_the_offspring():
+    genomes = np.zeros((8, 200), dtype=np.uint8)
+    buffers = GenerationBuffers.from_genomes(genomes)
+
+    evolution(UNIFORM, mutation_probability=1.0).next_generation_words(
+        buffers, np.zeros(8)
+    )
+
+    assert buffers.genomes().sum(axis=1).tolist() == [1] * 8
+
+
+def test_next_generation_words_stops_at_the_fitness_limit():
+    genomes = np.random.default_rng(2).integers(0, 2, (4, 64), np.uint8)
+    buffers = GenerationBuffers.from_genomes(genomes)
+
+    current = evolution(UNIFORM).next_generation_words(buffers, [0, 1000, 0, 0])
+
+    np.testing.assert_array_equal(unpack_words(current, 64), genomes)
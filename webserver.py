@@ -1,11 +1,23 @@
+from typing import Optional
+
+import numpy as np
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from musigen.core.diversity import Diversity
 from musigen.core.evolution import Evolution
+from musigen.core.fitness import zero_fitness
+from musigen.core.genome import GenomeMatrix
 from musigen.core.population import Population
-from musigen.api.hash import decodeUrl, encodeUrl
+from musigen.api.cache import LRUCache
+from musigen.api.executor import CoalescingExecutor
+from musigen.api.hash import decodeGridUrl, encodeGridUrl
+from musigen.api.service import adaptive_mutation, evolution_router, install_metrics
+from musigen.api.stream import GenerationStream
 
 app = FastAPI()
+executor = CoalescingExecutor.from_env()
+cache = LRUCache.from_env()
 
 origins = [
     "http://localhost",
@@ -22,30 +34,51 @@ app.add_middleware(
 )
 
 
-def main(grid_hash: str) -> str:
+def create_evolution(
+    seed: Optional[int] = None, generation_limit: int = 3
+) -> Evolution:
     mutation_probability = 0.05
     num_mutations = 5
 
-    evo = Evolution(
+    return Evolution(
         mutation_probability=mutation_probability,
         num_mutation_rounds=num_mutations,
         fitness_limit=5,
-        generation_limit=3,
+        generation_limit=generation_limit,
+        rng=np.random.default_rng(seed),
+        adaptive_mutation=adaptive_mutation(),
     )
 
-    ppl = Population.from_hash(grid_hash)
-    ppl.genomes = evo.run_evolution(ppl)
-    return ppl.to_hash()
 
+def main(grid: GenomeMatrix, seed: Optional[int] = None) -> GenomeMatrix:
+    evo = create_evolution(seed)
+    ppl = Population(grid)
+    return evo.next_generation(ppl)
+
+
+def evolve_url(synthpad_data_url: str, seed: Optional[int] = None) -> str:
+    grid, scale, bpm, encoding = decodeGridUrl(synthpad_data_url)
+    updated_grid = main(grid, seed)
+    return encodeGridUrl(updated_grid, scale, bpm, encoding)
+
+
+def stream_url(
+    synthpad_data_url: str, generations: int, seed: Optional[int] = None
+) -> GenerationStream:
+    grid, scale, bpm, encoding = decodeGridUrl(synthpad_data_url)
+    evo = create_evolution(seed, generation_limit=generations + 1)
+    stream = evo.iter_generations(Population(grid), zero_fitness)
+
+    # the first generation is the grid of the url itself
+    next(stream)
+    for genomes, stats in stream:
+        yield encodeGridUrl(genomes, scale, bpm, encoding), stats
 
-@app.get("/{synthpad_data_url}")
-def read_item(synthpad_data_url: str):
-    if synthpad_data_url == "favicon.ico":
-        return
 
-    grid_hash, scale, bpm = decodeUrl(synthpad_data_url)
-    updated_grid_hash = main(grid_hash)
+def url_diversity(synthpad_data_url: str) -> Diversity:
+    grid, _, _, _ = decodeGridUrl(synthpad_data_url)
+    return Population(grid).diversity()
 
-    return encodeUrl(updated_grid_hash, scale, bpm)
 
-@app.post()
+install_metrics(app, "webserver", executor, cache)
+app.include_router(evolution_router(evolve_url, url_diversity, stream_url))